@@ -0,0 +1 @@
+"""Benchmarks de parsing e extração sobre páginas sintéticas do fandom."""
@@ -0,0 +1,305 @@
+"""Gerador de páginas sintéticas no formato das páginas do fandom.
+
+As páginas reproduzem o que pesa no parsing de uma página real de ~300 KB:
+``<head>`` com folhas de estilo e scripts de configuração longos, a navegação
+global do fandom, o infobox portátil (``aside.portable-infobox``) com N campos,
+alguns deles em lista, o corpo do artigo com parágrafos cheios de links, uma
+navbox em tabela e o rodapé.
+
+Uso pela linha de comando, para gravar páginas em disco::
+
+    python -m benchmarks.corpus --out corpus/ --count 32 --size 300000
+"""
+
+import argparse
+import json
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+BASE_URL = "https://harrypotter.fandom.com/pt-br/wiki/"
+DEFAULT_SIZE = 300_000
+DEFAULT_FIELDS = 20
+DEFAULT_LIST_RATIO = 0.3
+
+FIRST_NAMES = [
+    "Harry",
+    "Hermione",
+    "Rony",
+    "Gina",
+    "Neville",
+    "Luna",
+    "Draco",
+    "Severo",
+    "Alvo",
+    "Minerva",
+    "Rúbeo",
+    "Sírius",
+    "Remo",
+    "Ninfadora",
+    "Belatriz",
+    "Dobby",
+    "Olívio",
+]
+LAST_NAMES = [
+    "Potter",
+    "Granger",
+    "Weasley",
+    "Longbottom",
+    "Lovegood",
+    "Malfoy",
+    "Snape",
+    "Dumbledore",
+    "McGonagall",
+    "Hagrid",
+    "Black",
+    "Lupin",
+    "Tonks",
+    "Lestrange",
+    "Olho-Tonto",
+]
+LABELS = [
+    "Nascimento",
+    "Morte",
+    "Espécie",
+    "Gênero",
+    "Altura",
+    "Cor dos olhos",
+    "Cor do cabelo",
+    "Cor da pele",
+    "Família",
+    "Casa",
+    "Varinha",
+    "Patrono",
+    "Ocupação",
+    "Filiação",
+    "Lealdade",
+    "Título",
+    "Apelidos",
+    "Status sanguíneo",
+    "Estado civil",
+    "Bicho-papão",
+    "Animagia",
+    "Aparência",
+    "Afiliação",
+    "Primeira aparição",
+    "Interpretado por",
+]
+WORDS = [
+    "bruxo",
+    "varinha",
+    "castelo",
+    "feitiço",
+    "poção",
+    "professor",
+    "escola",
+    "magia",
+    "Hogwarts",
+    "Ministério",
+    "guerra",
+    "família",
+    "irmão",
+    "aluno",
+    "torneio",
+    "dragão",
+    "floresta",
+    "proibida",
+    "câmara",
+    "secreta",
+    "segredos",
+    "batalha",
+    "ordem",
+    "fênix",
+    "comensal",
+    "morte",
+    "profecia",
+    "relíquia",
+    "pedra",
+    "filosofal",
+    "cálice",
+    "fogo",
+]
+
+
+@dataclass(frozen=True)
+class Page:
+    """Página gerada; tem ``content`` como uma resposta do requests."""
+
+    url: str
+    nome: str
+    content: bytes
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    """Gera uma frase de palavras aleatórias."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def link(rng: random.Random) -> str:
+    """Gera um link interno do wiki."""
+    text = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return f'<a href="/pt-br/wiki/{text.replace(" ", "_")}" title="{text}">{text}</a>'
+
+
+def head(rng: random.Random, size: int) -> str:
+    """Gera o ``<head>``: estilos e scripts de configuração (cerca de 15% da página)."""
+    parts = ['<head><meta charset="utf-8"><title>Harry Potter Wiki | Fandom</title>']
+    for i in range(30):
+        parts.append(f'<link rel="stylesheet" href="/load.php?modules=skin.{i}&amp;only=styles">')
+
+    config = {
+        f"wg{rng.choice(WORDS).capitalize()}{i}": sentence(rng, 6) for i in range(size // 600)
+    }
+    parts.append(
+        f"<script>window.mw.config.set({json.dumps(config, ensure_ascii=False)});</script>"
+    )
+    parts.append('<script async src="/load.php?modules=startup&amp;only=scripts"></script></head>')
+
+    return "".join(parts)
+
+
+def navigation(rng: random.Random) -> str:
+    """Gera a navegação global do fandom."""
+    items = []
+    for _ in range(8):
+        entries = "".join(f"<li>{link(rng)}</li>" for _ in range(12))
+        items.append(f'<li class="wds-dropdown"><ul class="wds-list">{entries}</ul></li>')
+
+    return (
+        '<div class="global-navigation"><nav class="fandom-community-header">'
+        f'<ul class="wds-tabs">{"".join(items)}</ul></nav></div>'
+    )
+
+
+def infobox(rng: random.Random, nome: str, fields: int, list_ratio: float, banner: bool) -> str:
+    """Gera o infobox portátil com o título, o banner e N campos."""
+    labels = ["Nascimento"] if banner else []
+    others = [label for label in LABELS if label != "Nascimento"]
+    labels += rng.sample(others, min(fields - len(labels), len(others)))
+
+    items = []
+    for label in labels:
+        if rng.random() < list_ratio:
+            entries = "".join(f"<li>{link(rng)}</li>" for _ in range(rng.randint(2, 6)))
+            value = f"<ul>{entries}</ul>"
+        else:
+            value = f"{sentence(rng, rng.randint(1, 4))} <sup>[1]</sup>"
+        items.append(
+            '<div class="pi-item pi-data pi-item-spacing pi-border-color">'
+            f'<h3 class="pi-data-label pi-secondary-font">{label}</h3>'
+            f'<div class="pi-data-value pi-font">{value}</div></div>'
+        )
+
+    header = (
+        '<h2 class="pi-item pi-header pi-secondary-font pi-item-spacing '
+        'pi-secondary-background"><center>Informações biográficas</center></h2>'
+    )
+    return (
+        '<aside class="portable-infobox pi-background pi-border-color pi-theme-wikia">'
+        f'<h2 class="pi-item pi-item-spacing pi-title pi-secondary-background">{nome}</h2>'
+        '<figure class="pi-item pi-image"><img src="/images/retrato.png" alt=""></figure>'
+        f'<section class="pi-item pi-group">{header}{"".join(items)}</section></aside>'
+    )
+
+
+def body(rng: random.Random, size: int) -> str:
+    """Gera parágrafos com links e uma navbox, somando ``size`` bytes."""
+    rows = "".join(
+        f"<tr><th>{rng.choice(WORDS)}</th><td>{' · '.join(link(rng) for _ in range(10))}</td></tr>"
+        for _ in range(15)
+    )
+    navbox = f'<table class="navbox">{rows}</table>'
+
+    paragraphs, length = [], len(navbox.encode())
+    while length < size:
+        words = [link(rng) if rng.random() < 0.1 else rng.choice(WORDS) for _ in range(80)]
+        paragraph = f"<p>{' '.join(words)}.</p>"
+        if rng.random() < 0.1:
+            paragraph = f'<h2><span class="mw-headline">{sentence(rng, 3)}</span></h2>{paragraph}'
+        paragraphs.append(paragraph)
+        length += len(paragraph.encode())
+
+    return "".join(paragraphs) + navbox
+
+
+def make_page(
+    seed: int,
+    size: int = DEFAULT_SIZE,
+    fields: int = DEFAULT_FIELDS,
+    list_ratio: float = DEFAULT_LIST_RATIO,
+    banner: bool = True,
+) -> Page:
+    """Gera uma página de personagem.
+
+    Args:
+        seed: Semente; a mesma semente gera a mesma página
+        size: Tamanho aproximado da página, em bytes
+        fields: Número de campos do infobox (até len(LABELS))
+        list_ratio: Fração dos campos com valores em lista
+        banner: Se True, o infobox tem o campo "Nascimento"
+
+    Returns:
+        Página com o HTML em bytes UTF-8
+    """
+    rng = random.Random(seed)
+    nome = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {seed}"
+    fields = max(1, min(fields, len(LABELS)))
+
+    top = (
+        f'<!DOCTYPE html><html lang="pt-br">{head(rng, size)}<body class="skin-fandomdesktop">'
+        f'{navigation(rng)}<main class="page__main"><h1 class="page-header__title">{nome}</h1>'
+        f'<div class="mw-parser-output">{infobox(rng, nome, fields, list_ratio, banner)}'
+    )
+    bottom = (
+        '</div></main><footer class="global-footer">'
+        f"{''.join(f'<p>{sentence(rng, 12)}</p>' for _ in range(10))}</footer></body></html>"
+    )
+    html = top + body(rng, size - len(top.encode()) - len(bottom.encode())) + bottom
+
+    return Page(BASE_URL + nome.replace(" ", "_"), nome, html.encode())
+
+
+def corpus(count: int, variants: int = 32, **options) -> Iterator[Page]:
+    """Gera ``count`` páginas, repetindo ``variants`` páginas distintas.
+
+    Gerar e guardar 100 mil páginas de 300 KB não cabe em memória, então um
+    conjunto de variantes é gerado uma vez e percorrido em ciclo. Páginas
+    consecutivas são sempre distintas (se ``variants`` > 1).
+
+    Args:
+        count: Número de páginas
+        variants: Número de páginas distintas
+        **options: Opções de make_page()
+
+    Yields:
+        Páginas geradas
+    """
+    pages = [make_page(seed, **options) for seed in range(min(count, variants))]
+    for i in range(count):
+        yield pages[i % len(pages)]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Grava páginas geradas em disco."""
+    parser = argparse.ArgumentParser(description="Generate synthetic fandom character pages")
+    parser.add_argument("--out", default="corpus", help="Output directory (default: corpus/)")
+    parser.add_argument("--count", type=int, default=32, help="Number of pages (default: 32)")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Page size in bytes")
+    parser.add_argument("--fields", type=int, default=DEFAULT_FIELDS, help="Infobox fields")
+    parser.add_argument(
+        "--list-ratio", type=float, default=DEFAULT_LIST_RATIO, help="Share of list fields"
+    )
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for seed in range(args.count):
+        page = make_page(seed, args.size, args.fields, args.list_ratio)
+        (out / f"{seed:06d}.html").write_bytes(page.content)
+
+    print(f"{args.count} page(s) written to {out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Microbenchmarks de parsing e extração: BeautifulSoup (sync) x selectolax.
+
+Mede, para cada caminho, a vazão (páginas/s e MB/s) sobre o corpus sintético
+e a alocação de memória por página (pico e memória retida, via tracemalloc, em
+uma amostra das páginas). O selectolax aloca a árvore do lexbor pelo alocador
+do Python, então ela entra na medida junto com os objetos do BeautifulSoup. A
+memória retida inclui a última árvore guardada pelo scraper para reaproveitar
+o parsing.
+
+Uso::
+
+    python -m benchmarks.parse --pages 1000 10000 100000
+    python -m benchmarks.parse --pages 1000 --case selectolax --size 100000
+"""
+
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from bs4 import BeautifulSoup
+from loguru import logger
+
+from src.scrapers import WikiCallerMultiprocessing, WikiCallerSync
+
+from .corpus import DEFAULT_FIELDS, DEFAULT_LIST_RATIO, DEFAULT_SIZE, Page, corpus
+
+
+def bs4_have_banner(sync: WikiCallerSync) -> Callable[[Page], object]:
+    """Caminho síncrono da verificação: parsing completo + busca do banner."""
+
+    def run(page: Page):
+        soup = BeautifulSoup(page.content, "html.parser", from_encoding="utf-8")
+        return sync.have_banner(soup) or sync.have_informacoes_bibliograficas(soup)
+
+    return run
+
+
+def bs4_get_character_info(sync: WikiCallerSync) -> Callable[[Page], object]:
+    """Caminho síncrono da extração (a página vem do cache, sem rede)."""
+
+    def run(page: Page):
+        sync.cache[page.url] = page
+        return sync.get_character_info(page.url)
+
+    return run
+
+
+def selectolax_have_banner(wiki: WikiCallerMultiprocessing) -> Callable[[Page], object]:
+    """Caminho selectolax da verificação."""
+
+    def run(page: Page):
+        return wiki.have_banner(page) or wiki.have_informacoes_bibliograficas(page)
+
+    return run
+
+
+def selectolax_get_character_info(wiki: WikiCallerMultiprocessing) -> Callable[[Page], object]:
+    """Caminho selectolax da extração (a página vem do cache, sem rede)."""
+
+    def run(page: Page):
+        wiki.cache[page.url] = page
+        return wiki.get_character_info(page.url)
+
+    return run
+
+
+CASES = {
+    "bs4.have_banner": (WikiCallerSync, bs4_have_banner),
+    "bs4.get_character_info": (WikiCallerSync, bs4_get_character_info),
+    "selectolax.have_banner": (WikiCallerMultiprocessing, selectolax_have_banner),
+    "selectolax.get_character_info": (WikiCallerMultiprocessing, selectolax_get_character_info),
+}
+
+
+def measure_throughput(
+    run: Callable[[Page], object], pages: int, time_limit: float | None, **options
+) -> dict:
+    """Executa um caminho sobre ``pages`` páginas e mede a vazão.
+
+    Args:
+        run: Função que processa uma página
+        pages: Número de páginas
+        time_limit: Interrompe após esse número de segundos (None: sem limite)
+        **options: Opções do corpus
+
+    Returns:
+        Páginas processadas, segundos, páginas/s e MB/s
+    """
+    pending = corpus(pages, **options)
+    first = next(pending)  # as variantes são geradas aqui, fora da medida
+
+    done, nbytes = 0, 0
+    start = time.perf_counter()
+    for page in itertools.chain([first], pending):
+        run(page)
+        done += 1
+        nbytes += len(page.content)
+        if time_limit is not None and time.perf_counter() - start > time_limit:
+            break
+
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": done,
+        "seconds": elapsed,
+        "pages_per_second": done / elapsed,
+        "mb_per_second": nbytes / elapsed / 1e6,
+    }
+
+
+def measure_allocations(run: Callable[[Page], object], sample: int, **options) -> dict:
+    """Mede a memória do heap do Python alocada por página.
+
+    Args:
+        run: Função que processa uma página
+        sample: Número de páginas medidas
+        **options: Opções do corpus
+
+    Returns:
+        Pico médio e máximo e memória retida por página, em KiB
+    """
+    peaks, retained = [], []
+    pending = corpus(sample, **options)
+    first = next(pending)
+
+    tracemalloc.start()
+    try:
+        for page in itertools.chain([first], pending):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = run(page)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+            del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_kib_mean": sum(peaks) / len(peaks) / 1024,
+        "peak_kib_max": max(peaks) / 1024,
+        "retained_kib_mean": sum(retained) / len(retained) / 1024,
+    }
+
+
+def benchmark(
+    name: str,
+    pages: int,
+    alloc_sample: int = 50,
+    time_limit: float | None = None,
+    **options,
+) -> dict:
+    """Executa um caso: vazão em ``pages`` páginas e alocação em uma amostra.
+
+    Args:
+        name: Nome do caso (chave de CASES)
+        pages: Número de páginas na medida de vazão
+        alloc_sample: Número de páginas na medida de alocação (0 desliga)
+        time_limit: Limite de tempo da medida de vazão, em segundos
+        **options: Opções do corpus (size, fields, list_ratio, variants)
+
+    Returns:
+        Resultado com o nome do caso, a vazão e a alocação
+    """
+    scraper_class, make_run = CASES[name]
+    run = make_run(scraper_class())
+
+    # Aquecimento: gera as variantes e carrega caches de seletores
+    for page in corpus(2, **options):
+        run(page)
+
+    result = {"case": name, **measure_throughput(run, pages, time_limit, **options)}
+    if alloc_sample:
+        result.update(measure_allocations(run, min(alloc_sample, pages), **options))
+
+    return result
+
+
+def format_result(result: dict) -> str:
+    """Formata um resultado em uma linha da tabela."""
+    line = (
+        f"{result['case']:<32}{result['pages']:>9}{result['seconds']:>10.2f}"
+        f"{result['pages_per_second']:>12.1f}{result['mb_per_second']:>9.1f}"
+    )
+    if "peak_kib_mean" in result:
+        line += f"{result['peak_kib_mean']:>12.0f}{result['retained_kib_mean']:>12.1f}"
+    return line
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Executa os benchmarks e imprime a tabela de resultados."""
+    parser = argparse.ArgumentParser(description="Parse and extract microbenchmarks")
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        help="Corpus sizes to run (default: 1000 10000 100000)",
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        default=[],
+        help="Run only cases whose name contains this text (repeatable, e.g. selectolax)",
+    )
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Page size in bytes")
+    parser.add_argument("--fields", type=int, default=DEFAULT_FIELDS, help="Infobox fields")
+    parser.add_argument(
+        "--list-ratio", type=float, default=DEFAULT_LIST_RATIO, help="Share of list fields"
+    )
+    parser.add_argument(
+        "--variants",
+        type=int,
+        default=32,
+        help="Distinct pages cycled through the corpus, at least 2 (default: 32)",
+    )
+    parser.add_argument(
+        "--alloc-sample",
+        type=int,
+        default=50,
+        help="Pages measured with tracemalloc, 0 to skip (default: 50)",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="Stop each throughput run after this many seconds and report what was done",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.variants < 2:
+        parser.error("--variants must be at least 2 so consecutive pages differ")
+
+    logger.remove()  # os scrapers registram logs a cada página
+    names = [name for name in CASES if not args.case or any(c in name for c in args.case)]
+    options = {
+        "size": args.size,
+        "fields": args.fields,
+        "list_ratio": args.list_ratio,
+        "variants": args.variants,
+    }
+
+    print(
+        f"{'case':<32}{'pages':>9}{'seconds':>10}{'pages/s':>12}{'MB/s':>9}"
+        f"{'peak KiB':>12}{'kept KiB':>12}"
+    )
+    results = []
+    for pages in args.pages:
+        for name in names:
+            result = benchmark(name, pages, args.alloc_sample, args.time_limit, **options)
+            results.append({**result, **options})
+            print(format_result(result), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Benchmark do transporte HTTP do modo async: tempo gasto abrindo conexões.
+
+Compara, em duas etapas de requisições (como a descoberta dos livros e a
+extração dos personagens), o transporte antigo, com uma sessão e um conector
+novos por etapa, e o Transport de transport.py, com conector compartilhado,
+resolvedor em cache e conexões aquecidas antes da rajada.
+
+Por padrão, as requisições vão para um servidor aiohttp local em
+``localhost``, com a latência de um servidor DNS simulada por ``--dns-delay``;
+``--url`` mede contra um host de verdade (DNS, TCP e TLS reais).
+
+Uso::
+
+    python -m benchmarks.transport --requests 200 --concurrency 16 --dns-delay 0.03
+    python -m benchmarks.transport --url https://harrypotter.fandom.com/pt-br/wiki/
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from collections import Counter
+from collections.abc import Callable
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import ThreadedResolver
+from loguru import logger
+
+from src.scrapers.transport import ConnectionStats, Transport, TransportConfig
+
+STAGES = ("books", "characters")
+
+
+class DelayedResolver(AbstractResolver):
+    """Resolvedor do sistema (só IPv4) com um atraso fixo, simulando um servidor DNS."""
+
+    def __init__(self, delay: float, lookups: Counter):
+        """Configura o atraso.
+
+        Args:
+            delay: Segundos somados a cada resolução
+            lookups: Contador das resoluções feitas (chave ``"lookups"``)
+        """
+        self.delay = delay
+        self.lookups = lookups
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        """Resolve o host depois do atraso."""
+        self.lookups["lookups"] += 1
+        await asyncio.sleep(self.delay)
+        return await ThreadedResolver().resolve(host, port, socket.AF_INET)
+
+    async def close(self) -> None:
+        """Nada a liberar."""
+
+
+async def start_server() -> tuple[web.AppRunner, str]:
+    """Sobe o servidor local, que responde uma página pequena a qualquer caminho."""
+
+    async def page(request: web.Request) -> web.Response:
+        return web.Response(body=b"<html><body>ok</body></html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_route("*", "/{path:.*}", page)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://localhost:{port}/wiki/"
+
+
+async def run_stages(
+    sessions: Callable[[], aiohttp.ClientSession], url: str, requests: int, concurrency: int
+) -> float:
+    """Faz as etapas de requisições, cada uma com a sua sessão.
+
+    Returns:
+        Segundos gastos nas etapas
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def get(session: aiohttp.ClientSession, path: str) -> None:
+        async with semaphore, session.get(url + path) as response:
+            await response.read()
+
+    start = time.perf_counter()
+    for stage in STAGES:
+        async with sessions() as session:
+            await asyncio.gather(*[get(session, f"{stage}_{i}") for i in range(requests)])
+    return time.perf_counter() - start
+
+
+async def per_stage_sessions(url: str, requests: int, concurrency: int, dns_delay: float) -> dict:
+    """Transporte antigo: uma sessão e um conector novos por etapa."""
+    stats, lookups = ConnectionStats(), Counter()
+
+    def sessions() -> aiohttp.ClientSession:
+        resolver = DelayedResolver(dns_delay, lookups) if dns_delay is not None else None
+        connector = aiohttp.TCPConnector(resolver=resolver)
+        return aiohttp.ClientSession(connector=connector, trace_configs=[stats.trace_config()])
+
+    seconds = await run_stages(sessions, url, requests, concurrency)
+    return result("per-stage sessions", stats, lookups["lookups"], seconds, 0.0)
+
+
+async def shared_transport(url: str, requests: int, concurrency: int, dns_delay: float) -> dict:
+    """Transport: conector compartilhado, DNS em cache e conexões aquecidas."""
+    lookups = Counter()
+    factory = (lambda: DelayedResolver(dns_delay, lookups)) if dns_delay is not None else None
+    transport = Transport(TransportConfig(prewarm=concurrency), resolver_factory=factory)
+
+    async with transport:
+        start = time.perf_counter()
+        await transport.prewarm([url])
+        prewarm = time.perf_counter() - start
+
+        transport.stats = ConnectionStats()  # mede só as etapas
+        seconds = await run_stages(transport.session, url, requests, concurrency)
+
+    lookups = lookups["lookups"] if factory else transport.resolver.misses
+    return result("shared transport", transport.stats, lookups, seconds, prewarm)
+
+
+def result(name: str, stats: ConnectionStats, lookups: int, seconds: float, prewarm: float):
+    """Resultado de um caso."""
+    return {
+        "case": name,
+        "connections": stats.created,
+        "reused": stats.reused,
+        "connect_ms": stats.connect_seconds * 1000,
+        "dns_lookups": lookups,
+        "stage_seconds": seconds,
+        "prewarm_seconds": prewarm,
+    }
+
+
+async def benchmark(
+    requests: int = 200,
+    concurrency: int = 16,
+    dns_delay: float | None = 0.03,
+    url: str | None = None,
+) -> list[dict]:
+    """Mede os dois transportes nas mesmas etapas.
+
+    Args:
+        requests: Requisições por etapa
+        concurrency: Requisições simultâneas
+        dns_delay: Atraso simulado de cada resolução, em segundos (ignorado com ``url``)
+        url: Host de verdade a medir, em vez do servidor local
+
+    Returns:
+        Um resultado por caso
+    """
+    runner = None
+    if url is None:
+        runner, url = await start_server()
+    else:
+        dns_delay = None
+
+    try:
+        return [
+            await per_stage_sessions(url, requests, concurrency, dns_delay),
+            await shared_transport(url, requests, concurrency, dns_delay),
+        ]
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+def format_result(result: dict) -> str:
+    """Formata um resultado em uma linha da tabela."""
+    return (
+        f"{result['case']:<22}{result['connections']:>8}{result['reused']:>8}"
+        f"{result['connect_ms']:>13.1f}{result['dns_lookups']:>6}"
+        f"{result['stage_seconds']:>10.3f}{result['prewarm_seconds']:>10.3f}"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Executa o benchmark e imprime a tabela de resultados."""
+    parser = argparse.ArgumentParser(description="Async HTTP transport connection setup benchmark")
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per stage (default: 200)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Simultaneous requests (default: 16)"
+    )
+    parser.add_argument(
+        "--dns-delay",
+        type=float,
+        default=0.03,
+        help="Simulated DNS server latency per lookup, in seconds (default: 0.03)",
+    )
+    parser.add_argument(
+        "--url", default=None, help="Benchmark against this real URL instead of a local server"
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logger.remove()  # o aquecimento registra um log por execução
+    results = asyncio.run(benchmark(args.requests, args.concurrency, args.dns_delay, args.url))
+
+    print(
+        f"{'case':<22}{'opened':>8}{'reused':>8}{'connect ms':>13}{'dns':>6}"
+        f"{'stages s':>10}{'warm s':>10}"
+    )
+    for result in results:
+        print(format_result(result))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,324 @@
 
 import argparse
 import asyncio
+import csv
+import time
+from pathlib import Path
 
+import duckdb
+
+from .archive import PageArchive
+from .books import BookIndex
+from .concurrency import REQUEST_TIMEOUT
+from .graph import CharacterGraph
+from .planner import ASYNC_CONCURRENCY, choose_plan, measure_workload, parse_rate_from_benchmark
+from .profiling import profile
+from .records import RecordBatch
+from .search import SearchIndex, index_path
+from .sites import DEFAULT_SITES, SITES
+from .snapshots import SnapshotStore, snapshots_path
+from .transport import DNS_TTL, KEEPALIVE_TIMEOUT, PREWARM_CONNECTIONS, TransportConfig
+from .watch import DEFAULT_INTERVAL, Watcher
 from .wiki_caller_async import WikiCaller as WikiCallerAsync
 from .wiki_caller_multiprocessing import WikiCaller as WikiCallerMultiprocessing
 from .wiki_caller_sync import WikiCaller as WikiCallerSync
+from .writer import FSYNC_POLICIES
+
+
+def parse_filter(item: str) -> tuple[str, str]:
+    """Parse an ``ATTRIBUTE=VALUE`` command line filter."""
+    attribute, sep, value = item.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"invalid filter {item!r}, expected ATTRIBUTE=VALUE")
+    return attribute, value
+
+
+def search(args: argparse.Namespace) -> int:
+    """Search the index saved by the last scraper run."""
+    path = index_path(args.db)
+    if not path.exists():
+        print(f"Search index not found: {path}. Run the scraper first.")
+        return 1
+
+    index = SearchIndex.load(path)
+
+    start = time.perf_counter()
+    results = index.search(
+        " ".join(args.query),
+        filters=dict(args.filter),
+        limit=args.limit,
+        fuzzy=not args.exact,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for record in results:
+        print(f"{record['Nome']} - {record['url']}")
+    print(f"{len(results)} result(s) in {elapsed_ms:.3f} ms")
+
+    return 0
+
+
+def query_graph(args: argparse.Namespace) -> int:
+    """Query the character relationship graph saved by the last run."""
+    if not Path(args.db).exists():
+        print(f"Database not found: {args.db}. Run the scraper first.")
+        return 1
+
+    with duckdb.connect(args.db, read_only=True) as con:
+        graph = CharacterGraph.from_duckdb(con)
+    relations = args.relation or None
+
+    start = time.perf_counter()
+    try:
+        if args.path_to:
+            path = graph.shortest_path(args.character, args.path_to, relations)
+            results = path or []
+        elif args.hops > 1:
+            results = list(graph.k_hop(args.character, args.hops, relations).items())
+        else:
+            results = graph.neighbors(args.character, relations)
+    except KeyError as e:
+        print(f"Character not found: {e.args[0]}")
+        return 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.path_to:
+        for url, relation in results:
+            step = f"  --{relation}--> " if relation else ""
+            print(f"{step}{graph.name(url)} - {url}")
+        if not results:
+            print("No path found")
+    elif args.hops > 1:
+        for url, distance in results:
+            print(f"{distance} {graph.name(url)} - {url}")
+    else:
+        for url, relation, outgoing in results:
+            arrow = "->" if outgoing else "<-"
+            print(f"{arrow} {relation}: {graph.name(url)} - {url}")
+    print(f"{len(results)} result(s) in {elapsed_ms:.3f} ms")
+
+    return 0
+
+
+def query_books(args: argparse.Namespace) -> int:
+    """List characters by the books they appear in, or count characters per book."""
+    if not Path(args.db).exists():
+        print(f"Database not found: {args.db}. Run the scraper first.")
+        return 1
+
+    with duckdb.connect(args.db, read_only=True) as con:
+        index = BookIndex.from_duckdb(con)
+
+    if not (args.all or args.any or args.none):
+        counts = index.counts()
+        for book_id, title in index.books:
+            print(f"{book_id:>3} {title}: {counts[book_id]} character(s)")
+        return 0
+
+    start = time.perf_counter()
+    try:
+        positions = index.select(args.all, args.any, args.none)
+    except KeyError as e:
+        print(f"Book not found: {e.args[0]}")
+        return 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for position in positions:
+        print(f"{index.names[position]} - {index.urls[position]}")
+    print(f"{len(positions)} result(s) in {elapsed_ms:.3f} ms")
+    return 0
+
+
+def history(args: argparse.Namespace) -> int:
+    """List past runs, read the data as of one of them, or compact the history."""
+    directory = snapshots_path(args.db)
+    if not directory.is_dir():
+        print(f"No run history found: {directory}. Run the scraper first.")
+        return 1
+
+    store = SnapshotStore(directory)
+    if args.compact:
+        partition = store.compact()
+        print(f"Compacted into {partition.path.name}" if partition else "Nothing to compact")
+        return 0
+
+    if args.as_of is None:
+        for run in store.runs():
+            print(
+                f"{run['run_id']:>5} {run['created_at']} "
+                f"{run['characters']} character(s), {run['changed']} change(s)"
+            )
+        print(f"{len(store.partitions())} partition file(s) in {directory}/")
+        return 0
+
+    try:
+        records = store.as_of(args.as_of)
+    except ValueError:
+        print(f"Run {args.as_of} is not in the history")
+        return 1
+
+    if args.csv:
+        batch = RecordBatch.from_records(records)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=batch.column_names, delimiter=";")
+            writer.writeheader()
+            writer.writerows(batch.rows())
+        print(f"{len(records)} character(s) as of run {args.as_of} saved to {args.csv}")
+    else:
+        for record in records:
+            print(f"{record['Nome']} - {record['url']}")
+        print(f"{len(records)} character(s) as of run {args.as_of}")
+    return 0
+
+
+def reextract(args: argparse.Namespace) -> int:
+    """Rebuild the dataset from the page archive, without network access."""
+    if not Path(args.archive).is_dir() or not len(archive := PageArchive(args.archive)):
+        print(f"No archived pages in {args.archive}. Run the scraper with --archive first.")
+        return 1
+
+    print(f"Re-extracting {len(archive)} archived page(s) from {args.archive}/...")
+    archive.close()
+    scraper = WikiCallerMultiprocessing(
+        processes=args.max_concurrency,
+        sites=args.sites,
+        archive_dir=args.archive,
+        offline=True,
+        crawl_timeout=args.crawl_timeout,
+    )
+    scraper.run()
+    return 0
+
+
+def watch(args: argparse.Namespace) -> int:
+    """Keep the last run up to date from the wikis' recent changes."""
+    if not Path(args.db).exists():
+        print(f"Database not found: {args.db}. Run the scraper first.")
+        return 1
+
+    scraper = WikiCallerAsync(
+        concurrency=args.max_concurrency or ASYNC_CONCURRENCY,
+        sites=args.sites,
+        request_timeout=args.request_timeout,
+        hedge=args.hedge,
+        transport=transport_config(args),
+    )
+    watcher = Watcher(scraper, args.db, args.csv, args.interval)
+    try:
+        asyncio.run(watcher.run(once=args.once))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    return 0
+
+
+def transport_config(args: argparse.Namespace) -> TransportConfig:
+    """Build the async HTTP transport settings from the command line."""
+    return TransportConfig(
+        dns_ttl=args.dns_ttl,
+        prewarm=args.prewarm,
+        keepalive=args.keepalive,
+        limit_per_host=args.limit_per_host,
+    )
+
+
+def plan_mode(args: argparse.Namespace) -> None:
+    """Pick the execution mode and its concurrency for ``--mode auto``."""
+    workload = measure_workload(args.sites, args.archive, args.max_concurrency)
+    if args.benchmark:
+        plan = choose_plan(workload, parse_rate_from_benchmark(args.benchmark))
+    else:
+        plan = choose_plan(workload)
+
+    print(plan.describe())
+    args.mode = plan.mode
+    args.max_concurrency = plan.workers
+
+
+def scrape(args: argparse.Namespace) -> None:
+    """Run the scraper in the chosen mode."""
+    if args.mode == "auto":
+        plan_mode(args)
+
+    if args.mode == "sync":
+        print("Running in synchronous mode (BeautifulSoup)...")
+        scraper = WikiCallerSync(
+            sites=args.sites,
+            request_timeout=args.request_timeout,
+            crawl_timeout=args.crawl_timeout,
+        )
+        scraper.run()
+    elif args.mode == "multiprocessing":
+        print("Running in multiprocessing mode (uses all CPU cores)...")
+        print("Concurrency adapts to the website's latency and rate limiting.")
+        scraper = WikiCallerMultiprocessing(
+            processes=args.max_concurrency,
+            sites=args.sites,
+            archive_dir=args.archive,
+            request_timeout=args.request_timeout,
+            crawl_timeout=args.crawl_timeout,
+        )
+        scraper.run()
+    else:  # async
+        print("Running in async mode (aiohttp)...")
+        scraper = WikiCallerAsync(
+            concurrency=args.max_concurrency or ASYNC_CONCURRENCY,
+            fsync=args.fsync,
+            flush_interval=args.flush_interval,
+            sites=args.sites,
+            archive_dir=args.archive,
+            request_timeout=args.request_timeout,
+            crawl_timeout=args.crawl_timeout,
+            hedge=args.hedge,
+            transport=transport_config(args),
+        )
+        asyncio.run(scraper.run())
 
 
 def main():
     """Run the scraper with the specified mode."""
     parser = argparse.ArgumentParser(
         description=(
-            "Harry Potter Wiki Scraper - Extract character data from "
-            "Portuguese Harry Potter Wiki"
+            "Harry Potter Wiki Scraper - Extract character data from Portuguese Harry Potter Wiki"
         )
     )
     parser.add_argument(
         "--mode",
-        choices=["sync", "multiprocessing", "async"],
-        default="multiprocessing",
+        choices=["auto", "sync", "multiprocessing", "async"],
+        default="auto",
         help=(
-            "Scraping mode: sync (slower, BeautifulSoup), "
-            "multiprocessing (fast, uses all cores), async (aiohttp)"
+            "Scraping mode: auto (picks async or multiprocessing from the frontier size, "
+            "CPU count, --max-concurrency and parse benchmarks, and reports why), "
+            "sync (slower, BeautifulSoup), multiprocessing (fast, uses all cores), "
+            "async (aiohttp) (default: auto)"
+        ),
+    )
+    parser.add_argument(
+        "--benchmark",
+        default=None,
+        metavar="FILE",
+        help=(
+            "Parse throughput measured on this machine with benchmarks.parse --json, "
+            "used by --mode auto instead of the built-in figure"
+        ),
+    )
+    parser.add_argument(
+        "--sites",
+        nargs="+",
+        choices=list(SITES),
+        default=list(DEFAULT_SITES),
+        help=(
+            "Wiki language editions to crawl in one run, sharing connections, cache "
+            "and rate limiting; records keep a site column (default: pt-br)"
+        ),
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help=(
+            "Upper bound for simultaneous requests; the actual level adapts to "
+            "latency and rate limiting (default: one per core in multiprocessing, "
+            "50 in async)"
         ),
     )
     parser.add_argument(
@@ -30,25 +327,257 @@ def main():
         default="data",
         help="Output directory for CSV and DuckDB files (default: data/)",
     )
+    parser.add_argument(
+        "--archive",
+        default=None,
+        metavar="DIR",
+        help=(
+            "Keep every downloaded page in a memory-mapped archive so the dataset can "
+            "later be rebuilt with the reextract command (multiprocessing and async)"
+        ),
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=FSYNC_POLICIES,
+        default="interval",
+        help=(
+            "When the async mode fsyncs personagens.jsonl, written in the background "
+            "while crawling: never, at most once per --flush-interval, or after every "
+            "batch (default: interval)"
+        ),
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between flushes of personagens.jsonl in async mode (default: 1.0)",
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=REQUEST_TIMEOUT,
+        metavar="SECONDS",
+        help=f"Give up on a single request after this long (default: {REQUEST_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--crawl-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "Time budget for the crawl; once spent, pending books, links and characters "
+            "are skipped and reported, and the partial dataset is saved (default: none)"
+        ),
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help=(
+            "Send a backup copy of requests slower than the recent p95 latency and keep "
+            "the first answer (async mode)"
+        ),
+    )
+    parser.add_argument(
+        "--dns-ttl",
+        type=float,
+        default=DNS_TTL,
+        metavar="SECONDS",
+        help=(
+            "How long a resolved host address is reused by the async mode before it is "
+            f"looked up again (default: {DNS_TTL:g})"
+        ),
+    )
+    parser.add_argument(
+        "--prewarm",
+        type=int,
+        default=PREWARM_CONNECTIONS,
+        metavar="N",
+        help=(
+            "Connections opened to each wiki host before the async crawl starts, capped "
+            f"by --max-concurrency; 0 disables (default: {PREWARM_CONNECTIONS})"
+        ),
+    )
+    parser.add_argument(
+        "--keepalive",
+        type=float,
+        default=KEEPALIVE_TIMEOUT,
+        metavar="SECONDS",
+        help=(
+            f"Idle time before a pooled async connection is closed (default: {KEEPALIVE_TIMEOUT:g})"
+        ),
+    )
+    parser.add_argument(
+        "--limit-per-host",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Cap on open async connections per host; 0 means no cap (default: 0)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile",
+        default=None,
+        metavar="DIR",
+        help=(
+            "Profile the run, including worker processes, and save the merged "
+            "stats, a flamegraph collapsed-stack file and a summary (default: profile/)"
+        ),
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        help="Number of functions listed in the profile summary (default: 20)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    search_parser = subparsers.add_parser(
+        "search", help="Search characters scraped by the last run"
+    )
+    search_parser.add_argument("query", nargs="*", help="Free text, typos are tolerated")
+    search_parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        type=parse_filter,
+        metavar="ATTRIBUTE=VALUE",
+        help="Attribute filter, accent and case insensitive (repeatable)",
+    )
+    search_parser.add_argument(
+        "--limit", type=int, default=10, help="Maximum number of results (default: 10)"
+    )
+    search_parser.add_argument(
+        "--exact", action="store_true", help="Disable fuzzy matching of misspelled words"
+    )
+    search_parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file the index was saved next to",
+    )
+
+    reextract_parser = subparsers.add_parser(
+        "reextract", help="Rebuild the dataset from archived pages, without network access"
+    )
+    reextract_parser.add_argument(
+        "archive", nargs="?", default="archive", help="Page archive directory (default: archive/)"
+    )
+
+    graph_parser = subparsers.add_parser(
+        "graph", help="Query relationships between characters (family, loyalties...)"
+    )
+    graph_parser.add_argument("character", help="Character name or URL")
+    graph_parser.add_argument(
+        "--hops",
+        type=int,
+        default=1,
+        help="List characters up to this many links away (default: 1, direct neighbors)",
+    )
+    graph_parser.add_argument(
+        "--path-to", metavar="CHARACTER", help="Shortest chain of links to another character"
+    )
+    graph_parser.add_argument(
+        "--relation",
+        action="append",
+        default=[],
+        help="Only follow links of this infobox attribute, e.g. Familia (repeatable)",
+    )
+    graph_parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file saved by the last run",
+    )
+
+    books_parser = subparsers.add_parser(
+        "books",
+        help=(
+            "List characters by the books they appear in, e.g. in 3 and 5 but not 7; "
+            "without conditions, count characters per book. Book appearances come from "
+            "the last full run: characters added by watch are not listed until the next one"
+        ),
+    )
+    books_parser.add_argument(
+        "--all",
+        nargs="+",
+        default=[],
+        metavar="BOOK",
+        help="Books the character is in (id or title)",
+    )
+    books_parser.add_argument(
+        "--any", nargs="+", default=[], metavar="BOOK", help="At least one of these books"
+    )
+    books_parser.add_argument(
+        "--none", nargs="+", default=[], metavar="BOOK", help="Books the character is not in"
+    )
+    books_parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file saved by the last run",
+    )
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Poll the wikis' recent changes and update edited or new characters in place",
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between polls (default: {DEFAULT_INTERVAL:.0f})",
+    )
+    watch_parser.add_argument("--once", action="store_true", help="Poll a single time and exit")
+    watch_parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file of a full run, updated in place",
+    )
+    watch_parser.add_argument(
+        "--csv", default="personagens.csv", help="CSV file rewritten after each update"
+    )
+
+    history_parser = subparsers.add_parser(
+        "history", help="List past runs or read the characters as they were in one of them"
+    )
+    history_parser.add_argument(
+        "--as-of", type=int, metavar="RUN", help="Show the characters as of this run number"
+    )
+    history_parser.add_argument(
+        "--csv", metavar="FILE", help="With --as-of, save the characters to this CSV file"
+    )
+    history_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Merge old run partitions into one file, keeping every version",
+    )
+    history_parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file the history was saved next to",
+    )
 
     args = parser.parse_args()
 
+    if args.command == "search":
+        return search(args)
+    if args.command == "graph":
+        return query_graph(args)
+    if args.command == "books":
+        return query_books(args)
+    if args.command == "history":
+        return history(args)
+
+    if args.command is None and args.archive and args.mode == "sync":
+        parser.error("--archive needs the multiprocessing or async mode")
+
+    run = {"reextract": reextract, "watch": watch}.get(args.command, scrape)
+
     print(f"Output will be saved to: {args.output_dir}/")
 
-    if args.mode == "sync":
-        print("Running in synchronous mode (BeautifulSoup)...")
-        scraper = WikiCallerSync()
-        scraper.run()
-    elif args.mode == "multiprocessing":
-        print("Running in multiprocessing mode (uses all CPU cores)...")
-        print("⚠️  WARNING: This may trigger rate limiting from the website.")
-        scraper = WikiCallerMultiprocessing()
-        scraper.run()
-    else:  # async
-        print("Running in async mode (aiohttp)...")
-        scraper = WikiCallerAsync()
-        asyncio.run(scraper.run())
+    if args.profile:
+        with profile(args.profile, args.profile_top):
+            return run(args)
+    return run(args)
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
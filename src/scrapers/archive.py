@@ -0,0 +1,205 @@
+"""Arquivo em disco das páginas baixadas, para reextrair sem rede.
+
+As páginas são gravadas como vieram do servidor, uma após a outra, em arquivos
+de segmento só de inserção (``<escritor>-00000.seg``). Cada escritor (um
+processo) tem seus próprios segmentos e seu próprio índice
+(``<escritor>.idx``, uma linha ``url<TAB>segmento<TAB>offset<TAB>tamanho`` por
+página), de modo que os workers do modo multiprocessing gravam ao mesmo tempo
+sem travas. Na leitura, os índices de todos os escritores são juntados e os
+segmentos são abertos com ``mmap``: ``get`` devolve um ``memoryview`` sobre o
+mapeamento, sem ler o arquivo nem copiar a página para um buffer. O parser
+HTML só aceita ``bytes``, então a única cópia é a feita ao montar a árvore.
+
+O nome padrão do escritor começa pelo instante em que ele foi criado, então
+os índices são lidos em ordem cronológica e, se a mesma URL foi gravada mais de
+uma vez, vale a gravação mais recente.
+"""
+
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Tamanho a partir do qual o escritor passa para um novo segmento
+SEGMENT_SIZE = 256 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ArchivedPage:
+    """Página lida do arquivo, com ``content`` como uma resposta do requests."""
+
+    url: str
+    body: memoryview
+    status_code: int = 200
+
+    @property
+    def content(self) -> bytes:
+        """Corpo da página em bytes (copiado do mapeamento)."""
+        return bytes(self.body)
+
+
+class PageArchive:
+    """Segmentos de páginas só de inserção, com índice por URL."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        writer: str | None = None,
+        segment_size: int = SEGMENT_SIZE,
+    ):
+        """Abre (ou cria) o arquivo de páginas em um diretório.
+
+        Args:
+            directory: Diretório dos segmentos e índices
+            writer: Nome do escritor deste processo (padrão: instante de
+                criação e pid)
+            segment_size: Tamanho a partir do qual um novo segmento é iniciado
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.writer = writer or f"{time.time_ns()}-{os.getpid()}"
+        self.segment_size = segment_size
+
+        self._index = None
+        self._maps = {}
+        self._segment = None
+        self._segment_number = -1
+        self._index_file = None
+
+    def __enter__(self) -> "PageArchive":
+        """Permite usar o arquivo em um bloco ``with``."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Fecha os arquivos e mapeamentos."""
+        self.close()
+
+    def append(self, url: str, body: bytes) -> None:
+        """Grava uma página no segmento atual deste escritor.
+
+        Os dados são descarregados para o sistema operacional a cada página,
+        então um processo interrompido perde no máximo a página em andamento.
+
+        Args:
+            url: URL da página
+            body: Corpo da resposta, em bytes
+        """
+        if self._segment is None or self._segment.tell() >= self.segment_size:
+            self._next_segment()
+
+        offset = self._segment.tell()
+        self._segment.write(body)
+        self._segment.flush()
+
+        name = self._segment_name(self._segment_number)
+        self._index_file.write(f"{url}\t{name}\t{offset}\t{len(body)}\n")
+        self._index_file.flush()
+
+        if self._index is not None:
+            self._index[url] = (name, offset, len(body))
+
+    def get(self, url: str) -> memoryview | None:
+        """Lê uma página sem copiá-la.
+
+        Args:
+            url: URL da página
+
+        Returns:
+            Visão do corpo da página sobre o segmento mapeado, ou None se a URL
+            não estiver no arquivo
+        """
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+
+        name, offset, length = entry
+        return memoryview(self._map(name, offset + length))[offset : offset + length]
+
+    def page(self, url: str) -> ArchivedPage:
+        """Lê uma página no formato de resposta usado pelos scrapers.
+
+        Args:
+            url: URL da página
+
+        Returns:
+            Página arquivada
+
+        Raises:
+            KeyError: Se a URL não estiver no arquivo
+        """
+        body = self.get(url)
+        if body is None:
+            raise KeyError(f"Página fora do arquivo: {url}")
+        return ArchivedPage(url, body)
+
+    @property
+    def index(self) -> dict[str, tuple[str, int, int]]:
+        """Índice url -> (segmento, offset, tamanho) de todos os escritores."""
+        if self._index is None:
+            self._index = {}
+            for path in sorted(self.directory.glob("*.idx")):
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        fields = line.rstrip("\n").split("\t")
+                        if len(fields) != 4:
+                            continue  # linha incompleta de um processo interrompido
+                        url, name, offset, length = fields
+                        self._index[url] = (name, int(offset), int(length))
+        return self._index
+
+    def __contains__(self, url: str) -> bool:
+        """Verifica se uma URL está no arquivo."""
+        return url in self.index
+
+    def __len__(self) -> int:
+        """Número de páginas distintas no arquivo."""
+        return len(self.index)
+
+    def close(self) -> None:
+        """Fecha o segmento e o índice em escrita e desfaz os mapeamentos."""
+        for file in (self._segment, self._index_file):
+            if file is not None:
+                file.close()
+        self._segment = self._index_file = None
+
+        for mapping in self._maps.values():
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # ainda há páginas lidas em uso; o mapeamento some com elas
+        self._maps.clear()
+
+    def _segment_name(self, number: int) -> str:
+        """Nome do arquivo de um segmento deste escritor."""
+        return f"{self.writer}-{number:05d}.seg"
+
+    def _next_segment(self) -> None:
+        """Passa a gravar em um novo segmento."""
+        if self._segment is not None:
+            self._segment.close()
+        if self._index_file is None:
+            self._index_file = open(self.directory / f"{self.writer}.idx", "a", encoding="utf-8")
+
+        self._segment_number += 1
+        while (self.directory / self._segment_name(self._segment_number)).exists():
+            self._segment_number += 1
+        self._segment = open(self.directory / self._segment_name(self._segment_number), "ab")
+
+    def _map(self, name: str, end: int) -> mmap.mmap:
+        """Mapeia um segmento para leitura (uma vez por segmento).
+
+        Um segmento ainda em escrita é remapeado quando a página pedida termina
+        além do trecho mapeado; o mapeamento anterior continua válido para as
+        páginas já lidas dele.
+
+        Args:
+            name: Nome do segmento
+            end: Offset final da página pedida
+        """
+        mapping = self._maps.get(name)
+        if mapping is None or len(mapping) < end:
+            with open(self.directory / name, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = mapping
+        return mapping
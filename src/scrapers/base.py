@@ -1,38 +1,77 @@
 """Classe base compartilhada para todos os scrapers do Wiki de Harry Potter."""
 
+import csv
 import sys
-import unicodedata
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 
 import dlt
-import pandas as pd
+import duckdb
 from loguru import logger
 
+from .changelog import changes_path, summarize, write_changes
+from .cleaning import Filter, clean_records, dedup_by, exclude_values, require_fields
+from .concurrency import REQUEST_TIMEOUT, Deadline
+from .graph import export_graph, graph_path
+from .progress import Progress
+from .records import RecordBatch
+from .search import SearchIndex, index_path
+from .sites import DEFAULT_SITES, SiteProfile, resolve, site_for
+from .snapshots import SnapshotStore, snapshots_path
+from .storage import upsert_normalized, write_normalized
+from .text import remove_accents
+
 
 class BaseWikiCaller(ABC):
     """Classe base abstrata para scrapers do Wiki de Harry Potter.
 
     Contém todo o código compartilhado entre as três implementações:
-    - Configuração de URLs
+    - Configuração dos sites coletados e suas URLs
     - Remoção de acentos
     - Salvamento em CSV e DuckDB
     - Limpeza de dados
     """
 
-    def __init__(self):
-        """Inicializa URLs e estruturas de dados comuns."""
-        self.url_personagem_base = "https://harrypotter.fandom.com"
-        self.url_livros = [
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Pedra_Filosofal",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_C%C3%A2mara_Secreta",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_Prisioneiro_de_Azkaban",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_C%C3%A1lice_de_Fogo",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Ordem_da_F%C3%AAnix",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_Enigma_do_Pr%C3%ADncipe",
-            "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_as_Rel%C3%ADquias_da_Morte",
-        ]
-        self.list_of_dicts = []
+    def __init__(
+        self,
+        sites: Iterable[str | SiteProfile] = DEFAULT_SITES,
+        request_timeout: float = REQUEST_TIMEOUT,
+        crawl_timeout: float | None = None,
+    ):
+        """Inicializa os sites, URLs e estruturas de dados comuns.
+
+        Args:
+            sites: Sites a coletar, por nome (ver sites.SITES) ou perfil. Todos
+                compartilham o mesmo scraper: sessão, cache e limitador
+            request_timeout: Prazo de cada requisição, em segundos
+            crawl_timeout: Orçamento da coleta inteira, em segundos, contado a
+                partir da primeira etapa; esgotado, nenhuma etapa inicia itens
+                novos e a carga segue com o que já terminou (padrão: sem limite)
+        """
+        self.sites = resolve(sites)
+        self.request_timeout = request_timeout
+        self.crawl_timeout = crawl_timeout
+        self._crawl_deadline = None
+        self.url_personagem_base = self.sites[0].base_url
+        self.url_livros = [url for site in self.sites for url in site.seeds]
+        self.records = RecordBatch()
         self.cache = {}
+        self.character_books = {}
+        self.character_links = {}
+        self.progress = Progress()
+        self.skipped = {}
+
+        # Configuração da limpeza (ver character_filters)
+        self.required_fields = ("Nome", "url")
+        self.excluded_names = {"Joanne Rowling"}  # a autora não é uma personagem
+        self.dedup_key = "Nome"
+
+    def to_dicts(self) -> list[dict]:
+        """Personagens extraídos como lista de dicionários.
+
+        Os dados ficam em ``self.records``; cada chamada monta uma lista nova.
+        """
+        return list(self.records.rows())
 
     @staticmethod
     def setup_logger():
@@ -57,78 +96,271 @@ class BaseWikiCaller(ABC):
         Returns:
             Texto sem acentos
         """
-        # Normaliza para NFD (decompõe caracteres acentuados)
-        normalized = unicodedata.normalize("NFD", text)
+        return remove_accents(text)
+
+    def site_for(self, url: str) -> SiteProfile:
+        """Perfil do site de uma URL entre os sites coletados.
+
+        Args:
+            url: URL de uma página
+
+        Returns:
+            Perfil do site; o primeiro site se nenhum reconhecer a URL
+        """
+        return site_for(url, self.sites) or self.sites[0]
+
+    def crawl_deadline(self) -> Deadline:
+        """Prazo da coleta inteira (ver ``crawl_timeout``), iniciado na primeira chamada.
+
+        Todas as etapas consultam o mesmo prazo: o que uma etapa gasta não
+        volta para as seguintes.
+        """
+        if self._crawl_deadline is None:
+            self._crawl_deadline = Deadline(self.crawl_timeout)
+        return self._crawl_deadline
+
+    def skip(self, stage: str, count: int = 1) -> None:
+        """Conta itens de uma etapa não iniciados porque o orçamento da coleta acabou.
+
+        Args:
+            stage: Nome da etapa
+            count: Itens deixados de lado
+        """
+        if count:
+            self.skipped[stage] = self.skipped.get(stage, 0) + count
+            self.progress.advance("skipped", count)
+
+    def log_skipped(self) -> None:
+        """Avisa quantos itens cada etapa deixou de lado pelo fim do orçamento da coleta."""
+        for stage, count in self.skipped.items():
+            logger.warning(
+                f"Orçamento da coleta ({self.crawl_timeout:.0f}s) esgotado em {stage}: "
+                f"{count} item(ns) não iniciado(s)"
+            )
+
+    def register_book_links(self, book_url: str, links: Iterable[str]) -> None:
+        """Registra em quais livros cada link de personagem apareceu.
+
+        Args:
+            book_url: Link da página do livro
+            links: Links de personagens encontrados no livro
+        """
+        for link in links:
+            books = self.character_books.setdefault(link, [])
+            if book_url not in books:
+                books.append(book_url)
 
-        # Remove marcas de combinação (os acentos)
-        result = []
-        for char in normalized:
-            if unicodedata.category(char) != "Mn":
-                result.append(char)
+    def character_filters(self) -> list[Filter]:
+        """Cria os filtros da limpeza de dados.
 
-        return "".join(result)
+        Descarta registros sem os campos obrigatórios, os nomes excluídos e as
+        duplicatas pela chave configurada dentro de cada site (o mesmo
+        personagem em dois idiomas é mantido). Os filtros têm estado, então
+        cada limpeza deve pedir filtros novos.
 
-    def clean_character_data(self, data: list[dict]) -> list[dict]:
+        Returns:
+            Lista de filtros, na ordem em que são aplicados
+        """
+        return [
+            require_fields(*self.required_fields),
+            exclude_values("Nome", self.excluded_names),
+            dedup_by(self.dedup_key, "site"),
+        ]
+
+    def clean_character_data(self, data: Iterable[dict]) -> list[dict]:
         """Limpa e filtra dados de personagens.
 
         Remove duplicatas por nome e filtra a autora J.K. Rowling.
 
         Args:
-            data: Lista de dicionários com dados de personagens
+            data: Dicionários com dados de personagens (lista ou gerador)
 
         Returns:
             Lista limpa de dicionários
         """
-        if not data:
-            return []
+        return list(clean_records(data, self.character_filters()))
 
-        df = pd.DataFrame(data)
+    def collect_records(self, data: Iterable) -> None:
+        """Limpa os registros extraídos e os guarda no lote colunar.
 
-        # Remove duplicatas mantendo a primeira ocorrência
-        df = df.drop_duplicates(subset="Nome", keep="first")
+        Args:
+            data: Registros de personagens (lista ou gerador)
+        """
+        cleaned = clean_records(data, self.character_filters())
+        self.records = RecordBatch.from_records(map(self.register_links, cleaned))
+
+    def register_links(self, record):
+        """Guarda os links do infobox de um registro aceito, para o grafo de relações.
 
-        # Remove a autora (não é um personagem)
-        df = df.query('Nome != "Joanne Rowling"')
+        O lote colunar guarda só os campos; os links ficam em ``character_links``.
 
-        return df.to_dict(orient="records")
+        Args:
+            record: CharacterRecord (ou dicionário, que não tem links)
+
+        Returns:
+            O próprio registro
+        """
+        links = getattr(record, "links", None)
+        if links:
+            self.character_links[record["url"]] = links
+        return record
 
     def save_to_csv(self, output_path: str = "personagens.csv"):
         """Salva os dados em arquivo CSV.
 
+        As colunas são a união dos campos de todos os personagens, na ordem em
+        que aparecem; campos ausentes ficam vazios.
+
         Args:
             output_path: Caminho do arquivo CSV a ser criado
         """
-        if not self.list_of_dicts:
+        if not self.records:
             logger.warning("Nenhum dado para salvar em CSV")
             return
 
-        df = pd.DataFrame(self.list_of_dicts)
-        df.to_csv(output_path, index=False, sep=";")
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.records.column_names, delimiter=";")
+            writer.writeheader()
+            writer.writerows(self.records.rows())
+
         logger.info(f"Dados salvos em {output_path}. Separador ';' ")
 
     def save_data_to_duckdb(self, db_name: str = "personagens_harry_potter.duckdb"):
         """Salva os dados em banco DuckDB.
 
+        Carrega a tabela ``personagens`` com o dlt e, no mesmo banco, o esquema
+        normalizado, as contagens e o grafo de relações descritos em storage.py.
+        As mudanças em relação à execução anterior são salvas também em
+        ``<banco>.changes.jsonl``, o grafo, em Parquet no diretório ``<banco>.graph``,
+        e a execução, no histórico ``<banco>.snapshots`` (ver save_snapshot).
+
         Args:
             db_name: Nome do banco de dados DuckDB
         """
-        if not self.list_of_dicts:
+        if not self.records:
             logger.warning("Nenhum dado para salvar no DuckDB")
             return
 
-        pipeline = dlt.pipeline(
+        load_info = self.dlt_pipeline(db_name).run(
+            data=self.records.rows(),
+            table_name="personagens",
+            write_disposition="replace",
+        )
+
+        logger.info(f"Dados carregados no DuckDB: {load_info}")
+
+        with duckdb.connect(db_name) as con:
+            changes = write_normalized(
+                con,
+                self.records.rows(),
+                self.url_livros,
+                self.character_books,
+                self.character_links,
+            )
+            export_graph(con, graph_path(db_name))
+
+        logger.info(f"Esquema normalizado criado em {db_name}")
+
+        path = changes_path(db_name)
+        write_changes(changes, path)
+        logger.info(f"Mudanças desde a execução anterior: {summarize(changes)} ({path})")
+
+        self.save_snapshot(self.records.rows(), db_name)
+
+    def save_snapshot(self, records: Iterable, db_name: str, partial: bool = False) -> int:
+        """Grava a execução no histórico de cargas e compacta em segundo plano.
+
+        Só os personagens que mudaram são gravados (ver snapshots.py).
+
+        Args:
+            records: Registros da execução
+            db_name: Nome do banco de dados DuckDB
+            partial: Se True, os registros são só os personagens atualizados
+
+        Returns:
+            Número da execução no histórico
+        """
+        store = SnapshotStore(snapshots_path(db_name))
+        run_id = store.write_run(records, partial=partial)
+        store.compact_in_background()
+        logger.info(f"Execução {run_id} gravada no histórico {store.directory}")
+        return run_id
+
+    @staticmethod
+    def dlt_pipeline(db_name: str) -> dlt.Pipeline:
+        """Cria o pipeline do dlt que carrega a tabela ``personagens``.
+
+        Args:
+            db_name: Nome do banco de dados DuckDB
+        """
+        return dlt.pipeline(
             pipeline_name="personagens_harry_potter",
             dataset_name="harry_potter",
-            destination="duckdb",
+            destination=dlt.destinations.duckdb(db_name),
         )
 
-        load_info = pipeline.run(
-            data=self.list_of_dicts,
+    def upsert_to_duckdb(
+        self, records: list, db_name: str = "personagens_harry_potter.duckdb"
+    ) -> list[dict]:
+        """Atualiza alguns personagens no banco, sem recarregar os demais.
+
+        A tabela ``personagens`` recebe um merge pela ``url`` e o esquema
+        normalizado e o grafo, uma atualização parcial (ver
+        storage.upsert_normalized). O arquivo ``<banco>.changes.jsonl`` fica
+        com as mudanças desta atualização, que também vira uma execução no
+        histórico de cargas.
+
+        Args:
+            records: Registros novos ou atualizados
+            db_name: Banco criado por uma execução completa
+
+        Returns:
+            Mudanças desses personagens
+        """
+        rows = [dict(record.items()) for record in records]
+        load_info = self.dlt_pipeline(db_name).run(
+            data=rows,
             table_name="personagens",
-            write_disposition="replace",
+            write_disposition="merge",
+            primary_key="url",
         )
+        logger.info(f"Dados atualizados no DuckDB: {load_info}")
 
-        logger.info(f"Dados carregados no DuckDB: {load_info}")
+        links = {}
+        for record in records:
+            if getattr(record, "links", None):
+                links[record["url"]] = record.links
+
+        with duckdb.connect(db_name) as con:
+            changes = upsert_normalized(con, rows, links)
+            export_graph(con, graph_path(db_name))
+
+        path = changes_path(db_name)
+        write_changes(changes, path)
+        logger.info(f"Mudanças nesta atualização: {summarize(changes)} ({path})")
+
+        self.save_snapshot(rows, db_name, partial=True)
+        return changes
+
+    def save_search_index(self, db_name: str = "personagens_harry_potter.duckdb"):
+        """Salva o índice de busca ao lado do banco DuckDB.
+
+        Args:
+            db_name: Nome do banco de dados DuckDB
+        """
+        if not self.records:
+            logger.warning("Nenhum dado para indexar")
+            return
+
+        path = index_path(db_name)
+        SearchIndex.build(self.records.rows()).save(path)
+        logger.info(f"Índice de busca salvo em {path}")
+
+    def save_outputs(self):
+        """Salva os dados em todos os destinos: CSV, DuckDB e índice de busca."""
+        self.save_to_csv()
+        self.save_data_to_duckdb()
+        self.save_search_index()
 
     @abstractmethod
     def run(self):
@@ -0,0 +1,135 @@
+"""Índice de aparições por livro em bits.
+
+A carga grava em ``characters.book_mask`` um bit por livro em que o personagem
+foi encontrado: o livro ``book_id`` é o bit ``book_id - 1`` (os livros são
+numerados na ordem de ``url_livros``, de todos os sites). Assim, perguntas como
+"personagens dos livros 3 e 5 que não aparecem no 7" viram operações de bits,
+tanto no DuckDB::
+
+    SELECT nome FROM characters
+    WHERE book_mask & 20 = 20 AND book_mask & 64 = 0
+
+quanto no BookIndex, que carrega as máscaras em um ``array`` compacto e
+responde seleções e contagens por livro sem junções com ``character_books``.
+"""
+
+from array import array
+from collections.abc import Iterable
+
+import duckdb
+
+from .search import normalize
+from .storage import SCHEMA
+
+
+def book_bit(book_id: int) -> int:
+    """Bit de um livro no book_mask."""
+    return 1 << (book_id - 1)
+
+
+def books_mask(book_ids: Iterable[int]) -> int:
+    """Máscara com os bits de vários livros."""
+    mask = 0
+    for book_id in book_ids:
+        mask |= book_bit(book_id)
+    return mask
+
+
+class BookIndex:
+    """Livros de cada personagem como máscaras de bits, em ordem de url."""
+
+    def __init__(
+        self, urls: list[str], names: list[str], masks: array, books: list[tuple[int, str]]
+    ):
+        """Cria o índice a partir das máscaras.
+
+        Args:
+            urls: URL de cada personagem
+            names: Nome de cada personagem
+            masks: Máscara de livros de cada personagem (array ``Q``)
+            books: Livros carregados, como (book_id, título)
+        """
+        self.urls = urls
+        self.names = names
+        self.masks = masks
+        self.books = books
+        self._by_title = {normalize(title): book_id for book_id, title in books}
+
+    @classmethod
+    def from_duckdb(cls, con: duckdb.DuckDBPyConnection) -> "BookIndex":
+        """Carrega as máscaras do banco.
+
+        Args:
+            con: Conexão DuckDB (pode ser somente leitura)
+        """
+        urls, names, masks = con.execute(
+            f"SELECT list(url ORDER BY url), list(nome ORDER BY url), "
+            f"list(book_mask ORDER BY url) FROM {SCHEMA}.characters"
+        ).fetchone()
+        books = con.execute(
+            f"SELECT book_id, title FROM {SCHEMA}.books ORDER BY book_id"
+        ).fetchall()
+        return cls(urls or [], names or [], array("Q", masks or []), books)
+
+    def __len__(self) -> int:
+        """Número de personagens."""
+        return len(self.urls)
+
+    def book_id(self, key: str | int) -> int:
+        """Encontra um livro pelo id ou pelo título (sem acentos nem caixa).
+
+        Raises:
+            KeyError: Se nenhum livro corresponder
+        """
+        if str(key).isdigit() and any(book_id == int(key) for book_id, _ in self.books):
+            return int(key)
+        book_id = self._by_title.get(normalize(str(key)))
+        if book_id is None:
+            raise KeyError(key)
+        return book_id
+
+    def select(
+        self,
+        all_of: Iterable[str | int] = (),
+        any_of: Iterable[str | int] = (),
+        none_of: Iterable[str | int] = (),
+    ) -> list[int]:
+        """Seleciona os personagens pelos livros em que aparecem.
+
+        Cada condição é uma máscara: o personagem precisa ter todos os bits de
+        ``all_of``, algum de ``any_of`` (se houver) e nenhum de ``none_of``.
+
+        Args:
+            all_of: Livros obrigatórios (ids ou títulos)
+            any_of: Livros dos quais ao menos um é exigido
+            none_of: Livros excluídos
+
+        Returns:
+            Posições dos personagens (índices de ``urls``), em ordem de url
+
+        Raises:
+            KeyError: Se algum livro não for encontrado
+        """
+        required = books_mask(map(self.book_id, all_of))
+        alternatives = books_mask(map(self.book_id, any_of))
+        excluded = books_mask(map(self.book_id, none_of))
+
+        return [
+            position
+            for position, mask in enumerate(self.masks)
+            if mask & required == required
+            and not mask & excluded
+            and (not alternatives or mask & alternatives)
+        ]
+
+    def counts(self) -> dict[int, int]:
+        """Número de personagens em cada livro, pelo book_id."""
+        counts = dict.fromkeys((book_id for book_id, _ in self.books), 0)
+        for mask in self.masks:
+            while mask:
+                low = mask & -mask
+                book_id = low.bit_length()
+                if book_id in counts:
+                    counts[book_id] += 1
+                mask ^= low
+        return counts
@@ -0,0 +1,237 @@
+"""Diferença entre execuções: quais personagens entraram, saíram ou mudaram.
+
+Cada personagem recebe um hash do seu conteúdo, guardado na tabela
+``characters``. Na carga seguinte, os hashes novos são comparados com os
+anteriores e só os personagens com hash diferente têm os atributos lidos e
+comparados. O resultado vai para a tabela ``changelog`` (histórico de todas as
+execuções) e para um arquivo JSONL com as mudanças da última execução, que
+basta para um consumidor atualizar sua cópia sem recarregar tudo.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import duckdb
+
+ADDED, REMOVED, CHANGED = "added", "removed", "changed"
+
+# Histórico de mudanças, preservado entre as cargas
+CHANGELOG = """
+CREATE TABLE IF NOT EXISTS changelog (
+    changed_at TIMESTAMP NOT NULL,
+    url VARCHAR NOT NULL,
+    nome VARCHAR,
+    change VARCHAR NOT NULL,
+    attributes VARCHAR[] NOT NULL
+);
+"""
+
+
+def as_items(value) -> list[str]:
+    """Converte o valor de um campo para a lista de textos guardada no banco."""
+    items = value if isinstance(value, list) else [value]
+    return [None if item is None else str(item) for item in items]
+
+
+def canonical(record) -> dict[str, list[str]]:
+    """Conteúdo de um registro na forma usada para comparação (sem a url e o site).
+
+    O site é derivado da url, então também identifica o personagem em vez de
+    descrevê-lo.
+    """
+    return {
+        attribute: as_items(value)
+        for attribute, value in record.items()
+        if attribute not in ("url", "site")
+    }
+
+
+def record_hash(record) -> str:
+    """Calcula o hash do conteúdo de um personagem.
+
+    Um texto e uma lista com esse único texto têm o mesmo hash, pois ficam
+    iguais no formato longo do banco.
+
+    Args:
+        record: Registro do personagem (dicionário ou CharacterRecord)
+
+    Returns:
+        Hash hexadecimal de 32 caracteres
+    """
+    data = json.dumps(sorted(canonical(record).items()), ensure_ascii=False)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def changes_path(db_name: str) -> Path:
+    """Caminho do arquivo de mudanças salvo ao lado de um banco DuckDB.
+
+    Args:
+        db_name: Caminho do banco DuckDB
+
+    Returns:
+        Caminho do arquivo ``.changes.jsonl`` correspondente
+    """
+    return Path(db_name).with_suffix(".changes.jsonl")
+
+
+def previous_hashes(con: duckdb.DuckDBPyConnection, schema: str) -> dict[str, str]:
+    """Lê os hashes da carga anterior.
+
+    Args:
+        con: Conexão DuckDB
+        schema: Esquema das tabelas normalizadas
+
+    Returns:
+        Dicionário url -> hash (vazio se não houver carga anterior com hashes)
+    """
+    has_hashes = con.execute(
+        "SELECT count(*) FROM information_schema.columns "
+        "WHERE table_schema = ? AND table_name = 'characters' AND column_name = 'record_hash'",
+        [schema],
+    ).fetchone()[0]
+    if not has_hashes:
+        return {}
+
+    return dict(con.execute(f"SELECT url, record_hash FROM {schema}.characters").fetchall())
+
+
+def previous_records(
+    con: duckdb.DuckDBPyConnection, schema: str, urls: list[str]
+) -> dict[str, dict[str, list[str]]]:
+    """Lê o conteúdo anterior de alguns personagens, no formato de canonical().
+
+    Args:
+        con: Conexão DuckDB
+        schema: Esquema das tabelas normalizadas
+        urls: Personagens a ler
+
+    Returns:
+        Dicionário url -> {campo: lista de textos}
+    """
+    records = {}
+    if not urls:
+        return records
+
+    rows = con.execute(
+        f"SELECT url, nome FROM {schema}.characters WHERE url IN (SELECT unnest(?))", [urls]
+    ).fetchall()
+    for url, nome in rows:
+        records[url] = {"Nome": [nome]}
+
+    rows = con.execute(
+        f"SELECT url, attribute, value FROM {schema}.character_attributes "
+        "WHERE url IN (SELECT unnest(?)) ORDER BY url, attribute, position",
+        [urls],
+    ).fetchall()
+    for url, attribute, value in rows:
+        records[url].setdefault(attribute, []).append(value)
+
+    return records
+
+
+def diff_records(
+    con: duckdb.DuckDBPyConnection,
+    schema: str,
+    current: dict[str, tuple[str, object]],
+    partial: bool = False,
+) -> list[dict]:
+    """Compara a carga atual com a anterior, ainda guardada no banco.
+
+    Args:
+        con: Conexão DuckDB, antes de as tabelas normalizadas serem recriadas
+        schema: Esquema das tabelas normalizadas
+        current: Dicionário url -> (hash, registro) da carga atual
+        partial: Se True, a carga atual é só uma parte dos personagens: os que
+            não estão nela não são considerados removidos
+
+    Returns:
+        Mudanças, uma por personagem. Cada uma tem ``change``, ``url``,
+        ``Nome``, ``attributes`` (campos novos ou alterados, com os valores
+        atuais) e ``removed`` (campos que deixaram de existir)
+    """
+    before = previous_hashes(con, schema)
+    if partial:
+        before = {url: digest for url, digest in before.items() if url in current}
+
+    changed = [url for url, (digest, _) in current.items() if before.get(url, digest) != digest]
+    old = previous_records(con, schema, changed + [url for url in before if url not in current])
+
+    changes = []
+    for url, (digest, record) in current.items():
+        if url not in before:
+            attributes = {k: v for k, v in record.items() if k not in ("Nome", "url", "site")}
+            changes.append(change_entry(ADDED, url, record["Nome"], attributes, []))
+        elif before[url] != digest:
+            previous, now = old.get(url, {}), canonical(record)
+            attributes = {
+                attribute: record[attribute]
+                for attribute, items in now.items()
+                if attribute != "Nome" and previous.get(attribute) != items
+            }
+            removed = [attribute for attribute in previous if attribute not in now]
+            if previous.get("Nome") != now["Nome"]:
+                attributes["Nome"] = record["Nome"]
+            changes.append(change_entry(CHANGED, url, record["Nome"], attributes, removed))
+
+    for url in before:
+        if url not in current:
+            nome = old.get(url, {}).get("Nome", [None])[0]
+            changes.append(change_entry(REMOVED, url, nome, {}, []))
+
+    return changes
+
+
+def change_entry(change: str, url: str, nome: str, attributes: dict, removed: list) -> dict:
+    """Monta uma mudança no formato do arquivo JSONL."""
+    return {
+        "change": change,
+        "url": url,
+        "Nome": nome,
+        "attributes": attributes,
+        "removed": removed,
+    }
+
+
+def insert_changes(con: duckdb.DuckDBPyConnection, changes: list[dict]) -> None:
+    """Acrescenta as mudanças da carga à tabela ``changelog`` do esquema atual.
+
+    Args:
+        con: Conexão DuckDB, com o esquema das tabelas normalizadas ativo
+        changes: Mudanças calculadas por diff_records()
+    """
+    con.execute(CHANGELOG)
+    if not changes:
+        return
+
+    con.execute(
+        "INSERT INTO changelog SELECT current_timestamp, unnest(?), unnest(?), unnest(?), "
+        "unnest(?::VARCHAR[][])",
+        [
+            [change["url"] for change in changes],
+            [change["Nome"] for change in changes],
+            [change["change"] for change in changes],
+            [list(change["attributes"]) + change["removed"] for change in changes],
+        ],
+    )
+
+
+def write_changes(changes: list[dict], path: str | Path) -> None:
+    """Salva as mudanças da última carga em JSONL, uma por linha.
+
+    Args:
+        changes: Mudanças calculadas por diff_records()
+        path: Caminho do arquivo
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for change in changes:
+            f.write(json.dumps(change, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def summarize(changes: list[dict]) -> str:
+    """Descreve quantos personagens entraram, saíram ou mudaram."""
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    for change in changes:
+        counts[change["change"]] += 1
+
+    return f"{counts[ADDED]} novo(s), {counts[REMOVED]} removido(s), {counts[CHANGED]} alterado(s)"
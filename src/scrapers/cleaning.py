@@ -0,0 +1,107 @@
+"""Limpeza em fluxo dos registros de personagens.
+
+Cada filtro é um predicado ``registro -> bool`` aplicado a um registro por vez,
+então a limpeza pode ser usada tanto sobre uma lista pronta (clean_records)
+quanto dentro de uma etapa que recebe registros um a um (keep).
+"""
+
+from collections.abc import Callable, Hashable, Iterable, Iterator
+
+Filter = Callable[[dict], bool]
+
+
+def exclude_values(key: str, values: Iterable[Hashable]) -> Filter:
+    """Cria um filtro que descarta registros cujo campo está na lista.
+
+    Args:
+        key: Campo a comparar
+        values: Valores a descartar
+
+    Returns:
+        Filtro que aceita apenas registros com valores fora da lista
+    """
+    excluded = frozenset(values)
+
+    def _filter(record: dict) -> bool:
+        return record.get(key) not in excluded
+
+    return _filter
+
+
+def dedup_by(*keys: str) -> Filter:
+    """Cria um filtro que mantém apenas a primeira ocorrência de cada chave.
+
+    Guarda só as chaves já vistas, então a memória é proporcional ao número de
+    chaves distintas, não ao número de registros.
+
+    Args:
+        keys: Campos que, juntos, formam a chave de duplicidade
+
+    Returns:
+        Filtro com estado: use um novo filtro para cada execução
+    """
+    seen = set()
+
+    def _filter(record: dict) -> bool:
+        values = []
+        for key in keys:
+            value = record.get(key)
+            values.append(tuple(value) if isinstance(value, list) else value)
+        value = values[0] if len(values) == 1 else tuple(values)
+        if value in seen:
+            return False
+        seen.add(value)
+        return True
+
+    return _filter
+
+
+def require_fields(*fields: str) -> Filter:
+    """Cria um filtro que descarta registros sem algum dos campos.
+
+    Args:
+        fields: Campos obrigatórios (não podem faltar nem ser vazios)
+
+    Returns:
+        Filtro que aceita apenas registros com todos os campos preenchidos
+    """
+
+    def _filter(record: dict) -> bool:
+        for field in fields:
+            if not record.get(field):
+                return False
+        return True
+
+    return _filter
+
+
+def keep(record: dict, filters: Iterable[Filter]) -> bool:
+    """Verifica se um registro passa por todos os filtros.
+
+    Args:
+        record: Registro do personagem
+        filters: Filtros a aplicar, em ordem
+
+    Returns:
+        True se o registro deve ser mantido
+    """
+    for record_filter in filters:
+        if not record_filter(record):
+            return False
+    return True
+
+
+def clean_records(records: Iterable[dict], filters: Iterable[Filter]) -> Iterator[dict]:
+    """Aplica os filtros a um fluxo de registros.
+
+    Args:
+        records: Registros de personagens (lista ou gerador)
+        filters: Filtros a aplicar, em ordem
+
+    Yields:
+        Registros que passaram por todos os filtros, na ordem original
+    """
+    filters = list(filters)
+    for record in records:
+        if keep(record, filters):
+            yield record
@@ -0,0 +1,342 @@
+"""Controle adaptativo de concorrência das requisições.
+
+O AdaptiveLimiter segue o esquema AIMD (aumento aditivo, redução
+multiplicativa) guiado pela latência observada:
+
+- cada resposta rápida aumenta o limite em ``1 / limite`` (cerca de +1 a cada
+  janela completa de requisições)
+- uma resposta 429/403/503, um erro de conexão ou uma latência média acima de
+  ``tolerance`` vezes a menor latência já vista reduz o limite pela metade,
+  no máximo uma vez por intervalo de latência
+
+O mesmo limitador é usado pelo modo assíncrono (acquire/release com await) e
+pelo modo multiprocessing (o processo principal consulta ``limit`` antes de
+despachar mais tarefas aos workers). Ele não é thread-safe: deve ser usado a
+partir de um único loop de eventos ou thread.
+
+Para a cauda da latência, o módulo também tem:
+
+- REQUEST_TIMEOUT e CONNECT_TIMEOUT: prazo de cada requisição, em todos os modos
+- Deadline: orçamento de tempo de uma etapa, depois do qual nenhum item novo
+  é iniciado
+- LatencyTracker e hedged(): requisições de reserva no modo async; se a
+  resposta demora mais que o p95 recente, uma cópia da requisição é enviada e
+  vale a que responder primeiro (a outra é cancelada)
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from loguru import logger
+
+# Status que indicam que o servidor quer menos requisições
+THROTTLE_STATUS = {403, 429, 503}
+
+# Prazo total de uma requisição e da conexão, em segundos
+REQUEST_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 10.0
+
+
+class Sample:
+    """Resultado de uma requisição, preenchido por quem a fez."""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        """Cria uma amostra sem status (requisição sem resposta)."""
+        self.status = None
+
+
+class AdaptiveLimiter:
+    """Limite de requisições simultâneas ajustado pela latência e por erros."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        tolerance: float = 2.0,
+        smoothing: float = 0.1,
+    ):
+        """Configura o limitador.
+
+        Args:
+            initial: Limite inicial
+            min_limit: Menor limite permitido
+            max_limit: Maior limite permitido
+            backoff: Fator aplicado ao limite em cada redução
+            tolerance: Quantas vezes a latência média pode superar a mínima
+            smoothing: Peso de cada amostra na média móvel de latência
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.min_latency = None
+        self.avg_latency = None
+        self.peak = int(self._limit)
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Número de requisições simultâneas permitidas agora."""
+        return int(self._limit)
+
+    def record(self, latency: float, status: int | None) -> None:
+        """Ajusta o limite a partir do resultado de uma requisição.
+
+        Args:
+            latency: Duração da requisição, em segundos
+            status: Status HTTP, ou None se não houve resposta
+        """
+        if status is None or status in THROTTLE_STATUS:
+            self._decrease(f"status {status}")
+            return
+
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += self.smoothing * (latency - self.avg_latency)
+
+        if self.avg_latency > self.tolerance * self.min_latency:
+            self._decrease(f"latência média {self.avg_latency:.3f}s")
+            return
+
+        self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        self.peak = max(self.peak, self.limit)
+        self._wake()
+
+    def _decrease(self, reason: str) -> None:
+        """Reduz o limite, no máximo uma vez por intervalo de latência."""
+        now = time.monotonic()
+        if now - self._last_decrease < (self.avg_latency or 0):
+            return
+
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        self.decreases += 1
+
+        # A latência de referência volta a ser medida no novo nível de carga
+        self.avg_latency = self.min_latency
+        logger.debug(f"Concorrência reduzida para {self.limit} ({reason})")
+
+    def has_capacity(self) -> bool:
+        """Verifica se mais uma requisição pode ser iniciada agora."""
+        return self.in_flight < self.limit
+
+    def try_acquire(self) -> bool:
+        """Reserva uma vaga se houver capacidade (uso síncrono).
+
+        Returns:
+            True se a vaga foi reservada; libere-a com release()
+        """
+        if not self.has_capacity():
+            return False
+        self.in_flight += 1
+        return True
+
+    async def acquire(self) -> None:
+        """Espera até haver capacidade e reserva uma vaga."""
+        while not self.has_capacity():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+        self.in_flight += 1
+
+    def release(self) -> None:
+        """Libera uma vaga reservada com acquire() ou try_acquire()."""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Acorda tantas tarefas em espera quanto a capacidade livre."""
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Reserva uma vaga durante uma requisição e registra seu resultado.
+
+        Quem faz a requisição preenche ``sample.status``; um erro antes disso
+        conta como requisição sem resposta, e cancelamentos não são registrados.
+
+        Yields:
+            Sample a ser preenchida com o status da resposta
+        """
+        await self.acquire()
+        sample = Sample()
+        start = time.perf_counter()
+        try:
+            yield sample
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.record(time.perf_counter() - start, sample.status)
+            raise
+        else:
+            self.record(time.perf_counter() - start, sample.status)
+        finally:
+            self.release()
+
+    def summary(self) -> str:
+        """Descreve o nível de concorrência escolhido."""
+        latency = f"{self.min_latency * 1000:.0f}ms" if self.min_latency is not None else "-"
+        return (
+            f"Concorrência adaptativa: limite {self.limit} (pico {self.peak}, "
+            f"{self.decreases} redução(ões), latência mínima {latency})"
+        )
+
+
+class Deadline:
+    """Orçamento de tempo de uma etapa (sem orçamento, nunca expira)."""
+
+    def __init__(self, budget: float | None = None):
+        """Começa a contar o prazo.
+
+        Args:
+            budget: Segundos disponíveis para a etapa, ou None para nenhum limite
+        """
+        self.budget = budget
+        self.expires_at = None if budget is None else time.monotonic() + budget
+
+    def remaining(self) -> float | None:
+        """Segundos que faltam (None se não houver limite)."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Verifica se o prazo já acabou."""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class LatencyTracker:
+    """Latências recentes com sucesso, para o atraso das requisições de reserva."""
+
+    def __init__(
+        self,
+        window: int = 500,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+    ):
+        """Configura a janela de latências.
+
+        Args:
+            window: Número de latências guardadas
+            quantile: Quantil da janela usado como atraso (0.95 = p95)
+            min_samples: Latências necessárias antes de enviar reservas
+            min_delay: Menor atraso, em segundos
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies = deque(maxlen=window)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._delay = None
+        self._stale = 0
+
+    def add(self, latency: float) -> None:
+        """Registra a latência de uma requisição com sucesso."""
+        self.latencies.append(latency)
+        self._stale += 1
+
+    def delay(self) -> float | None:
+        """Espera antes de enviar uma reserva (None enquanto houver poucas amostras).
+
+        O quantil é recalculado a cada 5% da janela, não a cada requisição.
+        """
+        if len(self.latencies) < self.min_samples:
+            return None
+        if self._delay is None or self._stale >= max(1, self.latencies.maxlen // 20):
+            ordered = sorted(self.latencies)
+            index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+            self._delay = max(self.min_delay, ordered[index])
+            self._stale = 0
+        return self._delay
+
+    def summary(self) -> str:
+        """Descreve as reservas enviadas."""
+        delay = self.delay()
+        delay = f"{delay * 1000:.0f}ms" if delay is not None else "-"
+        return (
+            f"Requisições de reserva: {self.hedges} enviada(s), "
+            f"{self.hedge_wins} mais rápida(s) que a original (atraso p95 {delay})"
+        )
+
+
+async def hedged(
+    request: Callable[[], Awaitable],
+    tracker: LatencyTracker,
+    can_hedge: Callable[[], bool] | None = None,
+    backup: Callable[[], Awaitable] | None = None,
+):
+    """Faz uma requisição com uma reserva se ela demorar mais que o p95 recente.
+
+    O atraso conta a partir da chamada: quem usa um limitador deve chamar
+    hedged() depois de obter a vaga, para que a espera na fila não vire
+    reserva. Erros da primeira requisição antes do atraso são repassados (a
+    reserva só cobre lentidão). Depois de enviada a reserva, vale a primeira
+    resposta com sucesso; a outra requisição é cancelada.
+
+    Args:
+        request: Função que cria a corrotina da requisição (e da reserva, sem ``backup``)
+        tracker: Latências recentes e contadores das reservas
+        can_hedge: Consultada ao fim do atraso; se devolver False (por exemplo,
+            com o limitador cheio), a reserva não é enviada
+        backup: Função que cria a corrotina da reserva; por padrão, ``request``.
+            Com um limitador, deve obter uma vaga própria para a reserva
+
+    Returns:
+        Resultado da requisição que terminou primeiro
+    """
+    delay = tracker.delay()
+    first = asyncio.ensure_future(request())
+    if delay is None:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return first.result()
+        if can_hedge is not None and not can_hedge():
+            return await first
+
+        tracker.hedges += 1
+        tasks.add(asyncio.ensure_future((backup or request)()))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        tracker.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,309 @@
+"""Consultas ao grafo de relações entre personagens.
+
+Os links do infobox (família, lealdades, afiliações...) são guardados como
+arestas tipadas e, a cada carga, convertidos em listas de adjacência no formato
+CSR (ver storage.build_graph):
+
+- ``graph_nodes``: um nó por personagem, com ``edge_offset`` e ``degree``
+- ``graph_relations``: nome de cada relação (o atributo em que o link aparece)
+- ``graph_edges``: as listas de todos os nós, concatenadas em ordem de nó
+
+CharacterGraph carrega essas tabelas (do DuckDB ou dos arquivos Parquet salvos
+ao lado do banco) em ``array`` e responde vizinhos, vizinhança a k passos e
+caminho mais curto percorrendo só os offsets, sem junções de texto.
+"""
+
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import duckdb
+
+from .search import normalize
+from .singleflight import canonical_url
+from .storage import SCHEMA
+
+# Sentidos em que as arestas são percorridas
+OUT, IN, BOTH = "out", "in", "both"
+
+# Arquivos Parquet exportados, por tabela
+PARQUET_FILES = {
+    "graph_nodes": "nodes.parquet",
+    "graph_relations": "relations.parquet",
+    "graph_edges": "edges.parquet",
+}
+
+
+def graph_path(db_name: str) -> Path:
+    """Diretório dos arquivos Parquet do grafo, ao lado do banco DuckDB.
+
+    Args:
+        db_name: Caminho do banco DuckDB
+
+    Returns:
+        Caminho do diretório ``.graph`` correspondente
+    """
+    return Path(db_name).with_suffix(".graph")
+
+
+def export_graph(con: duckdb.DuckDBPyConnection, directory: str | Path) -> None:
+    """Exporta as tabelas do grafo para arquivos Parquet.
+
+    Args:
+        con: Conexão DuckDB com o grafo já calculado
+        directory: Diretório de destino (criado se não existir)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for table, filename in PARQUET_FILES.items():
+        path = str(directory / filename).replace("'", "''")
+        con.execute(f"COPY {SCHEMA}.{table} TO '{path}' (FORMAT parquet)")
+
+
+class CharacterGraph:
+    """Grafo de relações em memória, em formato CSR.
+
+    As arestas do nó ``n`` são as posições ``offsets[n]:offsets[n + 1]`` de
+    ``targets``, ``relation_ids`` e ``outgoing``.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        names: list[str],
+        offsets: array,
+        targets: array,
+        relation_ids: array,
+        outgoing: bytearray,
+        relations: list[str],
+    ):
+        """Cria o grafo a partir dos arrays CSR.
+
+        Args:
+            urls: URL de cada nó
+            names: Nome de cada nó
+            offsets: Início da lista de cada nó, mais o total de arestas no fim
+            targets: Nó de destino de cada aresta
+            relation_ids: Relação de cada aresta (índice em ``relations``)
+            outgoing: 1 se a aresta sai do nó, 0 se chega nele
+            relations: Nomes das relações
+        """
+        self.urls = urls
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.relation_ids = relation_ids
+        self.outgoing = outgoing
+        self.relations = relations
+
+        self._by_url = {canonical_url(url): node for node, url in enumerate(urls)}
+        self._by_name = {}
+        for node, name in enumerate(names):
+            self._by_name.setdefault(normalize(name), node)
+
+    @classmethod
+    def load(cls, con: duckdb.DuckDBPyConnection, tables: dict[str, str]) -> "CharacterGraph":
+        """Lê as tabelas do grafo.
+
+        Args:
+            con: Conexão DuckDB
+            tables: Expressão SQL de cada tabela (nome qualificado ou read_parquet)
+
+        Returns:
+            Grafo carregado
+        """
+        nodes = con.execute(
+            f"SELECT url, nome, edge_offset FROM {tables['graph_nodes']} ORDER BY node_id"
+        ).fetchall()
+        relations = con.execute(
+            f"SELECT relation FROM {tables['graph_relations']} ORDER BY relation_id"
+        ).fetchall()
+        targets, relation_ids, outgoing = con.execute(
+            f"SELECT list(target_id ORDER BY position), list(relation_id ORDER BY position), "
+            f"list(outgoing ORDER BY position) FROM {tables['graph_edges']}"
+        ).fetchone()
+
+        targets = targets or []
+        offsets = array("i", [offset for _, _, offset in nodes])
+        offsets.append(len(targets))
+
+        return cls(
+            urls=[url for url, _, _ in nodes],
+            names=[nome for _, nome, _ in nodes],
+            offsets=offsets,
+            targets=array("i", targets),
+            relation_ids=array("H", relation_ids or []),
+            outgoing=bytearray(outgoing or []),
+            relations=[relation for (relation,) in relations],
+        )
+
+    @classmethod
+    def from_duckdb(cls, con: duckdb.DuckDBPyConnection) -> "CharacterGraph":
+        """Carrega o grafo das tabelas do banco.
+
+        Args:
+            con: Conexão DuckDB (pode ser somente leitura)
+        """
+        return cls.load(con, {table: f"{SCHEMA}.{table}" for table in PARQUET_FILES})
+
+    @classmethod
+    def from_parquet(cls, directory: str | Path) -> "CharacterGraph":
+        """Carrega o grafo dos arquivos Parquet salvos por export_graph().
+
+        Args:
+            directory: Diretório com os arquivos
+        """
+        tables = {}
+        for table, filename in PARQUET_FILES.items():
+            path = str(Path(directory) / filename).replace("'", "''")
+            tables[table] = f"read_parquet('{path}')"
+
+        with duckdb.connect() as con:
+            return cls.load(con, tables)
+
+    def __len__(self) -> int:
+        """Número de personagens (nós)."""
+        return len(self.urls)
+
+    @property
+    def edge_count(self) -> int:
+        """Número de relações distintas entre personagens (cada uma em dois sentidos)."""
+        return len(self.targets) // 2
+
+    def node(self, key: str) -> int:
+        """Encontra o nó de um personagem pela URL ou pelo nome.
+
+        O nome é comparado sem acentos e sem diferenciar maiúsculas; se houver
+        mais de um personagem com o mesmo nome, vale o de menor URL.
+
+        Args:
+            key: URL ou nome do personagem
+
+        Returns:
+            Número do nó
+
+        Raises:
+            KeyError: Se nenhum personagem corresponder
+        """
+        node = self._by_url.get(canonical_url(key))
+        if node is None:
+            node = self._by_name.get(normalize(key))
+        if node is None:
+            raise KeyError(key)
+        return node
+
+    def _edges(
+        self, node: int, relations: set[int] | None = None, direction: str = BOTH
+    ) -> Iterator[tuple[int, int, bool]]:
+        """Percorre as arestas de um nó como (destino, relação, sai do nó)."""
+        for position in range(self.offsets[node], self.offsets[node + 1]):
+            outgoing = bool(self.outgoing[position])
+            if direction == OUT and not outgoing or direction == IN and outgoing:
+                continue
+            relation = self.relation_ids[position]
+            if relations is not None and relation not in relations:
+                continue
+            yield self.targets[position], relation, outgoing
+
+    def _relation_ids(self, relations: Iterable[str] | None) -> set[int] | None:
+        """Converte nomes de relações nos seus índices (None para todas)."""
+        if relations is None:
+            return None
+        wanted = set(relations)
+        return {i for i, name in enumerate(self.relations) if name in wanted}
+
+    def neighbors(
+        self, key: str, relations: Iterable[str] | None = None, direction: str = BOTH
+    ) -> list[tuple[str, str, bool]]:
+        """Lista os personagens ligados diretamente a um personagem.
+
+        Args:
+            key: URL ou nome do personagem
+            relations: Relações consideradas (padrão: todas)
+            direction: ``out`` (links da página do personagem), ``in`` (links
+                de outras páginas para ele) ou ``both``
+
+        Returns:
+            Tuplas (url do vizinho, relação, se o link sai do personagem)
+        """
+        node = self.node(key)
+        return [
+            (self.urls[target], self.relations[relation], outgoing)
+            for target, relation, outgoing in self._edges(
+                node, self._relation_ids(relations), direction
+            )
+        ]
+
+    def k_hop(
+        self, key: str, k: int, relations: Iterable[str] | None = None, direction: str = BOTH
+    ) -> dict[str, int]:
+        """Encontra os personagens a até ``k`` passos de um personagem.
+
+        Args:
+            key: URL ou nome do personagem
+            k: Número máximo de passos
+            relations: Relações consideradas (padrão: todas)
+            direction: Sentido das arestas percorridas (ver neighbors)
+
+        Returns:
+            Dicionário url -> distância, em ordem de distância, sem o próprio personagem
+        """
+        start = self.node(key)
+        wanted = self._relation_ids(relations)
+        distances = {start: 0}
+        frontier = [start]
+        for distance in range(1, k + 1):
+            next_frontier = []
+            for node in frontier:
+                for target, _, _ in self._edges(node, wanted, direction):
+                    if target not in distances:
+                        distances[target] = distance
+                        next_frontier.append(target)
+            frontier = next_frontier
+
+        del distances[start]
+        return {self.urls[node]: distance for node, distance in distances.items()}
+
+    def shortest_path(
+        self, source: str, target: str, relations: Iterable[str] | None = None
+    ) -> list[tuple[str, str | None]] | None:
+        """Encontra o caminho mais curto entre dois personagens (busca em largura).
+
+        As arestas são percorridas nos dois sentidos.
+
+        Args:
+            source: URL ou nome do personagem de origem
+            target: URL ou nome do personagem de destino
+            relations: Relações consideradas (padrão: todas)
+
+        Returns:
+            Tuplas (url, relação pela qual se chegou a ele), começando pela
+            origem (relação None), ou None se não houver caminho
+        """
+        start, goal = self.node(source), self.node(target)
+        wanted = self._relation_ids(relations)
+        previous = {start: (None, None)}
+        queue = deque([start])
+
+        while queue and goal not in previous:
+            node = queue.popleft()
+            for neighbor, relation, _ in self._edges(node, wanted):
+                if neighbor not in previous:
+                    previous[neighbor] = (node, relation)
+                    queue.append(neighbor)
+
+        if goal not in previous:
+            return None
+
+        path = []
+        node = goal
+        while node is not None:
+            parent, relation = previous[node]
+            path.append((self.urls[node], None if relation is None else self.relations[relation]))
+            node = parent
+        return path[::-1]
+
+    def name(self, url: str) -> str:
+        """Nome do personagem de uma URL."""
+        return self.names[self.node(url)]
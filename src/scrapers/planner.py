@@ -0,0 +1,227 @@
+"""Escolha automática do modo de execução (``--mode auto``).
+
+Pela rede, há dois layouts de execução:
+
+- async: um processo, com as requisições em um loop de eventos e o parsing no
+  mesmo processo, entre uma resposta e outra
+- multiprocessing: N processos, cada um com suas requisições e seu parsing; o
+  número de processos também é o limite de requisições simultâneas
+
+O tempo de cada layout é estimado como o maior entre o tempo de rede (páginas /
+requisições simultâneas x latência) e o tempo de parsing (páginas / vazão do
+parsing por núcleo x núcleos usados), mais a partida do pool de processos. Vale
+o layout de menor estimativa; em empate, o async, que usa menos recursos.
+
+A vazão do parsing vem dos resultados de ``benchmarks.parse --json`` (ou do
+número embutido, medido com ele). O tamanho da fronteira é medido nos livros já
+gravados no arquivo de páginas, quando houver um; senão, é estimado.
+"""
+
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .sites import SiteProfile, resolve
+from .wiki_caller_multiprocessing import WikiCaller
+
+ASYNC, MULTIPROCESSING = "async", "multiprocessing"
+
+# Requisições simultâneas do modo async quando --max-concurrency não é informado
+ASYNC_CONCURRENCY = 50
+
+# Páginas/s de um núcleo na verificação + extração com selectolax de páginas de
+# 300 KB (benchmarks.parse: ~640 páginas/s em have_banner e ~460 em get_character_info)
+PARSE_PAGES_PER_SECOND = 250.0
+
+# Latência típica de uma página do fandom, em segundos
+FETCH_SECONDS = 0.5
+
+# Links de personagem por livro, quando os livros não estão no arquivo de páginas
+LINKS_PER_BOOK = 300
+
+# Partida do pool de processos (criação dos workers e importações)
+POOL_STARTUP_SECONDS = 1.0
+
+# Casos do benchmark que somam o custo de parsing de uma página
+BENCHMARK_CASES = ("selectolax.have_banner", "selectolax.get_character_info")
+
+
+def available_cpus() -> int:
+    """Núcleos que este processo pode usar (respeita a afinidade de CPU)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parse_rate_from_benchmark(path: str | Path) -> float:
+    """Lê a vazão do parsing nos resultados de ``benchmarks.parse --json``.
+
+    Soma o custo por página dos casos de BENCHMARK_CASES, usando de cada caso a
+    medida com mais páginas.
+
+    Args:
+        path: Arquivo JSON gravado pelo benchmark
+
+    Returns:
+        Páginas/s de um núcleo na verificação + extração
+
+    Raises:
+        ValueError: Se o arquivo não tiver algum dos casos
+    """
+    results = json.loads(Path(path).read_text(encoding="utf-8"))
+
+    seconds_per_page = 0.0
+    for case in BENCHMARK_CASES:
+        runs = [result for result in results if result["case"] == case]
+        if not runs:
+            raise ValueError(f"O benchmark {path} não tem o caso {case}")
+        best = max(runs, key=lambda result: result["pages"])
+        seconds_per_page += 1 / best["pages_per_second"]
+
+    return 1 / seconds_per_page
+
+
+@dataclass(frozen=True)
+class Workload:
+    """O que se sabe da execução antes de começar."""
+
+    pages: int
+    cpus: int
+    max_concurrency: int | None = None
+    measured: bool = False
+
+
+def measure_workload(
+    sites: Iterable[str | SiteProfile],
+    archive_dir: str | None = None,
+    max_concurrency: int | None = None,
+) -> Workload:
+    """Mede a fronteira da coleta e o hardware disponível.
+
+    Com um arquivo de páginas que já tenha os livros de uma execução anterior,
+    os links de personagem desses livros são contados de fato (a mesma extração
+    de get_book_info, sem rede); os livros que faltam contam pela média dos
+    encontrados. Sem arquivo, cada livro conta LINKS_PER_BOOK links.
+
+    Na coleta pela rede, as páginas arquivadas são baixadas de novo (só o
+    ``reextract`` lê as páginas do arquivo), então o arquivo serve para medir
+    a fronteira, não para poupar requisições.
+
+    Args:
+        sites: Sites coletados
+        archive_dir: Diretório do arquivo de páginas, se houver
+        max_concurrency: Limite de requisições simultâneas configurado
+
+    Returns:
+        Carga estimada
+    """
+    seeds = [url for site in resolve(sites) for url in site.seeds]
+    estimate = Workload(len(seeds) * (LINKS_PER_BOOK + 1), available_cpus(), max_concurrency)
+    if archive_dir is None or not Path(archive_dir).is_dir():
+        return estimate
+
+    scraper = WikiCaller(sites=sites, archive_dir=archive_dir, offline=True)
+    try:
+        found = [seed for seed in seeds if seed in scraper.archive]
+        links = set()
+        counts = []
+        for seed in found:
+            book_links = scraper.get_book_info(seed)
+            counts.append(len(book_links))
+            links.update(book_links)
+    finally:
+        scraper.archive.close()
+
+    if not found:
+        return estimate
+
+    missing = len(seeds) - len(found)
+    pages = len(seeds) + len(links) + round(missing * sum(counts) / len(counts))
+    return Workload(pages, estimate.cpus, max_concurrency, measured=True)
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Modo escolhido, com as estimativas que levaram a ele."""
+
+    mode: str
+    workers: int
+    workload: Workload
+    parse_rate: float
+    estimates: dict[str, tuple[int, float]] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """Resumo da decisão em uma linha, para o operador."""
+        workload = self.workload
+        source = "measured from archived books" if workload.measured else "estimated"
+        unit = "concurrent requests" if self.mode == ASYNC else "processes"
+        estimates = ", ".join(
+            f"{mode} with {workers}: {seconds:.0f} s"
+            for mode, (workers, seconds) in self.estimates.items()
+        )
+        return (
+            f"Auto mode: {self.mode} with {self.workers} {unit} ({estimates}); "
+            f"~{workload.pages} pages ({source}), {workload.cpus} CPU(s), "
+            f"max concurrency {workload.max_concurrency or 'default'}, "
+            f"parse {self.parse_rate:.0f} pages/s per core"
+        )
+
+
+def estimate_seconds(
+    mode: str,
+    workers: int,
+    workload: Workload,
+    parse_rate: float = PARSE_PAGES_PER_SECOND,
+    fetch_seconds: float = FETCH_SECONDS,
+) -> float:
+    """Estima a duração de uma execução em um layout.
+
+    Args:
+        mode: ASYNC ou MULTIPROCESSING
+        workers: Requisições simultâneas (async) ou processos (multiprocessing)
+        workload: Carga da execução
+        parse_rate: Páginas/s de um núcleo no parsing
+        fetch_seconds: Latência de uma requisição
+
+    Returns:
+        Segundos estimados
+    """
+    network = workload.pages * fetch_seconds / workers
+    if mode == ASYNC:
+        return max(network, workload.pages / parse_rate)
+
+    cores = min(workers, workload.cpus)
+    return POOL_STARTUP_SECONDS + max(network, workload.pages / (parse_rate * cores))
+
+
+def choose_plan(
+    workload: Workload,
+    parse_rate: float = PARSE_PAGES_PER_SECOND,
+    fetch_seconds: float = FETCH_SECONDS,
+) -> ExecutionPlan:
+    """Escolhe o layout de execução de menor duração estimada.
+
+    O async usa o limite configurado de requisições (ou ASYNC_CONCURRENCY); o
+    multiprocessing, um processo por núcleo (menos, se o limite configurado for
+    menor: nele, o número de processos também limita as requisições).
+
+    Args:
+        workload: Carga da execução (ver measure_workload)
+        parse_rate: Páginas/s de um núcleo no parsing
+        fetch_seconds: Latência de uma requisição
+
+    Returns:
+        Plano com o modo, o número de workers e as estimativas dos dois layouts
+    """
+    candidates = {
+        ASYNC: workload.max_concurrency or ASYNC_CONCURRENCY,
+        MULTIPROCESSING: min(workload.max_concurrency or workload.cpus, workload.cpus),
+    }
+    estimates = {
+        mode: (workers, estimate_seconds(mode, workers, workload, parse_rate, fetch_seconds))
+        for mode, workers in candidates.items()
+    }
+    mode = min(estimates, key=lambda mode: (estimates[mode][1], mode != ASYNC))
+    return ExecutionPlan(mode, candidates[mode], workload, parse_rate, estimates)
@@ -0,0 +1,278 @@
+"""Perfil de execução dos scrapers (opção ``--profile``).
+
+O processo principal roda sob o cProfile, que também mede as corrotinas do
+modo assíncrono (cada retomada conta como uma chamada, e o tempo é o de CPU
+dentro da corrotina, sem a espera pela rede). No modo multiprocessing, cada
+worker liga o próprio cProfile em init_worker() e salva o perfil ao terminar;
+a variável de ambiente ``HP_SCRAPER_PROFILE_DIR`` avisa os workers onde salvar.
+
+Os métodos do selectolax são compilados com Cython e não aparecem no cProfile;
+durante o perfil, os scrapers usam ProfiledParser, uma subclasse em Python do
+LexborHTMLParser, para que a construção da árvore e as chamadas a ``css`` e
+``css_first`` da página sejam medidas (as chamadas em nós continuam contando
+como tempo próprio de quem as faz).
+
+Ao final, a pasta do perfil contém:
+
+- ``main.prof`` e ``worker-<pid>.prof``: perfis de cada processo
+- ``combined.prof``: todos somados, para abrir com pstats ou snakeviz
+- ``profile.collapsed``: pilhas no formato do flamegraph.pl / speedscope,
+  com as raízes ``main`` e ``workers``
+- ``summary.txt``: tempo dos trechos quentes e as funções mais caras
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+from pathos.helpers import mp
+from selectolax.lexbor import LexborHTMLParser
+
+ENV_VAR = "HP_SCRAPER_PROFILE_DIR"
+
+# Trechos de pilha mais curtos que isso são descartados do arquivo collapsed
+MIN_MICROSECONDS = 100
+MAX_DEPTH = 64
+
+PACKAGE_DIR = str(Path(__file__).parent)
+
+
+class ProfiledParser(LexborHTMLParser):
+    """LexborHTMLParser com construção e seletores visíveis ao cProfile."""
+
+    def __init__(self, html):
+        """Faz o parsing da página."""
+        super().__init__(html)
+
+    def css(self, query: str):
+        """Mesmo que LexborHTMLParser.css."""
+        return super().css(query)
+
+    def css_first(self, query: str, *args, **kwargs):
+        """Mesmo que LexborHTMLParser.css_first."""
+        return super().css_first(query, *args, **kwargs)
+
+
+def instrument(parser: type = ProfiledParser) -> None:
+    """Troca o parser HTML usado pelos scrapers selectolax.
+
+    Args:
+        parser: Classe usada no lugar de LexborHTMLParser
+    """
+    from . import wiki_caller_async, wiki_caller_multiprocessing
+
+    wiki_caller_async.HTMLParser = parser
+    wiki_caller_multiprocessing.HTMLParser = parser
+
+
+def own(name: str, module: str | None = None):
+    """Seleciona uma função do pacote pelo nome (e, opcionalmente, pelo arquivo)."""
+
+    def matches(func: tuple) -> bool:
+        filename, _, funcname = func
+        if not filename.startswith(PACKAGE_DIR) or funcname != name:
+            return False
+        return module is None or Path(filename).name == module
+
+    return matches
+
+
+def bs4_method(*names: str, module: str | None = None):
+    """Seleciona métodos do BeautifulSoup (modo síncrono) pelo nome e arquivo."""
+
+    def matches(func: tuple) -> bool:
+        filename, _, funcname = func
+        if f"{os.sep}bs4{os.sep}" not in filename or funcname not in names:
+            return False
+        return module is None or Path(filename).name == module
+
+    return matches
+
+
+def any_of(*matchers):
+    """Seleciona as funções aceitas por qualquer um dos seletores."""
+    return lambda func: any(matches(func) for matches in matchers)
+
+
+# Trechos quentes resumidos em summary.txt
+HOT_PATHS = (
+    ("fetch", own("fetch")),
+    (
+        "HTMLParser",
+        any_of(own("__init__", "profiling.py"), bs4_method("__init__", module="__init__.py")),
+    ),
+    (
+        "css / css_first",
+        any_of(own("css", "profiling.py"), own("css_first", "profiling.py")),
+    ),
+    ("select (bs4)", bs4_method("select", "select_one")),
+    ("remove_accents", own("remove_accents", "text.py")),
+    ("save_to_csv", own("save_to_csv")),
+    ("save_data_to_duckdb", own("save_data_to_duckdb")),
+    ("save_search_index", own("save_search_index")),
+)
+
+
+def start_worker() -> None:
+    """Liga o perfil em um processo worker, se o processo principal pediu.
+
+    O perfil é salvo pelo finalizador do multiprocess (``pathos.helpers.mp``), que
+    roda quando o worker termina normalmente (pool fechado com close/join, não
+    terminate).
+    """
+    directory = os.environ.get(ENV_VAR)
+    if not directory:
+        return
+
+    instrument()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    path = Path(directory) / f"worker-{os.getpid()}.prof"
+    mp.util.Finalize(None, dump, args=(profiler, path), exitpriority=100)
+
+
+def dump(profiler: cProfile.Profile, path: Path) -> None:
+    """Desliga um perfil e o salva em arquivo."""
+    profiler.disable()
+    profiler.dump_stats(path)
+
+
+def label(func: tuple) -> str:
+    """Nome de uma função em um quadro da pilha."""
+    filename, lineno, funcname = func
+    if filename == "~":
+        return funcname.replace(";", ",")
+    return f"{funcname} ({Path(filename).name}:{lineno})"
+
+
+def collapse(stats: dict, root: str, out: dict[str, int]) -> None:
+    """Converte um perfil do cProfile em pilhas no formato collapsed.
+
+    O cProfile guarda só as arestas chamador -> chamado, então as pilhas são
+    reconstruídas a partir das raízes, dividindo o tempo de cada função entre
+    os caminhos na proporção do tempo de cada aresta.
+
+    Args:
+        stats: ``pstats.Stats.stats`` de um perfil
+        root: Nome do quadro raiz (ex.: "main", "workers")
+        out: Dicionário pilha -> microssegundos, acumulado entre perfis
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    def walk(func: tuple, path: tuple, frames: str, share: float) -> None:
+        own_time = stats[func][2] * share * 1e6
+        if own_time >= 1:
+            out[frames] += int(own_time)
+        if len(path) >= MAX_DEPTH:
+            return
+
+        for callee, edge_time in callees[func].items():
+            total = stats[callee][3]
+            time_here = edge_time * share
+            if callee in path or total <= 0 or time_here * 1e6 < MIN_MICROSECONDS:
+                continue
+            walk(callee, path + (callee,), f"{frames};{label(callee)}", time_here / total)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, (func,), f"{root};{label(func)}", 1.0)
+
+
+def hot_paths(stats: dict) -> list[tuple[str, int, float, float]]:
+    """Soma chamadas, tempo próprio e tempo acumulado de cada trecho quente.
+
+    Returns:
+        Linhas (trecho, chamadas, tempo próprio, tempo acumulado), em segundos
+    """
+    rows = []
+    for name, matches in HOT_PATHS:
+        calls, own_time, cumulative = 0, 0.0, 0.0
+        for func, (_, nc, tt, ct, _) in stats.items():
+            if matches(func):
+                calls += nc
+                own_time += tt
+                cumulative += ct
+        rows.append((name, calls, own_time, cumulative))
+
+    return rows
+
+
+def report(directory: Path, top: int = 20) -> str:
+    """Junta os perfis da pasta e gera combined.prof, profile.collapsed e summary.txt.
+
+    Args:
+        directory: Pasta com main.prof e os worker-<pid>.prof
+        top: Quantas funções listar no resumo
+
+    Returns:
+        Texto do resumo
+    """
+    main = directory / "main.prof"
+    workers = sorted(directory.glob("worker-*.prof"))
+
+    stacks = defaultdict(int)
+    collapse(pstats.Stats(str(main)).stats, "main", stacks)
+    for path in workers:
+        collapse(pstats.Stats(str(path)).stats, "workers", stacks)
+
+    with open(directory / "profile.collapsed", "w", encoding="utf-8") as f:
+        for frames, microseconds in stacks.items():
+            f.write(f"{frames} {microseconds}\n")
+
+    combined = pstats.Stats(str(main))
+    for path in workers:
+        combined.add(str(path))
+    combined.dump_stats(directory / "combined.prof")
+
+    lines = [
+        f"Perfil de 1 processo principal e {len(workers)} worker(s)",
+        "",
+        f"{'trecho':<22}{'chamadas':>10}{'próprio (s)':>14}{'acumulado (s)':>16}",
+    ]
+    for name, calls, own_time, cumulative in hot_paths(combined.stats):
+        lines.append(f"{name:<22}{calls:>10}{own_time:>14.3f}{cumulative:>16.3f}")
+
+    buffer = io.StringIO()
+    combined.stream = buffer
+    combined.sort_stats("cumulative").print_stats(top)
+    summary = "\n".join(lines) + "\n\n" + buffer.getvalue()
+
+    (directory / "summary.txt").write_text(summary, encoding="utf-8")
+    return summary
+
+
+@contextmanager
+def profile(directory: str | Path, top: int = 20):
+    """Executa um bloco sob o cProfile, junto com os workers que ele criar.
+
+    Args:
+        directory: Pasta onde os perfis e o resumo são salvos
+        top: Quantas funções listar no resumo
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for old in directory.glob("*.prof"):
+        old.unlink()
+
+    os.environ[ENV_VAR] = str(directory.resolve())
+    instrument()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        instrument(LexborHTMLParser)
+        os.environ.pop(ENV_VAR, None)
+        profiler.dump_stats(directory / "main.prof")
+
+        summary = report(directory, top)
+        logger.info(f"Perfil salvo em {directory}/ (combined.prof, profile.collapsed)\n{summary}")
@@ -0,0 +1,118 @@
+"""Progresso e estatísticas da coleta, agregados no processo principal.
+
+As etapas só incrementam contadores (uma soma em um dicionário, sem E/S); uma
+thread desenha o progresso a cada intervalo:
+
+- em um terminal, uma única linha reescrita no lugar (``\\r``) no stderr
+- fora de um terminal (contêineres, arquivos de log), uma linha de log a cada
+  LOG_INTERVAL segundos, só quando algo mudou
+
+No modo multiprocessing, os workers não desenham nada: cada resultado que volta
+pela fila do pool (ver WikiCaller.dispatch) traz as amostras das requisições, e
+o processo principal conta os resultados e as requisições.
+"""
+
+import sys
+import threading
+import time
+from typing import TextIO
+
+from loguru import logger
+
+# Segundos entre redesenhos no terminal
+TTY_INTERVAL = 0.2
+
+# Segundos entre linhas de log fora de um terminal
+LOG_INTERVAL = 10.0
+
+# Contadores exibidos com a taxa por segundo
+RATE_COUNTERS = ("requests",)
+
+
+class Progress:
+    """Contadores de progresso por etapa, com um único display."""
+
+    def __init__(self, stream: TextIO | None = None, interval: float | None = None):
+        """Cria os contadores; o display só começa com start() ou ``with``.
+
+        Args:
+            stream: Saída do display de terminal (padrão: stderr)
+            interval: Segundos entre atualizações (padrão: TTY_INTERVAL em um
+                terminal, LOG_INTERVAL fora dele)
+        """
+        self.stream = stream or sys.stderr
+        self.tty = self.stream.isatty()
+        self.interval = interval or (TTY_INTERVAL if self.tty else LOG_INTERVAL)
+
+        self.done = {}
+        self.totals = {}
+        self.started = time.monotonic()
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_total(self, stage: str, n: int = 1) -> None:
+        """Aumenta o número de itens esperados em uma etapa."""
+        self.totals[stage] = self.totals.get(stage, 0) + n
+        self.done.setdefault(stage, 0)
+
+    def advance(self, stage: str, n: int = 1) -> None:
+        """Conta itens concluídos em uma etapa (ou em um contador sem total)."""
+        self.done[stage] = self.done.get(stage, 0) + n
+
+    def line(self) -> str:
+        """Estado atual em uma linha."""
+        elapsed = time.monotonic() - self.started
+        parts = []
+        for stage, done in list(self.done.items()):
+            total = self.totals.get(stage)
+            part = f"{stage} {done}/{total}" if total is not None else f"{stage} {done}"
+            if stage in RATE_COUNTERS and elapsed > 0:
+                part += f" ({done / elapsed:.1f}/s)"
+            parts.append(part)
+
+        minutes, seconds = divmod(int(elapsed), 60)
+        return f"[{minutes:02d}:{seconds:02d}] " + " | ".join(parts)
+
+    def render(self, final: bool = False) -> None:
+        """Desenha o progresso: reescreve a linha no terminal ou registra um log."""
+        line = self.line()
+        if self.tty:
+            self.stream.write(f"\r{line}\x1b[K" + ("\n" if final else ""))
+            self.stream.flush()
+            return
+
+        state = line.partition("] ")[2]
+        if state and (final or state != self._last):
+            logger.info(f"Progress {line}")
+            self._last = state
+
+    def _run(self) -> None:
+        """Laço da thread do display."""
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def start(self) -> "Progress":
+        """Começa a desenhar o progresso em uma thread."""
+        self.started = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Para o display e desenha o estado final."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.render(final=True)
+
+    def __enter__(self) -> "Progress":
+        """Começa o display."""
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        """Para o display."""
+        self.stop()
@@ -0,0 +1,290 @@
+"""Representação compacta dos personagens extraídos.
+
+- CharacterRecord: um personagem, com ``__slots__``, nomes de atributos
+  internados e valores simples guardados como texto (listas só quando o
+  infobox tem vários itens)
+- RecordBatch: lote colunar, só de inserção, em que cada coluna guarda os
+  textos em um único buffer UTF-8 com offsets em ``array``; é o que os
+  escritores de CSV, DuckDB e índice de busca percorrem
+"""
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from .text import remove_accents
+
+Value = str | list[str]
+
+
+@lru_cache(maxsize=4096)
+def attribute_name(label: str) -> str:
+    """Normaliza o rótulo de um campo do infobox para nome de atributo.
+
+    Remove acentos e espaços nas bordas e interna o resultado, de modo que
+    todos os registros compartilham o mesmo objeto ``str`` para cada atributo.
+    O cache evita refazer a remoção de acentos a cada página.
+
+    Args:
+        label: Rótulo como aparece na página (ex.: "Espécie")
+
+    Returns:
+        Nome do atributo (ex.: "Especie")
+    """
+    return sys.intern(remove_accents(label.strip()))
+
+
+@dataclass(slots=True)
+class CharacterRecord:
+    """Dados de um personagem extraídos do infobox.
+
+    Aceita o acesso de dicionário usado pelos filtros e escritores:
+    ``record["Nome"]``, ``record["url"]``, ``record["site"]`` e
+    ``record[atributo]``. O campo ``site`` só existe se o registro tiver site.
+
+    Os links do infobox para outras páginas do wiki ficam em ``links``
+    (atributo -> URLs de destino), fora dos campos: não vão para o CSV nem
+    entram no hash do changelog, só no grafo de relações (ver graph.py).
+    """
+
+    nome: str
+    url: str
+    attributes: dict[str, Value] = field(default_factory=dict)
+    site: str = ""
+    links: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_infobox(
+        cls,
+        nome: str,
+        url: str,
+        labels: Iterable[str],
+        values: Iterable[Value],
+        site: str = "",
+        field_map: Mapping[str, str] | None = None,
+        links: Iterable[list[str]] = (),
+    ) -> "CharacterRecord":
+        """Monta um registro a partir dos rótulos e valores do infobox.
+
+        Args:
+            nome: Nome do personagem
+            url: Link da página do personagem
+            labels: Rótulos dos campos, como aparecem na página
+            values: Valores dos campos, na mesma ordem dos rótulos
+            site: Nome do site de origem (ver sites.py)
+            field_map: Tradução dos nomes de atributo do site para os nomes comuns
+            links: URLs de destino dos links de cada valor, na mesma ordem dos
+                rótulos (pode ser vazio)
+
+        Returns:
+            Registro com os nomes de atributos normalizados
+        """
+        attributes = {}
+        names = []
+        for label, value in zip(labels, values):
+            name = attribute_name(label)
+            if field_map:
+                name = attribute_name(field_map.get(name, name))
+            attributes[name] = value
+            names.append(name)
+
+        record_links = {}
+        for name, targets in zip(names, links):
+            if targets:
+                record_links.setdefault(name, []).extend(targets)
+        return cls(nome, url, attributes, site, record_links)
+
+    def get(self, key: str, default=None):
+        """Lê um campo como em um dicionário."""
+        if key == "Nome":
+            return self.nome
+        if key == "url":
+            return self.url
+        if key == "site" and self.site:
+            return self.site
+        return self.attributes.get(key, default)
+
+    def __getitem__(self, key: str):
+        """Lê um campo como em um dicionário."""
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def items(self) -> Iterator[tuple[str, Value]]:
+        """Percorre os campos na ordem dos dicionários antigos: atributos, Nome, url, site."""
+        yield from self.attributes.items()
+        yield "Nome", self.nome
+        yield "url", self.url
+        if self.site:
+            yield "site", self.site
+
+    def to_dict(self) -> dict[str, Value]:
+        """Converte para dicionário plano."""
+        return dict(self.items())
+
+
+# Tipos de célula de uma coluna
+NULL, SCALAR, LIST = 0, 1, 2
+
+
+class StringColumn:
+    """Coluna de textos ou listas de textos em buffers contíguos.
+
+    Cada linha aponta, por ``row_offsets``, para um intervalo de itens; cada
+    item aponta, por ``value_offsets``, para um intervalo de bytes em ``data``.
+    É o mesmo layout de uma coluna ``list<string>`` do Arrow.
+    """
+
+    __slots__ = ("kinds", "row_offsets", "value_offsets", "data")
+
+    def __init__(self):
+        """Cria uma coluna vazia."""
+        self.kinds = bytearray()
+        self.row_offsets = array("I", [0])
+        self.value_offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def __len__(self) -> int:
+        """Número de linhas da coluna."""
+        return len(self.kinds)
+
+    def _add(self, text: str) -> None:
+        """Acrescenta um item ao buffer."""
+        self.data += text.encode()
+        self.value_offsets.append(len(self.data))
+
+    def append(self, value: Value | None) -> None:
+        """Acrescenta uma linha.
+
+        Args:
+            value: Texto, lista de textos ou None (célula vazia)
+        """
+        if value is None:
+            self.kinds.append(NULL)
+        elif isinstance(value, list):
+            self.kinds.append(LIST)
+            for item in value:
+                self._add(item)
+        else:
+            self.kinds.append(SCALAR)
+            self._add(value)
+
+        self.row_offsets.append(len(self.value_offsets) - 1)
+
+    def pad(self, length: int) -> None:
+        """Completa a coluna com células vazias até o número de linhas dado."""
+        while len(self.kinds) < length:
+            self.append(None)
+
+    def get(self, row: int) -> Value | None:
+        """Lê uma célula, materializando apenas os seus textos.
+
+        Args:
+            row: Índice da linha
+
+        Returns:
+            Texto, lista de textos ou None se a célula estiver vazia
+        """
+        if row >= len(self.kinds) or self.kinds[row] == NULL:
+            return None
+
+        offsets = self.value_offsets
+        items = []
+        for i in range(self.row_offsets[row], self.row_offsets[row + 1]):
+            items.append(self.data[offsets[i] : offsets[i + 1]].decode())
+
+        return items[0] if self.kinds[row] == SCALAR else items
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelos buffers da coluna, em bytes."""
+        return (
+            len(self.kinds)
+            + self.row_offsets.itemsize * len(self.row_offsets)
+            + self.value_offsets.itemsize * len(self.value_offsets)
+            + len(self.data)
+        )
+
+
+class RecordBatch:
+    """Lote colunar de personagens, só de inserção.
+
+    As colunas são criadas na ordem em que os campos aparecem; linhas sem um
+    campo ficam com a célula vazia.
+    """
+
+    def __init__(self):
+        """Cria um lote vazio."""
+        self.columns = {}
+        self._length = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "RecordBatch":
+        """Cria um lote a partir de registros (CharacterRecord ou dicionários)."""
+        batch = cls()
+        batch.extend(records)
+        return batch
+
+    def __len__(self) -> int:
+        """Número de personagens no lote."""
+        return self._length
+
+    @property
+    def column_names(self) -> list[str]:
+        """Nomes das colunas, na ordem em que apareceram."""
+        return list(self.columns)
+
+    def append(self, record) -> None:
+        """Acrescenta um personagem ao lote.
+
+        Args:
+            record: CharacterRecord ou dicionário com os campos do personagem
+        """
+        for name, value in record.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[sys.intern(name)] = StringColumn()
+            column.pad(self._length)
+            column.append(value)
+
+        self._length += 1
+
+    def extend(self, records: Iterable) -> None:
+        """Acrescenta vários personagens ao lote."""
+        for record in records:
+            self.append(record)
+
+    def column(self, name: str) -> list[Value | None]:
+        """Lê uma coluna inteira (None onde o personagem não tem o campo)."""
+        column = self.columns.get(name)
+        if column is None:
+            return [None] * self._length
+        return [column.get(row) for row in range(self._length)]
+
+    def row(self, index: int) -> dict[str, Value]:
+        """Lê um personagem como dicionário plano, só com os campos preenchidos."""
+        row = {}
+        for name, column in self.columns.items():
+            value = column.get(index)
+            if value is not None:
+                row[name] = value
+        return row
+
+    def rows(self) -> Iterator[dict[str, Value]]:
+        """Percorre os personagens como dicionários, um de cada vez."""
+        for index in range(self._length):
+            yield self.row(index)
+
+    def records(self) -> Iterator[CharacterRecord]:
+        """Percorre os personagens como CharacterRecord."""
+        for row in self.rows():
+            nome = row.pop("Nome")
+            url = row.pop("url")
+            site = row.pop("site", "")
+            yield CharacterRecord(nome, url, row, site)
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelos buffers de todas as colunas, em bytes."""
+        return sum(column.nbytes() for column in self.columns.values())
@@ -0,0 +1,267 @@
+"""Índice de busca textual e aproximada sobre os personagens extraídos.
+
+O índice é montado a partir dos registros limpos e salvo em JSON ao lado do
+banco DuckDB. Ele contém:
+
+- um índice invertido de tokens sem acentos e em minúsculas (nome e atributos)
+- um índice de trigramas do vocabulário, para achar nomes com erros de digitação
+- um índice de pares atributo=valor, para filtros exatos
+"""
+
+import heapq
+import json
+import math
+import re
+from collections.abc import Iterable
+from pathlib import Path
+
+from .storage import RESERVED_FIELDS
+from .text import remove_accents
+
+# Peso de um token que aparece no nome (os demais valem 1)
+NAME_WEIGHT = 2
+
+# Similaridade mínima entre trigramas para um token valer como correspondência
+MIN_SIMILARITY = 0.3
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Normaliza texto para comparação: sem acentos e em minúsculas."""
+    return remove_accents(text).lower().strip()
+
+
+def tokenize(text: str) -> list[str]:
+    """Divide um texto em tokens normalizados."""
+    return TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(token: str) -> set[str]:
+    """Calcula os trigramas de um token, com bordas marcadas por espaços."""
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def index_path(db_name: str) -> Path:
+    """Caminho do índice salvo ao lado de um banco DuckDB.
+
+    Args:
+        db_name: Caminho do banco DuckDB
+
+    Returns:
+        Caminho do arquivo ``.search.json`` correspondente
+    """
+    return Path(db_name).with_suffix(".search.json")
+
+
+def values_of(value) -> list[str]:
+    """Lista os valores de um campo, que pode ser texto ou lista de textos."""
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    if value is None:
+        return []
+    return [str(value)]
+
+
+class SearchIndex:
+    """Índice invertido com busca aproximada e filtros por atributo."""
+
+    def __init__(self):
+        """Cria um índice vazio."""
+        self.documents = []
+        self.postings = {}
+        self.trigram_index = {}
+        self.attribute_index = {}
+
+    @classmethod
+    def build(cls, records: Iterable[dict]) -> "SearchIndex":
+        """Monta o índice a partir dos registros de personagens.
+
+        Args:
+            records: Registros limpos de personagens (lista ou gerador)
+
+        Returns:
+            Índice pronto para consulta
+        """
+        index = cls()
+
+        for doc_id, record in enumerate(records):
+            index.documents.append(record)
+
+            for token in tokenize(record.get("Nome", "")):
+                index.add_posting(token, doc_id, NAME_WEIGHT)
+
+            for attribute, value in record.items():
+                if attribute in RESERVED_FIELDS:
+                    continue
+
+                for item in values_of(value):
+                    key = f"{normalize(attribute)}={normalize(item)}"
+                    ids = index.attribute_index.setdefault(key, [])
+                    if not ids or ids[-1] != doc_id:
+                        ids.append(doc_id)
+
+                    for token in tokenize(item):
+                        index.add_posting(token, doc_id, 1)
+
+        for token in index.postings:
+            for trigram in trigrams(token):
+                index.trigram_index.setdefault(trigram, []).append(token)
+
+        return index
+
+    def add_posting(self, token: str, doc_id: int, weight: int) -> None:
+        """Registra um token em um documento, mantendo o maior peso."""
+        docs = self.postings.setdefault(token, {})
+        docs[doc_id] = max(weight, docs.get(doc_id, 0))
+
+    def similar_tokens(self, token: str, fuzzy: bool = True) -> dict[str, float]:
+        """Encontra os tokens do vocabulário que correspondem a um token da consulta.
+
+        Args:
+            token: Token normalizado da consulta
+            fuzzy: Se True, aceita tokens parecidos quando não há correspondência exata
+
+        Returns:
+            Dicionário token -> similaridade (1.0 para correspondência exata)
+        """
+        if token in self.postings:
+            return {token: 1.0}
+
+        if not fuzzy:
+            return {}
+
+        query_trigrams = trigrams(token)
+        min_shared = math.ceil(MIN_SIMILARITY * len(query_trigrams))
+
+        # Filtro de prefixo: um candidato com ao menos min_shared trigramas em
+        # comum precisa ter algum dos trigramas mais raros da consulta, então só
+        # as listas curtas do índice são percorridas.
+        rarest = sorted(query_trigrams, key=lambda t: len(self.trigram_index.get(t, ())))
+        candidates = set()
+        for trigram in rarest[: len(query_trigrams) - min_shared + 1]:
+            candidates.update(self.trigram_index.get(trigram, ()))
+
+        matches = {}
+        for candidate in candidates:
+            candidate_trigrams = trigrams(candidate)
+            shared = len(query_trigrams & candidate_trigrams)
+            similarity = shared / (len(query_trigrams) + len(candidate_trigrams) - shared)
+            if similarity >= MIN_SIMILARITY:
+                matches[candidate] = similarity
+
+        return matches
+
+    def filter_ids(self, filters: dict[str, str]) -> set[int] | None:
+        """Calcula os documentos que atendem a todos os filtros de atributo.
+
+        Args:
+            filters: Pares atributo -> valor, comparados sem acentos nem caixa
+
+        Returns:
+            Conjunto de ids, ou None se não houver filtros
+        """
+        result = None
+        for attribute, value in filters.items():
+            ids = set(self.attribute_index.get(f"{normalize(attribute)}={normalize(value)}", ()))
+            result = ids if result is None else result & ids
+
+        return result
+
+    def search(
+        self,
+        query: str = "",
+        filters: dict[str, str] | None = None,
+        limit: int = 10,
+        fuzzy: bool = True,
+    ) -> list[dict]:
+        """Busca personagens por texto e/ou atributos.
+
+        Todos os tokens da consulta precisam corresponder (de forma exata ou
+        aproximada) a algum token do personagem.
+
+        Args:
+            query: Texto livre, por exemplo "harry poter"
+            filters: Pares atributo -> valor, por exemplo {"Casa": "Grifinoria"}
+            limit: Número máximo de resultados
+            fuzzy: Se True, tolera erros de digitação
+
+        Returns:
+            Registros encontrados, do mais ao menos relevante
+        """
+        candidates = self.filter_ids(filters or {})
+        scores = None
+
+        for token in tokenize(query):
+            token_scores = {}
+            for match, similarity in self.similar_tokens(token, fuzzy).items():
+                for doc_id, weight in self.postings[match].items():
+                    score = similarity * weight
+                    if score > token_scores.get(doc_id, 0):
+                        token_scores[doc_id] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in token_scores
+                }
+
+        if scores is None:
+            # Sem texto: apenas os filtros, na ordem original
+            if candidates is None:
+                ids = range(min(limit, len(self.documents)))
+            else:
+                ids = heapq.nsmallest(limit, candidates)
+            return [self.documents[doc_id] for doc_id in ids]
+
+        if candidates is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in candidates}
+
+        ranked = heapq.nsmallest(limit, scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return [self.documents[doc_id] for doc_id in ranked]
+
+    def save(self, path: str | Path) -> None:
+        """Salva o índice em JSON.
+
+        Args:
+            path: Caminho do arquivo
+        """
+        data = {
+            "documents": self.documents,
+            "postings": {
+                token: [[doc_id, weight] for doc_id, weight in docs.items()]
+                for token, docs in self.postings.items()
+            },
+            "trigram_index": self.trigram_index,
+            "attribute_index": self.attribute_index,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SearchIndex":
+        """Carrega um índice salvo com save().
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            Índice pronto para consulta
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls()
+        index.documents = data["documents"]
+        index.postings = {
+            token: {doc_id: weight for doc_id, weight in docs}
+            for token, docs in data["postings"].items()
+        }
+        index.trigram_index = data["trigram_index"]
+        index.attribute_index = data["attribute_index"]
+
+        return index
@@ -0,0 +1,521 @@
+"""Serviço HTTP somente leitura sobre os dados da última execução.
+
+O banco gerado por save_data_to_duckdb é copiado para um DuckDB em memória
+(o arquivo fica livre para a próxima execução do scraper gravar). As consultas
+usam um pool de cursores dessa cópia, executados fora do loop de eventos. Os
+registros completos e um índice de filtros ficam em cache em memória, então
+buscas por chave e por atributo não passam pelo DuckDB. Quando o arquivo muda, uma
+nova cópia é carregada e trocada de uma só vez.
+
+Rotas:
+
+- ``GET /health``
+- ``GET /characters?page=1&per_page=50&q=harry&book=3&Casa=Grifinoria``
+- ``GET /characters/{slug}`` (último trecho da URL, ex.: ``Harry_Potter``)
+- ``GET /stats/houses``, ``/stats/species`` e ``/stats/books``
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import queue
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote
+
+import duckdb
+from aiohttp import web
+from loguru import logger
+
+from .search import normalize
+from .storage import MAX_BOOKS, SCHEMA
+
+# Tabelas copiadas do arquivo para a memória
+TABLES = (
+    "characters",
+    "character_attributes",
+    "books",
+    "character_books",
+    "house_counts",
+    "species_counts",
+    "book_counts",
+)
+
+STATS_TABLES = {"houses": "house_counts", "species": "species_counts", "books": "book_counts"}
+
+# Parâmetros da listagem que não são filtros de atributo
+LIST_PARAMS = {"page", "per_page", "q", "book"}
+
+MAX_PER_PAGE = 500
+
+
+def slug_of(url: str) -> str:
+    """Último trecho da URL de um personagem, sem codificação."""
+    return unquote(url.rstrip("/").rsplit("/", 1)[-1])
+
+
+def file_version(path: Path) -> str | None:
+    """Identifica a versão do arquivo pelo tamanho e data de modificação."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Verifica se um cabeçalho If-None-Match aceita a ETag da resposta.
+
+    O cabeçalho é ``*`` ou uma lista de ETags separadas por vírgula. A
+    comparação é fraca (RFC 9110): o prefixo ``W/`` é ignorado dos dois lados.
+
+    Args:
+        header: Valor do cabeçalho If-None-Match
+        etag: ETag da resposta, entre aspas
+
+    Returns:
+        True se alguma ETag do cabeçalho for igual à da resposta
+    """
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags:
+        return True
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+class Snapshot:
+    """Cópia em memória de uma versão do banco, com pool de cursores e cache."""
+
+    def __init__(self, db_path: Path, pool_size: int = 4):
+        """Copia as tabelas do arquivo e monta o cache de registros.
+
+        Args:
+            db_path: Banco DuckDB gerado pelo scraper
+            pool_size: Número de cursores para consultas simultâneas
+        """
+        self.version = file_version(db_path)
+        self.con = duckdb.connect()
+
+        path = str(db_path).replace("'", "''")
+        self.con.execute(f"ATTACH '{path}' AS source (READ_ONLY)")
+        try:
+            for table in TABLES:
+                self.con.execute(f"CREATE TABLE {table} AS SELECT * FROM source.{SCHEMA}.{table}")
+        finally:
+            self.con.execute("DETACH source")
+
+        # Colunas normalizadas para filtros sem acentos nem caixa
+        self.con.execute(
+            "ALTER TABLE character_attributes ADD COLUMN attribute_key VARCHAR;"
+            "ALTER TABLE character_attributes ADD COLUMN value_key VARCHAR;"
+            "UPDATE character_attributes SET "
+            "attribute_key = lower(strip_accents(trim(attribute))), "
+            "value_key = lower(strip_accents(trim(value)));"
+            "CREATE INDEX attribute_key_idx ON character_attributes (attribute_key, value_key);"
+        )
+
+        self.records = self.load_records()
+        self.slugs = {slug_of(url): url for url in self.records}
+        self.order, self.filter_index = self.load_filter_index()
+
+        self.pool = queue.Queue()
+        for _ in range(pool_size):
+            self.pool.put(self.con.cursor())
+
+        self.users = 0
+        self.retired = False
+
+    def load_records(self) -> dict[str, dict]:
+        """Monta o registro completo de cada personagem, indexado pela URL."""
+        records = {}
+        for url, nome in self.con.execute("SELECT url, nome FROM characters").fetchall():
+            records[url] = {"Nome": nome, "url": url, "attributes": {}, "books": []}
+
+        attributes = self.con.execute(
+            "SELECT url, attribute, value FROM character_attributes ORDER BY url, position"
+        ).fetchall()
+        for url, attribute, value in attributes:
+            records[url]["attributes"].setdefault(attribute, []).append(value)
+
+        books = self.con.execute(
+            "SELECT url, book_id FROM character_books ORDER BY url, book_id"
+        ).fetchall()
+        for url, book_id in books:
+            records[url]["books"].append(book_id)
+
+        return records
+
+    def load_filter_index(self) -> tuple[list[str], dict[str, list[int]]]:
+        """Monta o índice em memória usado pelas listagens sem busca por nome.
+
+        Returns:
+            Personagens na ordem da listagem (nome, url) e, para cada filtro
+            (``atributo=valor`` normalizados ou ``book=<id>``), as posições dos
+            personagens que o atendem, em ordem crescente
+        """
+        order = [
+            url
+            for (url,) in self.con.execute(
+                "SELECT url FROM characters ORDER BY nome, url"
+            ).fetchall()
+        ]
+
+        rows = self.con.execute(
+            "SELECT DISTINCT attribute_key || '=' || value_key AS key, o.position "
+            "FROM character_attributes "
+            "JOIN (SELECT url, row_number() OVER (ORDER BY nome, url) - 1 AS position "
+            "      FROM characters) o USING (url) "
+            "UNION ALL "
+            "SELECT DISTINCT 'book=' || book_id, o.position FROM character_books "
+            "JOIN (SELECT url, row_number() OVER (ORDER BY nome, url) - 1 AS position "
+            "      FROM characters) o USING (url) "
+            "ORDER BY 2"
+        ).fetchall()
+
+        filter_index = {}
+        for key, position in rows:
+            filter_index.setdefault(key, []).append(position)
+
+        return order, filter_index
+
+    def query(self, sql: str, params: list | None = None) -> list[tuple]:
+        """Executa uma consulta com um cursor do pool (bloqueante)."""
+        cursor = self.pool.get()
+        try:
+            return cursor.execute(sql, params or []).fetchall()
+        finally:
+            self.pool.put(cursor)
+
+    def list_characters(
+        self, page: int, per_page: int, text: str, book: int | None, filters: dict[str, str]
+    ) -> dict:
+        """Lista personagens filtrados, uma página por vez (bloqueante).
+
+        Filtros por atributo e livro usam o índice em memória; a busca por
+        trecho do nome é feita no DuckDB.
+
+        Args:
+            page: Página, a partir de 1
+            per_page: Itens por página
+            text: Trecho do nome (vazio para não filtrar)
+            book: Id do livro em que o personagem aparece (None para não filtrar)
+            filters: Pares atributo -> valor, comparados sem acentos nem caixa
+
+        Returns:
+            Página com o total de resultados e os registros
+        """
+        if not text:
+            return self.list_from_index(page, per_page, book, filters)
+
+        conditions = ["lower(strip_accents(nome)) LIKE ?"]
+        params = [f"%{normalize(text)}%"]
+
+        if book is not None:
+            conditions.append("book_mask & (1::UBIGINT << (? - 1)) <> 0")
+            params.append(book)
+
+        for attribute, value in filters.items():
+            conditions.append(
+                "url IN (SELECT url FROM character_attributes "
+                "WHERE attribute_key = ? AND value_key = ?)"
+            )
+            params.extend([normalize(attribute), normalize(value)])
+
+        where = f"WHERE {' AND '.join(conditions)}"
+        rows = self.query(
+            f"SELECT url, count(*) OVER () FROM characters {where} "
+            "ORDER BY nome, url LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page],
+        )
+
+        total = rows[0][1] if rows else 0
+        if not rows and page > 1:
+            total = self.query(f"SELECT count(*) FROM characters {where}", params)[0][0]
+
+        return {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "items": [self.records[url] for url, _ in rows],
+        }
+
+    def list_from_index(
+        self, page: int, per_page: int, book: int | None, filters: dict[str, str]
+    ) -> dict:
+        """Lista personagens usando apenas o índice em memória.
+
+        Args:
+            page: Página, a partir de 1
+            per_page: Itens por página
+            book: Id do livro em que o personagem aparece (None para não filtrar)
+            filters: Pares atributo -> valor, comparados sem acentos nem caixa
+
+        Returns:
+            Página com o total de resultados e os registros
+        """
+        keys = []
+        for attribute, value in filters.items():
+            keys.append(f"{normalize(attribute)}={normalize(value)}")
+        if book is not None:
+            keys.append(f"book={book}")
+
+        if not keys:
+            positions = range(len(self.order))
+        else:
+            lists = sorted((self.filter_index.get(key, []) for key in keys), key=len)
+            positions = lists[0]
+            if len(lists) > 1:
+                positions = sorted(set(positions).intersection(*lists[1:]))
+
+        start = (page - 1) * per_page
+        return {
+            "page": page,
+            "per_page": per_page,
+            "total": len(positions),
+            "items": [self.records[self.order[i]] for i in positions[start : start + per_page]],
+        }
+
+    def stats(self, table: str) -> list[dict]:
+        """Lê uma das tabelas de contagem (bloqueante)."""
+        cursor = self.pool.get()
+        try:
+            result = cursor.execute(f"SELECT * FROM {table}")
+            columns = [column[0] for column in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+        finally:
+            self.pool.put(cursor)
+
+    def acquire(self) -> None:
+        """Registra uma consulta em andamento (chamado no loop de eventos)."""
+        self.users += 1
+
+    def release(self) -> None:
+        """Encerra uma consulta; fecha a cópia aposentada quando for a última."""
+        self.users -= 1
+        if self.retired and self.users == 0:
+            self.close()
+
+    def retire(self) -> None:
+        """Marca a cópia como substituída: fecha agora ou ao fim da última consulta."""
+        self.retired = True
+        if self.users == 0:
+            self.close()
+
+    def close(self) -> None:
+        """Fecha a conexão em memória."""
+        self.con.close()
+
+
+class CharacterService:
+    """Aplicação aiohttp que serve os dados de um Snapshot."""
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 4,
+        reload_interval: float = 5.0,
+        cache_size: int = 1024,
+    ):
+        """Configura o serviço.
+
+        Args:
+            db_path: Banco DuckDB gerado pelo scraper
+            pool_size: Número de cursores para consultas simultâneas
+            reload_interval: Intervalo, em segundos, entre verificações do arquivo
+            cache_size: Número de respostas mantidas em cache
+        """
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self.reload_interval = reload_interval
+        self.cache_size = cache_size
+        self.snapshot = None
+        self.responses = OrderedDict()
+        self._reloader = None
+
+    def app(self) -> web.Application:
+        """Cria a aplicação aiohttp com as rotas do serviço."""
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/characters", self.list_characters)
+        app.router.add_get("/characters/{slug}", self.get_character)
+        app.router.add_get("/stats/{name}", self.get_stats)
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+    async def start(self, app: web.Application) -> None:
+        """Carrega a primeira cópia do banco e inicia a recarga automática."""
+        await self.reload()
+        if self.snapshot is None:
+            raise RuntimeError(f"Could not load {self.db_path}")
+
+        if self.reload_interval > 0:
+            self._reloader = asyncio.create_task(self.watch())
+
+    async def stop(self, app: web.Application) -> None:
+        """Interrompe a recarga automática e fecha a cópia atual."""
+        if self._reloader is not None:
+            self._reloader.cancel()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    async def reload(self) -> bool:
+        """Carrega uma nova cópia se o arquivo mudou.
+
+        Se o scraper ainda estiver gravando o arquivo, mantém a cópia atual e
+        tenta de novo na próxima verificação.
+
+        Returns:
+            True se uma nova cópia foi carregada
+        """
+        version = file_version(self.db_path)
+        if version is None or (self.snapshot and self.snapshot.version == version):
+            return False
+
+        try:
+            snapshot = await asyncio.to_thread(Snapshot, self.db_path, self.pool_size)
+        except duckdb.Error as e:
+            logger.warning(f"Não foi possível recarregar {self.db_path}: {e}")
+            return False
+
+        # A cópia anterior é fechada quando as consultas em andamento terminarem
+        previous, self.snapshot = self.snapshot, snapshot
+        self.responses.clear()
+        if previous is not None:
+            previous.retire()
+
+        logger.info(f"Carregados {len(snapshot.records)} personagens de {self.db_path}")
+        return True
+
+    async def watch(self) -> None:
+        """Verifica periodicamente se uma nova execução gravou o banco."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.reload()
+
+    async def cached(self, request: web.Request, compute) -> web.Response:
+        """Responde a partir do cache de respostas, calculando se necessário.
+
+        As respostas ficam serializadas com sua ETag e o cache é esvaziado a cada
+        recarga do banco. Se o cliente já tem a versão atual, responde 304.
+
+        Args:
+            request: Requisição HTTP
+            compute: Função assíncrona que recebe o Snapshot e devolve o conteúdo
+
+        Returns:
+            Resposta JSON com ETag
+        """
+        key = request.path_qs
+        cached = self.responses.get(key)
+
+        if cached is None:
+            snapshot = self.snapshot
+            snapshot.acquire()
+            try:
+                payload = await compute(snapshot)
+            finally:
+                snapshot.release()
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            cached = (f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body)
+
+            if snapshot is self.snapshot:
+                self.responses[key] = cached
+                if len(self.responses) > self.cache_size:
+                    self.responses.popitem(last=False)
+        else:
+            self.responses.move_to_end(key)
+
+        etag, body = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("If-None-Match", ""), etag):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    async def health(self, request: web.Request) -> web.Response:
+        """GET /health: versão carregada e número de personagens."""
+        return web.json_response(
+            {
+                "status": "ok",
+                "version": self.snapshot.version,
+                "characters": len(self.snapshot.records),
+            }
+        )
+
+    async def get_character(self, request: web.Request) -> web.Response:
+        """GET /characters/{slug}: registro completo, direto do cache."""
+        url = self.snapshot.slugs.get(request.match_info["slug"])
+        if url is None:
+            return web.json_response({"error": "character not found"}, status=404)
+
+        async def compute(snapshot: Snapshot) -> dict:
+            return snapshot.records[url]
+
+        return await self.cached(request, compute)
+
+    async def list_characters(self, request: web.Request) -> web.Response:
+        """GET /characters: listagem paginada com filtros."""
+        query = request.query
+        try:
+            page = max(1, int(query.get("page", 1)))
+            per_page = min(MAX_PER_PAGE, max(1, int(query.get("per_page", 50))))
+            book = int(query["book"]) if "book" in query else None
+        except ValueError:
+            return web.json_response(
+                {"error": "page, per_page and book must be integers"}, status=400
+            )
+        if book is not None and not 1 <= book <= MAX_BOOKS:
+            return web.json_response(
+                {"error": f"book must be between 1 and {MAX_BOOKS}"}, status=400
+            )
+
+        filters = {key: value for key, value in query.items() if key not in LIST_PARAMS}
+
+        async def compute(snapshot: Snapshot) -> dict:
+            return await asyncio.to_thread(
+                snapshot.list_characters, page, per_page, query.get("q", ""), book, filters
+            )
+
+        return await self.cached(request, compute)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        """GET /stats/{houses,species,books}: contagens pré-calculadas."""
+        table = STATS_TABLES.get(request.match_info["name"])
+        if table is None:
+            return web.json_response({"error": "unknown stats"}, status=404)
+
+        async def compute(snapshot: Snapshot) -> list[dict]:
+            return await asyncio.to_thread(snapshot.stats, table)
+
+        return await self.cached(request, compute)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Inicia o serviço HTTP."""
+    parser = argparse.ArgumentParser(
+        description="Read-only HTTP service over the scraped Harry Potter characters"
+    )
+    parser.add_argument(
+        "--db",
+        default="personagens_harry_potter.duckdb",
+        help="DuckDB file written by the scraper",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port (default: 8080)")
+    parser.add_argument(
+        "--pool-size", type=int, default=4, help="DuckDB cursors for queries (default: 4)"
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between checks for a new scrape, 0 disables (default: 5)",
+    )
+    args = parser.parse_args(argv)
+
+    service = CharacterService(args.db, args.pool_size, args.reload_interval)
+    web.run_app(service.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Agrupamento de requisições simultâneas para a mesma URL (single-flight).
+
+Quando várias tarefas pedem a mesma página ao mesmo tempo (um personagem citado
+em vários livros, por exemplo), todas encontram o cache vazio. Com o
+single-flight, só a primeira faz a requisição; as outras esperam pelo mesmo
+resultado (ou pela mesma exceção). Terminada a requisição, a chave é liberada:
+o que fica guardado depois disso é papel do cache.
+
+- AsyncSingleFlight: para corrotinas em um loop de eventos
+- canonical_url: chave comum para grafias diferentes da mesma URL
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+T = TypeVar("T")
+
+# Caracteres mantidos como estão ao recodificar o caminho de uma URL
+_SAFE_PATH = "/:@!$&'()*+,;=-._~"
+
+
+def canonical_url(url: str) -> str:
+    """Normaliza uma URL para comparar grafias diferentes da mesma página.
+
+    Esquema e host em minúsculas, sem fragmento (``#seção``) e com o caminho
+    recodificado, de modo que ``C%C3%A2mara``, ``C%c3%a2mara`` e ``Câmara``
+    resultam na mesma chave.
+
+    Args:
+        url: URL como aparece no link
+
+    Returns:
+        URL canônica
+    """
+    parts = urlsplit(url)
+    path = quote(unquote(parts.path), safe=_SAFE_PATH)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+class AsyncSingleFlight:
+    """Compartilha uma corrotina em andamento entre quem pede a mesma chave."""
+
+    def __init__(self):
+        """Cria o grupo sem chamadas em andamento."""
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Executa ``fn`` uma única vez por chave entre as chamadas simultâneas.
+
+        A chamada roda em uma tarefa própria: se quem a iniciou for cancelado,
+        as outras que esperam pela mesma chave não são afetadas.
+
+        Args:
+            key: Chave da chamada (por exemplo, a URL canônica)
+            fn: Função que cria a corrotina, chamada só pela primeira chamada
+
+        Returns:
+            Resultado de ``fn``, o mesmo objeto para todas as chamadas
+
+        Raises:
+            Exception: A exceção de ``fn``, repassada a todas as chamadas
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Libera a chave de uma chamada terminada."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # evita o aviso de exceção não lida se ninguém esperava
+
+    def __len__(self) -> int:
+        """Número de chamadas em andamento."""
+        return len(self._calls)
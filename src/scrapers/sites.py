@@ -0,0 +1,173 @@
+"""Perfis dos wikis que podem ser coletados.
+
+Cada perfil reúne o que antes era fixo no scraper: a URL base, o caminho das
+páginas do wiki, as páginas de partida (os livros), os rótulos usados para
+reconhecer uma página de personagem e o mapa de campos. O mapa traduz os
+rótulos do infobox de cada idioma para os nomes de atributo do wiki em
+português, de modo que os personagens de todos os sites fiquem com os mesmos
+atributos no banco e possam ser comparados entre idiomas.
+
+Vários perfis podem ser coletados na mesma execução: eles compartilham o
+scraper (sessão, cache e limitador de requisições), e cada registro guarda o
+nome do seu site.
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from urllib.parse import quote
+
+
+@dataclass(frozen=True)
+class SiteProfile:
+    """Configuração de um wiki do fandom (um idioma de um wiki)."""
+
+    name: str
+    base_url: str
+    wiki_path: str
+    seeds: tuple[str, ...]
+    birth_label: str
+    bio_header: str
+    field_map: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def prefix(self) -> str:
+        """Início das URLs das páginas deste site."""
+        return self.base_url + self.wiki_path
+
+    def owns(self, url: str) -> bool:
+        """Verifica se uma URL é uma página deste site."""
+        return url.startswith(self.prefix)
+
+    def absolute(self, href: str) -> str:
+        """Converte um link relativo (``/pt-br/wiki/...``) em URL completa."""
+        return self.base_url + href
+
+    def link_target(self, href: str | None) -> str | None:
+        """URL de destino de um link do infobox, se for uma página deste site.
+
+        Links relativos viram URLs completas e o fragmento (``#seção``) é
+        descartado. Links externos, de outros sites, para seções da própria
+        página ou para páginas que não existem (``?action=edit&redlink=1``)
+        retornam None.
+        """
+        if not href:
+            return None
+        url = self.absolute(href) if href.startswith("/") else href
+        url = url.partition("#")[0]
+        if "?" in url or url == self.prefix or not self.owns(url):
+            return None
+        return url
+
+    @property
+    def api_url(self) -> str:
+        """Endereço do api.php do MediaWiki (``/pt-br/wiki/`` -> ``/pt-br/api.php``)."""
+        return self.base_url + self.wiki_path.removesuffix("wiki/") + "api.php"
+
+    def page_url(self, title: str) -> str:
+        """URL da página com um título (``Harry Potter`` -> ``.../wiki/Harry_Potter``)."""
+        return self.prefix + quote(title.replace(" ", "_"), safe="/:@!$&'()*+,;=-._~")
+
+
+PT_BR = SiteProfile(
+    name="pt-br",
+    base_url="https://harrypotter.fandom.com",
+    wiki_path="/pt-br/wiki/",
+    seeds=(
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Pedra_Filosofal",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_C%C3%A2mara_Secreta",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_Prisioneiro_de_Azkaban",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_C%C3%A1lice_de_Fogo",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Ordem_da_F%C3%AAnix",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_o_Enigma_do_Pr%C3%ADncipe",
+        "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_as_Rel%C3%ADquias_da_Morte",
+    ),
+    birth_label="Nascimento",
+    bio_header="Informações biográficas",
+)
+
+EN = SiteProfile(
+    name="en",
+    base_url="https://harrypotter.fandom.com",
+    wiki_path="/wiki/",
+    seeds=(
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Philosopher%27s_Stone",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Chamber_of_Secrets",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Prisoner_of_Azkaban",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Goblet_of_Fire",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Order_of_the_Phoenix",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Half-Blood_Prince",
+        "https://harrypotter.fandom.com/wiki/Harry_Potter_and_the_Deathly_Hallows",
+    ),
+    birth_label="Born",
+    bio_header="Biographical information",
+    field_map={
+        "Born": "Nascimento",
+        "Died": "Morte",
+        "Species": "Especie",
+        "Gender": "Genero",
+        "Height": "Altura",
+        "Eye colour": "Cor dos olhos",
+        "Hair colour": "Cor do cabelo",
+        "Skin colour": "Cor da pele",
+        "Family members": "Familia",
+        "House": "Casa",
+        "Wand": "Varinha",
+        "Patronus": "Patrono",
+        "Occupation": "Ocupacao",
+        "Loyalty": "Lealdade",
+        "Title(s)": "Titulo",
+        "Also known as": "Apelidos",
+        "Blood status": "Status sanguineo",
+        "Marital status": "Estado civil",
+        "Boggart": "Bicho-papao",
+    },
+)
+
+# Perfis conhecidos, pelo nome usado na linha de comando
+SITES = {site.name: site for site in (PT_BR, EN)}
+DEFAULT_SITES = (PT_BR.name,)
+
+
+def resolve(sites: Iterable[str | SiteProfile]) -> list[SiteProfile]:
+    """Converte nomes de sites em perfis, mantendo a ordem e sem repetições.
+
+    Args:
+        sites: Nomes de SITES ou perfis prontos
+
+    Returns:
+        Lista de perfis
+
+    Raises:
+        ValueError: Se um nome não estiver em SITES ou a lista estiver vazia
+    """
+    profiles = []
+    for site in sites:
+        if isinstance(site, str):
+            if site not in SITES:
+                raise ValueError(f"Site desconhecido {site!r}; opções: {', '.join(SITES)}")
+            site = SITES[site]
+        if site not in profiles:
+            profiles.append(site)
+
+    if not profiles:
+        raise ValueError("Informe ao menos um site")
+    return profiles
+
+
+def site_for(url: str, sites: Iterable[SiteProfile] = SITES.values()) -> SiteProfile | None:
+    """Encontra o site de uma URL.
+
+    Quando mais de um site reconhece a URL, vale o de prefixo mais longo.
+
+    Args:
+        url: URL de uma página
+        sites: Perfis candidatos (padrão: todos os conhecidos)
+
+    Returns:
+        Perfil do site, ou None se nenhum reconhecer a URL
+    """
+    best = None
+    for site in sites:
+        if site.owns(url) and (best is None or len(site.prefix) > len(best.prefix)):
+            best = site
+    return best
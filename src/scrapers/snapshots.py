@@ -0,0 +1,283 @@
+"""Histórico das cargas em partições imutáveis, com consultas "como na execução X".
+
+A carga do DuckDB substitui a anterior; o histórico fica à parte, em arquivos
+Parquet no diretório ``<banco>.snapshots``:
+
+- cada execução grava uma partição ``runs-<primeira>-<última>.parquet`` com
+  só o que mudou desde a execução anterior: os personagens novos ou alterados
+  (comparados pelo hash do changelog) e uma marca de remoção para os que
+  saíram. Os personagens iguais não são gravados de novo: a versão de uma
+  execução antiga continua valendo nas seguintes
+- ``runs.jsonl`` registra cada execução (número, data, personagens, mudanças)
+- o estado de uma execução X é, para cada url, a versão mais recente com
+  execução <= X, se não for uma remoção
+- a compactação junta as partições antigas em uma só, com todas as versões
+  (as consultas continuam exatas para qualquer execução), em uma thread, sem
+  bloquear a coleta
+
+Uma partição nunca é alterada depois de gravada: é escrita em um arquivo
+temporário e renomeada. A compactação grava a partição nova antes de apagar as
+antigas, e as consultas toleram a mesma versão repetida nesse intervalo. Apagar
+as antigas, porém, quebraria uma consulta que já as listou: as consultas de um
+SnapshotStore (``write_run``, ``as_of``) listam e leem as partições sob um lock,
+e a compactação só apaga os arquivos com esse lock, depois que elas terminam.
+O lock vale dentro de um processo; outro processo lendo o mesmo histórico
+durante uma compactação pode encontrar uma partição já apagada.
+"""
+
+import json
+import os
+import re
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+
+from .changelog import record_hash
+
+MANIFEST = "runs.jsonl"
+
+# Partições a partir das quais compact_in_background() junta as antigas
+COMPACT_AFTER = 8
+
+PARTITION_NAME = re.compile(r"runs-(\d+)-(\d+)\.parquet")
+
+PARTITION_COLUMNS = """
+    run_id INTEGER NOT NULL,
+    url VARCHAR NOT NULL,
+    record_hash VARCHAR,
+    deleted BOOLEAN NOT NULL,
+    record VARCHAR
+"""
+
+
+def snapshots_path(db_name: str) -> Path:
+    """Diretório do histórico de cargas, ao lado do banco DuckDB.
+
+    Args:
+        db_name: Caminho do banco DuckDB
+
+    Returns:
+        Caminho do diretório ``.snapshots`` correspondente
+    """
+    return Path(db_name).with_suffix(".snapshots")
+
+
+@dataclass(frozen=True)
+class Partition:
+    """Arquivo com as versões gravadas por um intervalo de execuções."""
+
+    first: int
+    last: int
+    path: Path
+
+
+class SnapshotStore:
+    """Histórico versionado dos personagens, uma partição por execução."""
+
+    def __init__(self, directory: str | Path):
+        """Abre (ou cria) o histórico.
+
+        Args:
+            directory: Diretório das partições
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._compacting = threading.Lock()
+        # Listagem e leitura das partições contra a remoção pela compactação
+        self._reading = threading.Lock()
+
+    def partitions(self) -> list[Partition]:
+        """Partições gravadas, em ordem de execução."""
+        partitions = []
+        for path in self.directory.iterdir():
+            match = PARTITION_NAME.fullmatch(path.name)
+            if match:
+                partitions.append(Partition(int(match[1]), int(match[2]), path))
+        return sorted(partitions, key=lambda partition: (partition.first, -partition.last))
+
+    def runs(self) -> list[dict]:
+        """Execuções registradas, da mais antiga para a mais recente."""
+        path = self.directory / MANIFEST
+        if not path.exists():
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def latest_run(self) -> int | None:
+        """Número da última execução gravada (None se o histórico estiver vazio)."""
+        last = [partition.last for partition in self.partitions()]
+        last += [run["run_id"] for run in self.runs()]
+        return max(last, default=None)
+
+    def _source(self, partitions: list[Partition] | None = None) -> str | None:
+        """Expressão SQL que lê as partições (None se não houver nenhuma)."""
+        partitions = self.partitions() if partitions is None else partitions
+        if not partitions:
+            return None
+        paths = ", ".join("'" + str(p.path).replace("'", "''") + "'" for p in partitions)
+        return f"read_parquet([{paths}])"
+
+    def _current(self, con: duckdb.DuckDBPyConnection, run_id: int, columns: str) -> list[tuple]:
+        """Versão vigente de cada personagem em uma execução, sem os removidos.
+
+        As partições são listadas e lidas sob o lock de leitura, para que a
+        compactação não apague uma delas no meio da consulta.
+        """
+        with self._reading:
+            source = self._source()
+            if source is None:
+                return []
+            return con.execute(
+                f"""
+                SELECT {columns} FROM (
+                    SELECT *, row_number() OVER (PARTITION BY url ORDER BY run_id DESC) AS version
+                    FROM {source}
+                    WHERE run_id <= ?
+                )
+                WHERE version = 1 AND NOT deleted
+                ORDER BY url
+                """,
+                [run_id],
+            ).fetchall()
+
+    def write_run(self, records: Iterable, partial: bool = False) -> int:
+        """Grava uma execução como uma partição nova, só com o que mudou.
+
+        Args:
+            records: Registros da execução (CharacterRecord ou dicionários)
+            partial: Se True, os registros são só uma parte dos personagens
+                (atualização do watch): os ausentes não são marcados como removidos
+
+        Returns:
+            Número da execução gravada
+        """
+        previous = self.latest_run()
+        run_id = 1 if previous is None else previous + 1
+
+        current = {}
+        for record in records:
+            current.setdefault(record["url"], (record_hash(record), record))
+
+        with duckdb.connect() as con:
+            before = dict(self._current(con, run_id, "url, record_hash"))
+
+            rows = ([], [], [], [])
+            for url, (digest, record) in current.items():
+                if before.get(url) != digest:
+                    content = json.dumps(dict(record.items()), ensure_ascii=False)
+                    for column, value in zip(rows, (url, digest, False, content)):
+                        column.append(value)
+            if not partial:
+                for url in before.keys() - current.keys():
+                    for column, value in zip(rows, (url, None, True, None)):
+                        column.append(value)
+
+            con.execute(f"CREATE TABLE partition ({PARTITION_COLUMNS})")
+            con.execute(
+                "INSERT INTO partition SELECT ?, unnest(?), unnest(?), unnest(?), unnest(?)",
+                [run_id, *rows],
+            )
+            self._write_partition(con, "SELECT * FROM partition ORDER BY url", run_id, run_id)
+
+        characters = len(current) if not partial else len(before.keys() | current.keys())
+        entry = {
+            "run_id": run_id,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "characters": characters,
+            "changed": len(rows[0]),
+        }
+        with open(self.directory / MANIFEST, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        return run_id
+
+    def _write_partition(
+        self, con: duckdb.DuckDBPyConnection, query: str, first: int, last: int
+    ) -> Partition:
+        """Grava o resultado de uma consulta como partição, de forma atômica."""
+        path = self.directory / f"runs-{first:06d}-{last:06d}.parquet"
+        tmp = path.with_suffix(".parquet.tmp")
+        escaped = str(tmp).replace("'", "''")
+        con.execute(f"COPY ({query}) TO '{escaped}' (FORMAT parquet)")
+        os.replace(tmp, path)
+        return Partition(first, last, path)
+
+    def as_of(self, run_id: int | None = None) -> list[dict]:
+        """Lê os personagens como estavam ao fim de uma execução.
+
+        Args:
+            run_id: Número da execução (padrão: a última)
+
+        Returns:
+            Registros da execução, em ordem de url (os mesmos campos gravados)
+
+        Raises:
+            ValueError: Se a execução não estiver no histórico
+        """
+        latest = self.latest_run()
+        run_id = latest if run_id is None else run_id
+        if latest is None or not 1 <= run_id <= latest:
+            raise ValueError(f"A execução {run_id} não está no histórico {self.directory}")
+
+        with duckdb.connect() as con:
+            return [json.loads(record) for (record,) in self._current(con, run_id, "record")]
+
+    def compact(self, keep: int = 1) -> Partition | None:
+        """Junta as partições antigas em uma só, mantendo todas as versões.
+
+        Pode rodar em paralelo com write_run e as_of: a partição nova é gravada
+        sem bloqueá-los, e as antigas são apagadas depois das leituras em curso.
+
+        Args:
+            keep: Partições mais recentes deixadas de fora (a da execução em
+                andamento pode estar sendo lida)
+
+        Returns:
+            Partição criada, ou None se não houver o que juntar
+        """
+        with self._compacting:
+            partitions = self.partitions()
+            old = partitions[: max(len(partitions) - keep, 0)]
+            if len(old) < 2:
+                return None
+
+            with duckdb.connect() as con:
+                merged = self._write_partition(
+                    con,
+                    f"SELECT DISTINCT * FROM {self._source(old)} ORDER BY url, run_id",
+                    old[0].first,
+                    old[-1].last,
+                )
+
+            # Só apaga as antigas quando nenhuma consulta as estiver lendo
+            with self._reading:
+                for partition in old:
+                    if partition.path != merged.path:
+                        partition.path.unlink(missing_ok=True)
+
+        logger.info(f"Histórico compactado: {len(old)} partições em {merged.path.name}")
+        return merged
+
+    def compact_in_background(self, threshold: int = COMPACT_AFTER) -> threading.Thread | None:
+        """Compacta em uma thread se houver partições demais.
+
+        A thread não é daemon: o processo espera a partição compactada ficar
+        pronta antes de sair.
+
+        Args:
+            threshold: Número de partições a partir do qual compactar
+
+        Returns:
+            Thread iniciada, ou None se não for preciso compactar
+        """
+        if len(self.partitions()) < threshold or self._compacting.locked():
+            return None
+
+        thread = threading.Thread(target=self.compact, name="snapshot-compaction")
+        thread.start()
+        return thread
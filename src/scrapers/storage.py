@@ -0,0 +1,455 @@
+"""Esquema normalizado do DuckDB para consultas analíticas.
+
+Além da tabela ``personagens`` carregada pelo dlt, o banco recebe:
+
+- ``characters``: um personagem por linha, chave ``url``, com o ``site`` de origem
+  e o ``book_mask``, um bit por livro em que aparece (ver books.py)
+- ``character_attributes``: formato longo (personagem, atributo, valor)
+- ``attribute_values``: os mesmos valores sem marcas de nota, na forma canônica
+  e com as datas decompostas (ver values.py)
+- ``books`` e ``character_books``: em quais livros cada personagem aparece
+- ``character_links``: links do infobox para outras páginas (personagem, relação, destino)
+- ``graph_nodes``, ``graph_relations`` e ``graph_edges``: grafo de relações entre
+  personagens em formato CSR, recalculado a cada carga (ver graph.py)
+- ``house_counts``, ``species_counts`` e ``book_counts``: contagens pré-calculadas
+- ``changelog``: mudanças de cada carga em relação à anterior (ver changelog.py)
+"""
+
+from collections.abc import Iterable
+from urllib.parse import unquote
+
+import duckdb
+
+from .changelog import diff_records, insert_changes, record_hash
+from .singleflight import canonical_url
+from .sites import site_for
+from .values import normalize_attributes
+
+SCHEMA = "harry_potter"
+
+# Campos de todo registro que não são atributos do infobox
+RESERVED_FIELDS = ("Nome", "url", "site")
+
+# Livros que cabem no book_mask (um bit de UBIGINT por livro)
+MAX_BOOKS = 64
+
+TABLES = """
+CREATE OR REPLACE TABLE characters (
+    url VARCHAR PRIMARY KEY,
+    nome VARCHAR NOT NULL,
+    site VARCHAR,
+    record_hash VARCHAR NOT NULL,
+    book_mask UBIGINT NOT NULL DEFAULT 0
+);
+CREATE OR REPLACE TABLE character_attributes (
+    url VARCHAR NOT NULL,
+    attribute VARCHAR NOT NULL,
+    position INTEGER NOT NULL,
+    value VARCHAR
+);
+CREATE OR REPLACE TABLE books (
+    book_id INTEGER PRIMARY KEY,
+    url VARCHAR NOT NULL,
+    title VARCHAR NOT NULL,
+    site VARCHAR
+);
+CREATE OR REPLACE TABLE character_books (
+    url VARCHAR NOT NULL,
+    book_id INTEGER NOT NULL,
+    PRIMARY KEY (url, book_id)
+);
+CREATE OR REPLACE TABLE character_links (
+    url VARCHAR NOT NULL,
+    relation VARCHAR NOT NULL,
+    target VARCHAR NOT NULL
+);
+CREATE INDEX character_attributes_url_idx ON character_attributes (url);
+CREATE INDEX character_links_url_idx ON character_links (url);
+CREATE INDEX character_attributes_attribute_idx ON character_attributes (attribute, value);
+CREATE INDEX character_books_book_idx ON character_books (book_id);
+"""
+
+# Bit (book_id - 1) de cada livro em que o personagem aparece, a partir de character_books
+BOOK_MASKS = """
+UPDATE characters SET book_mask = masks.book_mask
+FROM (
+    SELECT url, bit_or(1::UBIGINT << (book_id - 1)) AS book_mask
+    FROM character_books
+    GROUP BY url
+) masks
+WHERE characters.url = masks.url;
+"""
+
+# Tabelas de contagem recalculadas a cada carga (o DuckDB não tem views materializadas)
+ANALYTICS = """
+CREATE OR REPLACE TABLE house_counts AS
+SELECT canonical AS house, count(DISTINCT url) AS characters
+FROM attribute_values
+WHERE attribute = 'Casa' AND canonical IS NOT NULL
+GROUP BY canonical
+ORDER BY characters DESC;
+
+CREATE OR REPLACE TABLE species_counts AS
+SELECT canonical AS species, count(DISTINCT url) AS characters
+FROM attribute_values
+WHERE attribute = 'Especie' AND canonical IS NOT NULL
+GROUP BY canonical
+ORDER BY characters DESC;
+
+CREATE OR REPLACE TABLE book_counts AS
+SELECT b.book_id, b.title, count(cb.url) AS characters
+FROM books b
+LEFT JOIN character_books cb USING (book_id)
+GROUP BY b.book_id, b.title
+ORDER BY b.book_id;
+"""
+
+# Grafo de relações em formato CSR: as arestas de cada nó ficam contíguas em
+# graph_edges, a partir de graph_nodes.edge_offset (ver build_graph)
+GRAPH_TABLES = """
+CREATE OR REPLACE TABLE graph_nodes (
+    node_id INTEGER PRIMARY KEY,
+    url VARCHAR NOT NULL,
+    nome VARCHAR NOT NULL,
+    edge_offset INTEGER NOT NULL,
+    degree INTEGER NOT NULL
+);
+CREATE OR REPLACE TABLE graph_relations (
+    relation_id SMALLINT PRIMARY KEY,
+    relation VARCHAR NOT NULL
+);
+CREATE OR REPLACE TABLE graph_edges (
+    position INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    relation_id SMALLINT NOT NULL,
+    outgoing BOOLEAN NOT NULL
+);
+"""
+
+
+def book_title(url: str) -> str:
+    """Extrai o título legível de um livro a partir da URL.
+
+    Args:
+        url: Link da página do livro
+
+    Returns:
+        Título sem sublinhados e com acentos decodificados
+    """
+    return unquote(url.rstrip("/").rsplit("/", 1)[-1]).replace("_", " ")
+
+
+def book_site(url: str) -> str | None:
+    """Nome do site de um livro, ou None se a URL não for de um site conhecido."""
+    site = site_for(url)
+    return site.name if site else None
+
+
+def add_attribute_rows(record, rows: tuple[list, list, list, list]) -> None:
+    """Acrescenta os atributos de um personagem às colunas do formato longo.
+
+    Args:
+        record: Registro do personagem (dicionário ou CharacterRecord)
+        rows: Colunas (url, attribute, position, value) sendo montadas
+    """
+    urls, attributes, positions, values = rows
+
+    for attribute, value in record.items():
+        if attribute in RESERVED_FIELDS:
+            continue
+
+        items = value if isinstance(value, list) else [value]
+        for position, item in enumerate(items):
+            urls.append(record["url"])
+            attributes.append(attribute)
+            positions.append(position)
+            values.append(None if item is None else str(item))
+
+
+def hash_records(records: Iterable) -> tuple[dict, tuple[list, list, list, list]]:
+    """Calcula o hash e as linhas do formato longo de cada personagem.
+
+    Args:
+        records: Registros de personagens; só o primeiro de cada url é usado
+
+    Returns:
+        Dicionário url -> (hash, registro) e as colunas de character_attributes
+    """
+    characters = {}
+    rows = ([], [], [], [])
+    for record in records:
+        if record["url"] in characters:
+            continue
+        characters[record["url"]] = (record_hash(record), record)
+        add_attribute_rows(record, rows)
+    return characters, rows
+
+
+def insert_characters(
+    con: duckdb.DuckDBPyConnection, characters: dict, rows: tuple[list, list, list, list]
+) -> None:
+    """Insere personagens e atributos calculados por hash_records().
+
+    Args:
+        con: Conexão DuckDB com o esquema normalizado ativo
+        characters: Dicionário url -> (hash, registro)
+        rows: Colunas de character_attributes
+    """
+    con.execute(
+        "INSERT INTO characters (url, nome, site, record_hash) "
+        "SELECT unnest(?), unnest(?), unnest(?), unnest(?)",
+        [
+            list(characters),
+            [record["Nome"] for _, record in characters.values()],
+            [record.get("site") for _, record in characters.values()],
+            [digest for digest, _ in characters.values()],
+        ],
+    )
+    con.execute(
+        "INSERT INTO character_attributes SELECT unnest(?), unnest(?), unnest(?), unnest(?)",
+        list(rows),
+    )
+
+
+def insert_links(
+    con: duckdb.DuckDBPyConnection, characters: dict, character_links: dict[str, dict] | None
+) -> None:
+    """Insere em character_links os links do infobox dos personagens carregados.
+
+    Args:
+        con: Conexão DuckDB com o esquema normalizado ativo
+        characters: Personagens carregados, de hash_records()
+        character_links: Dicionário url -> {relação: URLs de destino}
+    """
+    rows = ([], [], [])
+    for url, links in (character_links or {}).items():
+        if url not in characters:
+            continue
+        for relation, targets in links.items():
+            for target in targets:
+                rows[0].append(url)
+                rows[1].append(relation)
+                rows[2].append(target)
+
+    con.execute("INSERT INTO character_links SELECT unnest(?), unnest(?), unnest(?)", list(rows))
+
+
+def build_graph(con: duckdb.DuckDBPyConnection) -> None:
+    """Recalcula o grafo de relações entre personagens em formato CSR.
+
+    Cada personagem é um nó (numerado na ordem das urls) e cada link do
+    infobox para outro personagem, uma aresta tipada pela relação (o atributo
+    em que o link aparece). Os destinos são comparados pela URL canônica, então
+    grafias diferentes do mesmo link chegam ao mesmo nó; links para páginas que
+    não são personagens ficam só em character_links.
+
+    A adjacência é guardada nos dois sentidos: a aresta a -> b está na lista de
+    ``a`` com ``outgoing`` verdadeiro e na de ``b`` com ``outgoing`` falso. As
+    listas ficam ordenadas por nó, de modo que as arestas do nó ``n`` são as
+    posições ``[edge_offset, edge_offset + degree)`` de graph_edges.
+
+    Args:
+        con: Conexão DuckDB com o esquema normalizado ativo
+    """
+    nodes = con.execute("SELECT url, nome FROM characters ORDER BY url").fetchall()
+    node_ids = {canonical_url(url): node_id for node_id, (url, _) in enumerate(nodes)}
+
+    links = set()
+    for url, relation, target in con.execute(
+        "SELECT DISTINCT url, relation, target FROM character_links"
+    ).fetchall():
+        source = node_ids.get(canonical_url(url))
+        target = node_ids.get(canonical_url(target))
+        if source is not None and target is not None and source != target:
+            links.add((source, relation, target))
+
+    relations = {name: i for i, name in enumerate(sorted({rel for _, rel, _ in links}))}
+    adjacency = sorted(
+        [(source, target, relations[rel], True) for source, rel, target in links]
+        + [(target, source, relations[rel], False) for source, rel, target in links]
+    )
+
+    degrees = [0] * len(nodes)
+    for source, *_ in adjacency:
+        degrees[source] += 1
+    offsets = []
+    offset = 0
+    for degree in degrees:
+        offsets.append(offset)
+        offset += degree
+
+    columns = [list(column) for column in zip(*adjacency)] or [[], [], [], []]
+
+    con.execute(GRAPH_TABLES)
+    con.execute(
+        "INSERT INTO graph_nodes SELECT unnest(?), unnest(?), unnest(?), unnest(?), unnest(?)",
+        [list(range(len(nodes))), [u for u, _ in nodes], [n for _, n in nodes], offsets, degrees],
+    )
+    con.execute(
+        "INSERT INTO graph_relations SELECT unnest(?), unnest(?)",
+        [list(relations.values()), list(relations)],
+    )
+    con.execute(
+        "INSERT INTO graph_edges SELECT unnest(?), unnest(?), unnest(?), unnest(?), unnest(?)",
+        [list(range(len(adjacency))), *columns],
+    )
+
+
+def write_normalized(
+    con: duckdb.DuckDBPyConnection,
+    records: Iterable[dict],
+    book_urls: list[str],
+    character_books: dict[str, list[str]],
+    character_links: dict[str, dict] | None = None,
+) -> list[dict]:
+    """Recria o esquema normalizado e as contagens com os dados da execução.
+
+    As colunas são inseridas de uma vez com ``unnest``, sem um INSERT por linha.
+    Os registros são percorridos uma única vez, então podem vir de um gerador.
+    Antes de recriar as tabelas, a carga é comparada com a anterior e as
+    mudanças são acrescentadas à tabela ``changelog``.
+
+    Args:
+        con: Conexão DuckDB com permissão de escrita
+        records: Registros limpos de personagens (lista ou gerador)
+        book_urls: Links dos livros, na ordem de publicação (de todos os sites)
+        character_books: Livros em que cada personagem foi encontrado
+        character_links: Links do infobox de cada personagem (relação -> URLs),
+            para o grafo de relações
+
+    Returns:
+        Mudanças em relação à carga anterior (ver changelog.diff_records)
+
+    Raises:
+        ValueError: Se houver mais livros do que bits no book_mask
+    """
+    book_ids = {url: book_id for book_id, url in enumerate(book_urls, start=1)}
+    if len(book_ids) > MAX_BOOKS:
+        raise ValueError(f"{len(book_ids)} livros não cabem no book_mask (máximo {MAX_BOOKS})")
+
+    characters, rows = hash_records(records)
+
+    book_rows = ([], [])
+    for url in characters:
+        for book_url in character_books.get(url, []):
+            if book_url in book_ids:
+                book_rows[0].append(url)
+                book_rows[1].append(book_ids[book_url])
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+        con.execute(f"SET schema = '{SCHEMA}'")
+        changes = diff_records(con, SCHEMA, characters)
+        con.execute(TABLES)
+
+        insert_characters(con, characters, rows)
+        con.execute(
+            "INSERT INTO books SELECT unnest(?), unnest(?), unnest(?), unnest(?)",
+            [
+                list(book_ids.values()),
+                list(book_ids),
+                [book_title(url) for url in book_ids],
+                [book_site(url) for url in book_ids],
+            ],
+        )
+        con.execute(
+            "INSERT INTO character_books SELECT DISTINCT * FROM "
+            "(SELECT unnest(?) AS url, unnest(?) AS book_id)",
+            list(book_rows),
+        )
+        con.execute(BOOK_MASKS)
+        insert_links(con, characters, character_links)
+        build_graph(con)
+        insert_changes(con, changes)
+        normalize_attributes(con)
+        con.execute(ANALYTICS)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    return changes
+
+
+def upsert_normalized(
+    con: duckdb.DuckDBPyConnection,
+    records: Iterable,
+    character_links: dict[str, dict] | None = None,
+) -> list[dict]:
+    """Atualiza alguns personagens no esquema normalizado, sem recriar as tabelas.
+
+    Os personagens recebidos substituem os de mesma url (ou são acrescentados),
+    com seus links; os demais e os livros ficam como estão. As contagens e o
+    grafo são recalculados e as mudanças vão para a tabela ``changelog``, como
+    em uma carga completa.
+
+    Args:
+        con: Conexão DuckDB com uma carga completa já feita por write_normalized()
+        records: Registros novos ou atualizados
+        character_links: Links do infobox desses personagens (relação -> URLs)
+
+    Returns:
+        Mudanças desses personagens (sem remoções; ver changelog.diff_records)
+    """
+    characters, rows = hash_records(records)
+    urls = list(characters)
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"SET schema = '{SCHEMA}'")
+        changes = diff_records(con, SCHEMA, characters, partial=True)
+        for table in ("characters", "character_attributes", "character_links"):
+            con.execute(f"DELETE FROM {table} WHERE url IN (SELECT unnest(?))", [urls])
+        insert_characters(con, characters, rows)
+        con.execute(BOOK_MASKS)
+        insert_links(con, characters, character_links)
+        build_graph(con)
+        insert_changes(con, changes)
+        normalize_attributes(con)
+        con.execute(ANALYTICS)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    return changes
+
+
+def read_records(con: duckdb.DuckDBPyConnection) -> list[dict]:
+    """Lê do esquema normalizado os personagens da última carga.
+
+    Campos com um único valor voltam como texto e os com vários, como lista
+    (o mesmo conteúdo, para o hash, do registro original).
+
+    Args:
+        con: Conexão DuckDB
+
+    Returns:
+        Registros de personagens, em ordem de url
+    """
+    rows = con.execute(
+        f"""
+        SELECT c.url, c.nome, c.site, a.attribute, list(a.value ORDER BY a.position)
+        FROM {SCHEMA}.characters c
+        LEFT JOIN {SCHEMA}.character_attributes a USING (url)
+        GROUP BY ALL
+        ORDER BY c.url, min(a.rowid)
+        """
+    ).fetchall()
+
+    characters = {}
+    for url, nome, site, attribute, values in rows:
+        if url not in characters:
+            characters[url] = ({}, nome, site)
+        if attribute is not None:
+            characters[url][0][attribute] = values[0] if len(values) == 1 else values
+
+    records = []
+    for url, (record, nome, site) in characters.items():
+        record["Nome"], record["url"] = nome, url
+        if site:
+            record["site"] = site
+        records.append(record)
+    return records
@@ -0,0 +1,26 @@
+"""Funções de texto compartilhadas pelos scrapers."""
+
+import unicodedata
+
+
+def remove_accents(text: str) -> str:
+    """Remove acentos de um texto.
+
+    Transforma: café -> cafe, São -> Sao, Informações -> Informacoes
+
+    Args:
+        text: Texto com possíveis acentos
+
+    Returns:
+        Texto sem acentos
+    """
+    # Normaliza para NFD (decompõe caracteres acentuados)
+    normalized = unicodedata.normalize("NFD", text)
+
+    # Remove marcas de combinação (os acentos)
+    result = []
+    for char in normalized:
+        if unicodedata.category(char) != "Mn":
+            result.append(char)
+
+    return "".join(result)
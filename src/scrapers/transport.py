@@ -0,0 +1,234 @@
+"""Transporte HTTP do modo async: resolução de nomes em cache e conexões aquecidas.
+
+Uma execução faz milhares de requisições aos mesmos um ou dois hosts. O
+Transport mantém, enquanto está aberto (``async with transport``):
+
+- um único TCPConnector para todas as sessões: as conexões abertas pela
+  descoberta dos livros continuam no pool para a verificação e a extração
+- o CachedResolver: cada host é resolvido uma vez e o endereço vale por até
+  ``dns_ttl`` segundos; consultas simultâneas ao mesmo host esperam a mesma
+  resolução, em vez de uma por conexão aberta na rajada inicial
+- o aquecimento (``prewarm``): antes da rajada, algumas conexões a cada site
+  são abertas (DNS, TCP e TLS) e deixadas no pool
+
+O getaddrinfo do sistema não informa o TTL dos registros; ``dns_ttl`` é o
+tempo máximo de reaproveitamento, e um endereço vencido é resolvido de novo.
+Falhas de resolução não ficam em cache.
+
+Fora do contexto, cada sessão tem seu próprio conector, como antes. O
+ConnectionStats mede, pelos sinais de trace do aiohttp, quanto tempo foi gasto
+abrindo conexões e quantas foram reaproveitadas.
+"""
+
+import asyncio
+import socket
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import ThreadedResolver
+from loguru import logger
+
+from .concurrency import CONNECT_TIMEOUT, REQUEST_TIMEOUT
+from .singleflight import AsyncSingleFlight
+
+# Padrões da linha de comando (--dns-ttl, --prewarm, --keepalive)
+DNS_TTL = 300.0
+PREWARM_CONNECTIONS = 8
+KEEPALIVE_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Configuração do transporte HTTP."""
+
+    dns_ttl: float = DNS_TTL
+    prewarm: int = PREWARM_CONNECTIONS
+    keepalive: float = KEEPALIVE_TIMEOUT
+    limit_per_host: int = 0
+
+
+class CachedResolver(AbstractResolver):
+    """Resolvedor com cache por host e uma única consulta por host em andamento."""
+
+    def __init__(self, ttl: float = DNS_TTL, factory: Callable[[], AbstractResolver] | None = None):
+        """Cria o resolvedor com o cache vazio.
+
+        Args:
+            ttl: Segundos em que um endereço resolvido é reaproveitado
+            factory: Cria o resolvedor usado nas consultas (padrão:
+                ThreadedResolver, o getaddrinfo do sistema em uma thread)
+        """
+        self.ttl = ttl
+        self.factory = factory or ThreadedResolver
+        self.cache: dict[tuple, tuple[float, list[ResolveResult]]] = {}
+        self.flights = AsyncSingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        """Endereços do host, do cache enquanto não vencerem."""
+        key = (host, port, family)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        return await self.flights.do(key, lambda: self._lookup(key))
+
+    async def _lookup(self, key: tuple) -> list[ResolveResult]:
+        """Resolve o host de fato e guarda o resultado."""
+        self.misses += 1
+        start = time.perf_counter()
+        resolver = self.factory()
+        try:
+            addresses = await resolver.resolve(*key)
+        finally:
+            await resolver.close()
+            self.lookup_seconds += time.perf_counter() - start
+
+        self.cache[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def close(self) -> None:
+        """Nada a liberar: cada consulta fecha seu próprio resolvedor."""
+
+
+class ConnectionStats:
+    """Conexões abertas e reaproveitadas, medidas pelos sinais de trace do aiohttp."""
+
+    def __init__(self):
+        """Cria as estatísticas zeradas."""
+        self.created = 0
+        self.reused = 0
+        self.connect_seconds = 0.0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig que alimenta estas estatísticas."""
+
+        async def on_create_start(session, context: SimpleNamespace, params) -> None:
+            context.connect_start = time.perf_counter()
+
+        async def on_create_end(session, context: SimpleNamespace, params) -> None:
+            self.created += 1
+            self.connect_seconds += time.perf_counter() - context.connect_start
+
+        async def on_reuse(session, context: SimpleNamespace, params) -> None:
+            self.reused += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_start.append(on_create_start)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+    def summary(self) -> str:
+        """Descreve o tempo gasto abrindo conexões."""
+        average = self.connect_seconds / self.created * 1000 if self.created else 0.0
+        return (
+            f"Conexões: {self.created} aberta(s) em {self.connect_seconds * 1000:.0f}ms "
+            f"({average:.1f}ms cada), {self.reused} reaproveitada(s)"
+        )
+
+
+class Transport:
+    """Conector, resolvedor e sessões aiohttp compartilhados por uma execução."""
+
+    def __init__(
+        self,
+        config: TransportConfig | None = None,
+        request_timeout: float = REQUEST_TIMEOUT,
+        resolver_factory: Callable[[], AbstractResolver] | None = None,
+    ):
+        """Configura o transporte (o conector só é criado ao entrar no contexto).
+
+        Args:
+            config: Configuração do transporte (padrão: TransportConfig())
+            request_timeout: Prazo total de cada requisição, em segundos
+            resolver_factory: Resolvedor usado nas consultas que não estão em
+                cache (ver CachedResolver)
+        """
+        self.config = config or TransportConfig()
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout, sock_connect=CONNECT_TIMEOUT)
+        self.resolver = CachedResolver(self.config.dns_ttl, resolver_factory)
+        self.stats = ConnectionStats()
+        self.connector: aiohttp.TCPConnector | None = None
+
+    def _connector(self) -> aiohttp.TCPConnector:
+        """Cria um conector com o resolvedor em cache."""
+        return aiohttp.TCPConnector(
+            resolver=self.resolver,
+            use_dns_cache=False,
+            keepalive_timeout=self.config.keepalive,
+            limit_per_host=self.config.limit_per_host,
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """Cria uma sessão sobre o conector compartilhado (ou um próprio, fora do contexto)."""
+        shared = self.connector is not None and not self.connector.closed
+        return aiohttp.ClientSession(
+            connector=self.connector if shared else self._connector(),
+            connector_owner=not shared,
+            timeout=self.timeout,
+            trace_configs=[self.stats.trace_config()],
+        )
+
+    async def __aenter__(self) -> "Transport":
+        """Abre o conector compartilhado."""
+        self.connector = self._connector()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Fecha o conector e as conexões do pool."""
+        await self.connector.close()
+        self.connector = None
+
+    async def prewarm(self, urls: Iterable[str], connections: int | None = None) -> int:
+        """Abre conexões a cada URL e as deixa no pool, antes da rajada de requisições.
+
+        Falhas são só registradas: a coleta abre as conexões que faltarem.
+
+        Args:
+            urls: Uma URL por host a aquecer (por exemplo, a base de cada site)
+            connections: Conexões por host (padrão: ``config.prewarm``)
+
+        Returns:
+            Número de conexões aquecidas com sucesso
+        """
+        connections = self.config.prewarm if connections is None else connections
+        if connections <= 0:
+            return 0
+
+        async def open_connection(session: aiohttp.ClientSession, url: str) -> None:
+            async with session.head(url, allow_redirects=False):
+                pass
+
+        start = time.perf_counter()
+        async with self.session() as session:
+            results = await asyncio.gather(
+                *[open_connection(session, url) for url in urls for _ in range(connections)],
+                return_exceptions=True,
+            )
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors[:1]:
+            logger.warning(f"Falha ao aquecer conexões: {error!r}")
+        warmed = len(results) - len(errors)
+        logger.info(
+            f"{warmed} conexão(ões) aquecida(s) em {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return warmed
+
+    def summary(self) -> str:
+        """Descreve as conexões e as resoluções de nomes da execução."""
+        return (
+            f"{self.stats.summary()}; DNS: {self.resolver.misses} consulta(s) em "
+            f"{self.resolver.lookup_seconds * 1000:.0f}ms, "
+            f"{self.resolver.hits + self.resolver.flights.shared} do cache"
+        )
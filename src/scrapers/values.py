@@ -0,0 +1,167 @@
+"""Normalização dos valores de atributos, coluna a coluna, no DuckDB.
+
+Os valores saem do infobox como texto bruto: datas por extenso ("31 de julho de
+1980", "31 July, 1980"), casas, espécies e status sanguíneo escritos de formas
+diferentes em cada wiki e marcas de nota ("[1]"). Em vez de cada consumidor
+refazer o parsing, a carga grava a tabela ``attribute_values``, calculada em uma
+única consulta sobre ``character_attributes`` inteira (o DuckDB executa as
+expressões de texto e as junções de forma vetorizada):
+
+- ``clean``: o valor sem as marcas de nota e sem espaços nas bordas
+- ``canonical``: a forma canônica, pela tabela ``value_lookup`` (o próprio
+  ``clean`` se não houver correspondência)
+- ``day``, ``month``, ``year`` e ``date``: as partes da data, nos atributos de
+  DATE_ATTRIBUTES, com o mês pela tabela ``month_lookup``; ``date`` só existe
+  quando a data está completa e é válida
+
+As tabelas de consulta são montadas a partir de MONTHS e CANONICAL_VALUES, com
+as chaves sem acentos e em minúsculas, como a chave calculada na consulta.
+"""
+
+import duckdb
+
+from .text import remove_accents
+
+# Atributos com datas, pelo nome comum (ver sites.SiteProfile.field_map)
+DATE_ATTRIBUTES = ("Nascimento", "Morte")
+
+# Número de cada mês, pelo nome em português e em inglês (sem acentos)
+MONTHS = {
+    name: number
+    for names in (
+        "janeiro fevereiro marco abril maio junho julho agosto setembro outubro novembro dezembro",
+        "january february march april may june july august september october november december",
+    )
+    for number, name in enumerate(names.split(), start=1)
+}
+
+# Forma canônica (a do wiki em português) das variantes de cada atributo
+CANONICAL_VALUES = {
+    "Casa": {
+        "Grifinória": ("grifinoria", "gryffindor"),
+        "Sonserina": ("sonserina", "slytherin"),
+        "Corvinal": ("corvinal", "ravenclaw"),
+        "Lufa-Lufa": ("lufa-lufa", "lufa lufa", "hufflepuff"),
+    },
+    "Especie": {
+        "Humano": ("humano", "humana", "human"),
+        "Elfo doméstico": ("elfo domestico", "elfa domestica", "house-elf", "house elf"),
+        "Gigante": ("gigante", "giant"),
+        "Meio-gigante": ("meio-gigante", "half-giant"),
+        "Duende": ("duende", "goblin"),
+        "Centauro": ("centauro", "centaur"),
+        "Lobisomem": ("lobisomem", "werewolf"),
+        "Fantasma": ("fantasma", "ghost"),
+        "Coruja": ("coruja", "owl"),
+    },
+    "Status sanguineo": {
+        "Sangue-puro": ("sangue-puro", "sangue puro", "puro-sangue", "pure-blood"),
+        "Mestiço": ("mestico", "mestica", "meio-sangue", "half-blood"),
+        "Nascido trouxa": ("nascido trouxa", "nascida trouxa", "nascido-trouxa", "muggle-born"),
+        "Trouxa": ("trouxa", "muggle"),
+        "Aborto": ("aborto", "squib"),
+    },
+    "Genero": {
+        "Masculino": ("masculino", "male"),
+        "Feminino": ("feminino", "female"),
+    },
+}
+
+# Marcas de nota deixadas pelas referências do wiki: [1], [a], [nota 2], [citation needed]
+REFERENCE_MARKER = r"(?i)\s*\[(?:\d+|[a-z]|(?:nota|note) \d+|citation needed|carece de fontes)\]"
+
+# Data por extenso, sobre a chave sem acentos: "31 de julho de 1980",
+# "julho de 1980", "31 july, 1980"
+DATE_PATTERN = r"(?:(\d{1,2})(?:o|º)?\s+(?:de\s+)?)?([a-z]+)(?:\s+de|,)?\s+(\d{3,4})"
+
+LOOKUP_TABLES = """
+CREATE OR REPLACE TABLE month_lookup (
+    name VARCHAR PRIMARY KEY,
+    month INTEGER NOT NULL
+);
+CREATE OR REPLACE TABLE value_lookup (
+    attribute VARCHAR NOT NULL,
+    variant VARCHAR NOT NULL,
+    canonical VARCHAR NOT NULL,
+    PRIMARY KEY (attribute, variant)
+);
+"""
+
+NORMALIZE = f"""
+CREATE OR REPLACE TABLE attribute_values AS
+WITH keyed AS (
+    SELECT
+        url,
+        strip_accents(attribute) AS attribute,
+        position,
+        value,
+        nullif(trim(regexp_replace(value, '{REFERENCE_MARKER}', '', 'g')), '') AS clean,
+        lower(strip_accents(regexp_replace(clean, '\\s+', ' ', 'g'))) AS lookup_key
+    FROM character_attributes
+),
+dated AS (
+    SELECT
+        *,
+        CASE WHEN list_contains(?, attribute) THEN regexp_extract(
+            lookup_key, '{DATE_PATTERN}', ['day', 'month_name', 'year']
+        ) END AS parts,
+        CAST(nullif(parts['day'], '') AS INTEGER) AS day,
+        CASE WHEN parts IS NOT NULL THEN CAST(coalesce(
+            nullif(parts['year'], ''),
+            nullif(regexp_extract(lookup_key, '\\b(\\d{{3,4}})\\b', 1), '')
+        ) AS INTEGER) END AS year
+    FROM keyed
+)
+SELECT
+    d.url,
+    d.attribute,
+    d.position,
+    d.value,
+    d.clean,
+    coalesce(v.canonical, d.clean) AS canonical,
+    CASE WHEN m.month IS NOT NULL THEN d.day END AS day,
+    m.month,
+    d.year,
+    try(make_date(d.year, m.month, d.day)) AS date
+FROM dated d
+LEFT JOIN month_lookup m ON m.name = d.parts['month_name']
+LEFT JOIN value_lookup v ON v.attribute = d.attribute AND v.variant = d.lookup_key
+ORDER BY d.url, d.attribute, d.position;
+"""
+
+
+def lookup_key(text: str) -> str:
+    """Chave de comparação de um valor: sem acentos, em minúsculas e com espaços simples."""
+    return " ".join(remove_accents(text).lower().split())
+
+
+def write_lookups(con: duckdb.DuckDBPyConnection) -> None:
+    """Recria as tabelas de consulta dos meses e das formas canônicas.
+
+    Args:
+        con: Conexão DuckDB com o esquema normalizado ativo
+    """
+    con.execute(LOOKUP_TABLES)
+    con.execute(
+        "INSERT INTO month_lookup SELECT unnest(?), unnest(?)",
+        [list(MONTHS), list(MONTHS.values())],
+    )
+
+    rows = ([], [], [])
+    for attribute, values in CANONICAL_VALUES.items():
+        for canonical, variants in values.items():
+            for variant in {lookup_key(canonical), *map(lookup_key, variants)}:
+                rows[0].append(attribute)
+                rows[1].append(variant)
+                rows[2].append(canonical)
+    con.execute("INSERT INTO value_lookup SELECT unnest(?), unnest(?), unnest(?)", list(rows))
+
+
+def normalize_attributes(con: duckdb.DuckDBPyConnection) -> None:
+    """Recalcula ``attribute_values`` a partir de ``character_attributes``.
+
+    Args:
+        con: Conexão DuckDB com o esquema normalizado ativo
+    """
+    write_lookups(con)
+    con.execute(NORMALIZE, [list(DATE_ATTRIBUTES)])
@@ -0,0 +1,298 @@
+"""Modo watch: mantém os dados em dia pelas mudanças recentes do wiki.
+
+Em vez de coletar tudo de novo, o watch consulta periodicamente a lista
+``recentchanges`` do api.php de cada site e só visita as páginas editadas:
+
+- edições de personagens já conhecidos (os da última carga do DuckDB) são
+  reextraídas
+- páginas novas são verificadas e, se forem personagens, extraídas
+
+Os personagens atualizados entram no DuckDB por upsert (a tabela ``personagens``
+do dlt, o esquema normalizado e o changelog) e o CSV e o índice de busca são
+regravados a partir dos dados em memória. A posição na lista de mudanças de cada
+site fica em ``<banco>.watch.json``, então o watch continua de onde parou.
+Páginas cuja verificação ou extração falhou ficam no estado (``retry``) e são
+visitadas de novo na consulta seguinte; uma falha da consulta inteira (rede,
+prazo ou banco) é registrada e a posição volta à da última consulta gravada.
+
+O watch parte de uma carga completa: rode o scraper uma vez antes. Personagens
+criados pelo watch não têm linhas em ``character_books`` (a lista de
+personagens de cada livro só é lida na carga completa), então ficam com
+``book_mask`` 0 e fora do comando ``books`` até a próxima carga completa.
+"""
+
+import asyncio
+import copy
+import json
+from datetime import UTC, datetime
+from pathlib import Path
+
+import aiohttp
+import duckdb
+from loguru import logger
+
+from .cleaning import clean_records
+from .records import RecordBatch
+from .singleflight import canonical_url
+from .sites import SiteProfile
+from .storage import read_records
+from .wiki_caller_async import WikiCaller
+
+DEFAULT_INTERVAL = 300.0
+
+# Máximo de mudanças por página de resultado do api.php
+RC_LIMIT = 500
+
+
+def state_path(db_name: str) -> Path:
+    """Caminho do arquivo de estado do watch, ao lado do banco DuckDB."""
+    return Path(db_name).with_suffix(".watch.json")
+
+
+def utc_timestamp(moment: datetime | None = None) -> str:
+    """Instante no formato de timestamp do MediaWiki (``2024-05-01T12:00:00Z``)."""
+    return (moment or datetime.now(UTC)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+async def recent_changes(
+    session: aiohttp.ClientSession, site: SiteProfile, since: str, limit: int = RC_LIMIT
+) -> list[dict]:
+    """Lê as edições e páginas novas de artigos desde um instante.
+
+    Segue a continuação do api.php até o fim da lista.
+
+    Args:
+        session: Sessão aiohttp
+        site: Site consultado
+        since: Timestamp inicial (incluído), no formato do MediaWiki
+        limit: Mudanças por requisição
+
+    Returns:
+        Mudanças em ordem cronológica, com ``type``, ``title`` e ``timestamp``
+    """
+    params = {
+        "action": "query",
+        "list": "recentchanges",
+        "rcdir": "newer",
+        "rcstart": since,
+        "rcnamespace": "0",
+        "rctype": "edit|new",
+        "rcprop": "title|timestamp",
+        "rclimit": str(limit),
+        "format": "json",
+        "formatversion": "2",
+    }
+
+    changes = []
+    while True:
+        async with session.get(site.api_url, params=params) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+
+        changes.extend(data.get("query", {}).get("recentchanges", []))
+        if "continue" not in data:
+            return changes
+        params.update(data["continue"])
+
+
+class Watcher:
+    """Atualiza os dados da última carga a cada consulta às mudanças recentes."""
+
+    def __init__(
+        self,
+        scraper: WikiCaller,
+        db_name: str = "personagens_harry_potter.duckdb",
+        csv_path: str = "personagens.csv",
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        """Configura o watch.
+
+        Args:
+            scraper: Scraper assíncrono com os sites acompanhados
+            db_name: Banco DuckDB de uma carga completa
+            csv_path: CSV regravado a cada atualização
+            interval: Segundos entre consultas
+        """
+        self.scraper = scraper
+        self.db_name = db_name
+        self.csv_path = csv_path
+        self.interval = interval
+
+        self.records = {}  # url -> registro
+        self.known = {}  # url canônica -> url
+        # site -> {"since": timestamp, "seen": títulos já vistos nele,
+        #          "retry": urls a visitar de novo}
+        self.state = {}
+
+    def load(self) -> None:
+        """Carrega os personagens da última carga e a posição em cada site."""
+        if Path(self.db_name).exists():
+            with duckdb.connect(self.db_name, read_only=True) as con:
+                for record in read_records(con):
+                    self.remember(record)
+        logger.info(f"Acompanhando {len(self.records)} personagens de {self.db_name}")
+
+        path = state_path(self.db_name)
+        if path.exists():
+            self.state = json.loads(path.read_text(encoding="utf-8"))
+
+        now = utc_timestamp()
+        for site in self.scraper.sites:
+            self.state.setdefault(site.name, {"since": now, "seen": []})
+
+    def save_state(self) -> None:
+        """Grava a posição em cada site."""
+        state_path(self.db_name).write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+
+    def remember(self, record: dict) -> None:
+        """Guarda (ou substitui) um personagem nos dados em memória."""
+        self.records[record["url"]] = record
+        self.known[canonical_url(record["url"])] = record["url"]
+
+    def new_changes(self, site: SiteProfile, changes: list[dict]) -> list[dict]:
+        """Descarta as mudanças já vistas e avança a posição do site.
+
+        O ``rcstart`` do api.php inclui o próprio instante, então as mudanças
+        nesse instante voltam na consulta seguinte e são filtradas pelo título.
+
+        Args:
+            site: Site consultado
+            changes: Mudanças devolvidas por recent_changes()
+
+        Returns:
+            Mudanças ainda não processadas
+        """
+        state = self.state[site.name]
+        seen = set(state["seen"])
+
+        fresh = []
+        for change in changes:
+            if change["timestamp"] == state["since"] and change["title"] in seen:
+                continue
+            fresh.append(change)
+            if change["timestamp"] > state["since"]:
+                state["since"], seen = change["timestamp"], set()
+            seen.add(change["title"])
+
+        state["seen"] = sorted(seen)
+        return fresh
+
+    async def poll(self, session: aiohttp.ClientSession) -> list:
+        """Consulta as mudanças de todos os sites e extrai as páginas afetadas.
+
+        Args:
+            session: Sessão aiohttp, compartilhada com o scraper
+
+        Returns:
+            Registros dos personagens editados ou criados
+        """
+        edited, created = [], []
+        origin = {}  # url -> site, para devolver ao site as páginas que falharem
+        for site in self.scraper.sites:
+            state = self.state[site.name]
+            changes = await recent_changes(session, site, state["since"])
+
+            pages = [(url, True) for url in state.pop("retry", [])]
+            for change in self.new_changes(site, changes):
+                pages.append((site.page_url(change["title"]), change.get("type") == "new"))
+
+            for url, new in pages:
+                known = self.known.get(canonical_url(url))
+                if known is not None:
+                    edited.append(known)
+                    origin[known] = site.name
+                elif new:
+                    created.append(url)
+                    origin[url] = site.name
+
+        edited, created = list(dict.fromkeys(edited)), list(dict.fromkeys(created))
+        if not edited and not created:
+            return []
+
+        # As páginas mudaram desde a última visita: nada do cache serve
+        self.scraper.cache.clear()
+
+        failed = []
+        verified = await asyncio.gather(
+            *[self.scraper.verify_href(session, url) for url in created], return_exceptions=True
+        )
+        urls = list(edited)
+        for url, result in zip(created, verified):
+            if isinstance(result, Exception):
+                logger.error(f"Erro ao verificar {url}: {result}")
+                failed.append((url, result))
+            elif isinstance(result, str):
+                urls.append(result)
+                origin[result] = origin[url]
+
+        results = await asyncio.gather(
+            *[self.scraper.get_character_info(session, url) for url in urls],
+            return_exceptions=True,
+        )
+
+        records = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Erro ao extrair dados de {url}: {result}")
+                failed.append((url, result))
+            else:
+                records.append(result)
+
+        # Página apagada (404) não volta: só as falhas transitórias são repetidas
+        retry = [
+            url
+            for url, error in failed
+            if not isinstance(error, aiohttp.ClientResponseError) or error.status != 404
+        ]
+        for url in retry:
+            self.state[origin[url]].setdefault("retry", []).append(url)
+
+        logger.info(
+            f"{len(edited)} personagem(ns) editado(s) e {len(urls) - len(edited)} novo(s); "
+            f"{len(records)} extraído(s), {len(retry)} para a próxima consulta"
+        )
+        return records
+
+    def save(self, records: list) -> None:
+        """Grava os personagens atualizados em todos os destinos.
+
+        Args:
+            records: Registros extraídos por poll()
+        """
+        cleaned = list(clean_records(records, self.scraper.character_filters()))
+        if cleaned:
+            self.scraper.upsert_to_duckdb(cleaned, self.db_name)
+            for record in cleaned:
+                self.remember(dict(record.items()))
+
+            self.scraper.records = RecordBatch.from_records(self.records.values())
+            self.scraper.save_to_csv(self.csv_path)
+            self.scraper.save_search_index(self.db_name)
+
+        self.save_state()
+
+    async def run(self, once: bool = False) -> None:
+        """Consulta as mudanças a cada intervalo, até ser interrompido.
+
+        Falhas transitórias de uma consulta (rede, prazo, banco) não encerram o
+        watch: a posição volta à da última consulta gravada e as mesmas
+        mudanças são lidas de novo no intervalo seguinte.
+
+        Args:
+            once: Faz uma única consulta e termina
+        """
+        self.load()
+
+        async with self.scraper.transport, self.scraper.client_session() as session:
+            while True:
+                saved = copy.deepcopy(self.state)
+                try:
+                    records = await self.poll(session)
+                    await asyncio.to_thread(self.save, records)
+                except (aiohttp.ClientError, asyncio.TimeoutError, duckdb.Error) as e:
+                    logger.error(f"Falha na consulta às mudanças; nova tentativa depois: {e!r}")
+                    self.state = saved
+
+                if once:
+                    return
+                await asyncio.sleep(self.interval)
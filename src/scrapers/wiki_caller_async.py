@@ -1,15 +1,28 @@
 """Scraper assíncrono usando aiohttp e asyncio."""
 
 import asyncio
-from typing_extensions import override
+import time
+from collections.abc import Iterable
 
 import aiohttp
 import pendulum as pend
 from loguru import logger
 from selectolax.lexbor import LexborHTMLParser as HTMLParser
-from tqdm.asyncio import tqdm as async_tqdm
 
+from .archive import PageArchive
 from .base import BaseWikiCaller
+from .concurrency import (
+    REQUEST_TIMEOUT,
+    AdaptiveLimiter,
+    Deadline,
+    LatencyTracker,
+    hedged,
+)
+from .records import CharacterRecord
+from .singleflight import AsyncSingleFlight, canonical_url
+from .sites import DEFAULT_SITES, SiteProfile
+from .transport import Transport, TransportConfig
+from .writer import BackgroundWriter
 
 
 class WikiCaller(BaseWikiCaller):
@@ -19,29 +32,185 @@ class WikiCaller(BaseWikiCaller):
     e selectolax para parsing HTML rápido.
     """
 
-    def __init__(self):
-        """Inicializa o scraper assíncrono."""
-        super().__init__()
+    def __init__(
+        self,
+        concurrency: int = 50,
+        journal_path: str = "personagens.jsonl",
+        fsync: str = "interval",
+        flush_interval: float = 1.0,
+        sites: Iterable[str | SiteProfile] = DEFAULT_SITES,
+        archive_dir: str | None = None,
+        request_timeout: float = REQUEST_TIMEOUT,
+        crawl_timeout: float | None = None,
+        hedge: bool = False,
+        transport: TransportConfig | None = None,
+    ):
+        """Inicializa o scraper assíncrono.
+
+        Args:
+            concurrency: Número de workers em cada etapa do pipeline e limite
+                máximo de requisições simultâneas
+            journal_path: Arquivo JSONL gravado durante a coleta, um personagem
+                por linha (ver writer.py)
+            fsync: Política de fsync do arquivo (never, interval ou batch)
+            flush_interval: Segundos entre descargas do arquivo
+            sites: Sites coletados juntos, na mesma sessão e sob o mesmo limitador
+            archive_dir: Diretório do arquivo de páginas (ver archive.py); cada
+                página baixada é gravada nele para reextrações sem rede
+            request_timeout: Prazo total de cada requisição, em segundos
+            crawl_timeout: Orçamento da coleta, em segundos; esgotado, nenhum
+                livro, link ou personagem novo é iniciado (padrão: sem limite)
+            hedge: Envia uma reserva das requisições que passam do p95 recente
+                (ver concurrency.hedged)
+            transport: Resolução de nomes, aquecimento e pool de conexões
+                (ver transport.py)
+        """
+        super().__init__(sites, request_timeout, crawl_timeout)
         self.setup_logger()
         self.verified_characters = []
-
-    async def fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        self.concurrency = concurrency
+        self.limiter = AdaptiveLimiter(max_limit=concurrency)
+        self.journal_path = journal_path
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+        self._archive_lock = asyncio.Lock()
+        self.flights = AsyncSingleFlight()
+        self.hedge = hedge
+        self.latency = LatencyTracker()
+        self.deadline = Deadline()
+        self.transport = Transport(transport, self.request_timeout)
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
         """Busca conteúdo de URL com cache.
 
+        As requisições passam pelo limitador adaptativo, que ajusta quantas
+        ficam em andamento ao mesmo tempo conforme a latência e os erros.
+        Pedidos simultâneos da mesma URL (pela forma canônica) compartilham uma
+        única requisição em andamento.
+
+        O corpo é mantido em bytes, sem decodificação: o selectolax lê os bytes
+        diretamente como UTF-8 (a codificação do fandom). Com arquivo de
+        páginas, o corpo também é gravado nele.
+
         Args:
             session: Sessão aiohttp
             url: URL para buscar
 
         Returns:
-            Conteúdo HTML da página
+            Conteúdo HTML da página, em bytes UTF-8
+
+        Raises:
+            aiohttp.ClientResponseError: Se a resposta for um erro HTTP
         """
         if url in self.cache:
             return self.cache[url]
 
+        body = await self.flights.do(canonical_url(url), lambda: self.download(session, url))
+        self.cache[url] = body
+        return body
+
+    def client_session(self) -> aiohttp.ClientSession:
+        """Cria uma sessão aiohttp sobre o transporte (conexões compartilhadas na execução)."""
+        return self.transport.session()
+
+    async def attempt(self, session: aiohttp.ClientSession, url: str) -> tuple[int, bytes]:
+        """Uma tentativa de GET, sem limitador.
+
+        Returns:
+            Status e conteúdo da resposta
+
+        Raises:
+            aiohttp.ClientResponseError: Se o status for de erro
+        """
         async with session.get(url) as response:
-            text = await response.text()
-            self.cache[url] = text
-            return text
+            response.raise_for_status()
+            return response.status, await response.read()
+
+    async def backup_attempt(self, session: aiohttp.ClientSession, url: str) -> tuple[int, bytes]:
+        """Faz a reserva de uma requisição lenta em uma vaga própria do limitador.
+
+        A reserva conta em ``in_flight`` como qualquer requisição, e seu status
+        (inclusive 403/429/503) alimenta o limite.
+
+        Args:
+            session: Sessão aiohttp
+            url: URL para buscar
+
+        Returns:
+            Status e conteúdo da resposta
+        """
+        async with self.limiter.slot() as sample:
+            try:
+                sample.status, body = await self.attempt(session, url)
+            except aiohttp.ClientResponseError as e:
+                sample.status = e.status
+                raise
+        return sample.status, body
+
+    async def request(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """Faz uma requisição sob o limitador e registra sua latência.
+
+        Com ``hedge``, a reserva é decidida só depois de obtida a vaga: o tempo
+        na fila do limitador não conta para o atraso, e nenhuma reserva é
+        enviada enquanto o limitador estiver cheio. A reserva ocupa uma vaga
+        própria (ver backup_attempt).
+
+        Args:
+            session: Sessão aiohttp
+            url: URL para buscar
+
+        Returns:
+            Conteúdo HTML da página, em bytes UTF-8
+        """
+        async with self.limiter.slot() as sample:
+            start = time.perf_counter()
+            try:
+                if self.hedge:
+                    sample.status, body = await hedged(
+                        lambda: self.attempt(session, url),
+                        self.latency,
+                        self.limiter.has_capacity,
+                        lambda: self.backup_attempt(session, url),
+                    )
+                else:
+                    sample.status, body = await self.attempt(session, url)
+            except aiohttp.ClientResponseError as e:
+                sample.status = e.status
+                raise
+            self.latency.add(time.perf_counter() - start)
+        self.progress.advance("requests")
+        return body
+
+    async def download(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """Faz a requisição de fato (com reserva, se ligada) e arquiva o corpo.
+
+        Args:
+            session: Sessão aiohttp
+            url: URL para buscar
+
+        Returns:
+            Conteúdo HTML da página, em bytes UTF-8
+        """
+        body = await self.request(session, url)
+
+        if self.archive is not None:
+            await self.archive_page(url, body)
+
+        return body
+
+    async def archive_page(self, url: str, body: bytes) -> None:
+        """Grava uma página no arquivo em uma thread, sem bloquear o loop de eventos.
+
+        A gravação (e a descarga) do segmento é feita fora do loop; o lock
+        mantém uma gravação por vez, já que o segmento atual é compartilhado.
+
+        Args:
+            url: URL da página
+            body: Corpo da resposta, em bytes
+        """
+        async with self._archive_lock:
+            await asyncio.to_thread(self.archive.append, url, body)
 
     async def get_book_info(self, session: aiohttp.ClientSession, url: str) -> set[str]:
         """Extrai links de personagens de uma página de livro.
@@ -53,6 +222,7 @@ class WikiCaller(BaseWikiCaller):
         Returns:
             Conjunto com URLs completas dos personagens
         """
+        site = self.site_for(url)
         html = await self.fetch(session, url)
         soup = HTMLParser(html)
         links = set()
@@ -63,7 +233,7 @@ class WikiCaller(BaseWikiCaller):
             href = a.attributes.get("href") if hasattr(a, "attributes") else None
 
             if href and href.startswith("/"):
-                links.add(self.url_personagem_base + href)
+                links.add(site.absolute(href))
 
         return links
 
@@ -83,55 +253,60 @@ class WikiCaller(BaseWikiCaller):
         soup = HTMLParser(html)
 
         # Verifica se tem banner OU informações biográficas
-        if self.have_banner(soup):
+        site = self.site_for(href)
+        if self.have_banner(soup, site):
             return href
 
-        if self.have_informacoes_bibliograficas(soup):
+        if self.have_informacoes_bibliograficas(soup, site):
             return href
 
         return None
 
-    def have_banner(self, soup: HTMLParser) -> bool:
+    def have_banner(self, soup: HTMLParser, site: SiteProfile | None = None) -> bool:
         """Verifica se o personagem tem banner de nascimento.
 
         Args:
             soup: Objeto HTMLParser com HTML da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem banner de "Nascimento"
+            True se tem o rótulo de nascimento do site ("Nascimento" no pt-br)
         """
         labels = soup.css("h3.pi-data-label.pi-secondary-font")
+        expected = (site or self.sites[0]).birth_label
 
         for label in labels:
-            if label.text() == "Nascimento":
+            if label.text() == expected:
                 return True
 
         return False
 
-    def have_informacoes_bibliograficas(self, soup: HTMLParser) -> bool:
+    def have_informacoes_bibliograficas(
+        self, soup: HTMLParser, site: SiteProfile | None = None
+    ) -> bool:
         """Verifica se tem seção de informações biográficas.
 
         Args:
             soup: Objeto HTMLParser com HTML da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem seção "Informações biográficas"
+            True se tem a seção biográfica do site ("Informações biográficas" no pt-br)
         """
         css_selector = (
             "h2.pi-item.pi-header.pi-secondary-font."
             "pi-item-spacing.pi-secondary-background > center"
         )
         headers = soup.css(css_selector)
+        expected = (site or self.sites[0]).bio_header
 
         for header in headers:
-            if header.text() == "Informações biográficas":
+            if header.text() == expected:
                 return True
 
         return False
 
-    async def get_character_info(
-        self, session: aiohttp.ClientSession, url: str
-    ) -> dict[str, str | list[str]]:
+    async def get_character_info(self, session: aiohttp.ClientSession, url: str) -> CharacterRecord:
         """Extrai informações de um personagem.
 
         Args:
@@ -139,7 +314,7 @@ class WikiCaller(BaseWikiCaller):
             url: Link da página do personagem
 
         Returns:
-            Dicionário com informações do personagem
+            Registro com as informações do personagem
         """
         # Busca HTML (pode estar em cache)
         if url in self.cache:
@@ -156,49 +331,71 @@ class WikiCaller(BaseWikiCaller):
             strip=True
         )
 
-        # Extrai os nomes das colunas sem acentos
-        columns = []
+        # Extrai os rótulos dos campos (normalizados em CharacterRecord)
+        labels = []
         for col in soup.css("h3.pi-data-label.pi-secondary-font"):
-            name_without_accents = self.remove_accents(col.text(strip=True))
-            columns.append(name_without_accents)
+            labels.append(col.text(strip=True))
 
-        # Extrai os valores de cada campo
-        infos = []
+        # Extrai os valores de cada campo e os links para outras páginas do wiki
+        site = self.site_for(url)
+        values = []
+        links = []
         for el in soup.css("div.pi-data-value.pi-font"):
-            # Se tem lista (múltiplos <li>), converte para lista
+            # Se tem lista (múltiplos <li>), converte para lista; senão guarda o texto
             list_items = el.css("li")
             if list_items:
                 item_texts = []
                 for li in list_items:
                     item_texts.append(li.text(strip=True))
-                infos.append(item_texts)
+                values.append(item_texts)
             else:
-                infos.append([el.text()])
+                values.append(el.text())
+
+            targets = []
+            for a in el.css("a"):
+                target = site.link_target(a.attributes.get("href"))
+                if target is not None:
+                    targets.append(target)
+            links.append(targets)
+
+        return CharacterRecord.from_infobox(
+            nome, url, labels, values, site.name, site.field_map, links
+        )
+
+    async def gather(self, stage: str, coros: list) -> list:
+        """Como ``asyncio.gather``, contando no progresso cada corrotina concluída.
 
-        # Monta dicionário com pares coluna:valor
-        data = {}
-        for column, info in zip(columns, infos):
-            data[column] = info
+        Args:
+            stage: Etapa do progresso
+            coros: Corrotinas a executar
+
+        Returns:
+            Resultados, na ordem das corrotinas
+        """
+        self.progress.add_total(stage, len(coros))
 
-        data["Nome"] = nome
-        data["url"] = url
+        async def counted(coro):
+            try:
+                return await coro
+            finally:
+                self.progress.advance(stage)
 
-        return data
+        return await asyncio.gather(*[counted(coro) for coro in coros])
 
     async def get_book_data(self):
         """Coleta e verifica links de personagens de todos os livros."""
         logger.info("Fetching character links...")
 
-        async with aiohttp.ClientSession() as session:
+        async with self.client_session() as session:
             # Busca links de todos os livros em paralelo
-            book_links = await async_tqdm.gather(
-                *[self.get_book_info(session, url) for url in self.url_livros],
-                desc="Fetching links from books...",
+            book_links = await self.gather(
+                "books", [self.get_book_info(session, url) for url in self.url_livros]
             )
 
             # Junta todos os links removendo duplicatas
             all_links = []
-            for links in book_links:
+            for livro, links in zip(self.url_livros, book_links):
+                self.register_book_links(livro, links)
                 all_links.extend(links)
 
             # Remove duplicatas mantendo ordem
@@ -212,9 +409,8 @@ class WikiCaller(BaseWikiCaller):
             logger.info("Verifying character links...")
 
             # Verifica todos os links em paralelo
-            verified = await async_tqdm.gather(
-                *[self.verify_href(session, href) for href in unique_links],
-                desc="Verifying characters links...",
+            verified = await self.gather(
+                "links", [self.verify_href(session, href) for href in unique_links]
             )
 
             # Remove valores None
@@ -233,29 +429,215 @@ class WikiCaller(BaseWikiCaller):
 
     async def get_char_data(self):
         """Extrai informações de todos os personagens verificados."""
-        async with aiohttp.ClientSession() as session:
-            data = await async_tqdm.gather(
-                *[self.get_character_info(session, url) for url in self.verified_characters],
-                desc="Fetching character data...",
+        async with self.client_session() as session:
+            data = await self.gather(
+                "characters",
+                [self.get_character_info(session, url) for url in self.verified_characters],
             )
 
             # Limpa dados usando método da classe base
-            self.list_of_dicts = self.clean_character_data(data)
+            self.collect_records(data)
+
+    async def discover(
+        self, session: aiohttp.ClientSession, url: str, queue: asyncio.Queue, seen: set[str]
+    ) -> None:
+        """Etapa de descoberta: envia os links de um livro para a fila de verificação.
+
+        Args:
+            session: Sessão aiohttp
+            url: Link da página do livro
+            queue: Fila de links a verificar
+            seen: URLs canônicas já enviadas por qualquer livro (evita duplicatas)
+        """
+        if self.deadline.expired():
+            self.skip("books")
+            return
+
+        try:
+            links = await self.get_book_info(session, url)
+        except Exception as e:
+            logger.error(f"Erro ao buscar links de {url}: {e}")
+            return
+        finally:
+            self.progress.advance("books")
+
+        self.register_book_links(url, links)
+        for link in links:
+            key = canonical_url(link)
+            if key not in seen:
+                seen.add(key)
+                self.progress.add_total("links")
+                await queue.put(link)
+
+    async def verify_worker(
+        self, session: aiohttp.ClientSession, inbox: asyncio.Queue, outbox: asyncio.Queue
+    ) -> None:
+        """Etapa de verificação: repassa para extração os links que são personagens.
+
+        Args:
+            session: Sessão aiohttp
+            inbox: Fila de links a verificar (``None`` encerra o worker)
+            outbox: Fila de personagens a extrair
+        """
+        while (href := await inbox.get()) is not None:
+            if self.deadline.expired():
+                self.skip("links")
+                continue
+
+            try:
+                verified = await self.verify_href(session, href)
+            except Exception as e:
+                logger.error(f"Erro ao verificar {href}: {e}")
+                continue
+            finally:
+                self.progress.advance("links")
+
+            if verified is not None:
+                self.verified_characters.append(verified)
+                self.progress.add_total("characters")
+                await outbox.put(verified)
+
+    async def extract_worker(
+        self, session: aiohttp.ClientSession, inbox: asyncio.Queue, outbox: asyncio.Queue
+    ) -> None:
+        """Etapa de extração: extrai os dados de cada personagem verificado.
+
+        A página já está no cache, pois foi baixada na verificação.
+
+        Args:
+            session: Sessão aiohttp
+            inbox: Fila de personagens a extrair (``None`` encerra o worker)
+            outbox: Fila de registros a escrever
+        """
+        while (url := await inbox.get()) is not None:
+            if self.deadline.expired():
+                self.skip("characters")
+                continue
+
+            try:
+                char_info = await self.get_character_info(session, url)
+            except Exception as e:
+                logger.error(
+                    f"Erro ao extrair dados de {url}: {e}. "
+                    f"Verifique se a estrutura HTML da página mudou."
+                )
+                continue
+            finally:
+                self.progress.advance("characters")
+
+            await outbox.put(char_info)
+
+    async def write_worker(
+        self, inbox: asyncio.Queue, extracted: list, journal: BackgroundWriter
+    ) -> None:
+        """Etapa de escrita: acumula os registros extraídos e os grava no journal.
+
+        Cada registro vai para o journal assim que chega, gravado por uma thread
+        enquanto as outras etapas continuam fazendo requisições. A limpeza (com a
+        remoção de duplicatas, que mantém o primeiro registro) fica para o fim
+        do pipeline, com os registros em ordem de url: na ordem de chegada, a
+        duplicata mantida mudaria de uma execução para outra.
+
+        Args:
+            inbox: Fila de registros (``None`` encerra o worker)
+            extracted: Lista que recebe os registros extraídos
+            journal: Escritor em segundo plano do arquivo JSONL
+        """
+        while (char_info := await inbox.get()) is not None:
+            extracted.append(char_info)
+            await journal.write(char_info)
+
+    @staticmethod
+    async def close_stage(queue: asyncio.Queue, workers: list[asyncio.Task]) -> None:
+        """Encerra uma etapa: envia um ``None`` por worker e espera todos terminarem.
+
+        Args:
+            queue: Fila de entrada da etapa
+            workers: Tarefas que consomem a fila
+        """
+        for _ in workers:
+            await queue.put(None)
+
+        await asyncio.gather(*workers)
+
+    async def pipeline(self) -> None:
+        """Executa descoberta, verificação, extração e escrita em pipeline.
+
+        As etapas são ligadas por filas ``asyncio.Queue``: um personagem é extraído
+        e escrito assim que é verificado, sem esperar que a etapa anterior termine
+        para todos os links.
+        """
+        verify_queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        extract_queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        write_queue = asyncio.Queue()
+        extracted = []
+        seen = set()
+        self.verified_characters = []
+        self.deadline = self.crawl_deadline()
+
+        journal = BackgroundWriter(
+            self.journal_path, flush_interval=self.flush_interval, fsync=self.fsync
+        )
+
+        # O arquivo de páginas é fechado (índice descarregado, mapeamentos
+        # desfeitos) mesmo se uma etapa falhar ou a coleta for cancelada
+        try:
+            async with self.client_session() as session, journal:
+                verifiers = [
+                    asyncio.create_task(self.verify_worker(session, verify_queue, extract_queue))
+                    for _ in range(self.concurrency)
+                ]
+                extractors = [
+                    asyncio.create_task(self.extract_worker(session, extract_queue, write_queue))
+                    for _ in range(self.concurrency)
+                ]
+                writer = asyncio.create_task(self.write_worker(write_queue, extracted, journal))
+
+                logger.info("Fetching, verifying and extracting characters...")
+                self.progress.add_total("books", len(self.url_livros))
+                await asyncio.gather(
+                    *[self.discover(session, url, verify_queue, seen) for url in self.url_livros]
+                )
+
+                await self.close_stage(verify_queue, verifiers)
+                await self.close_stage(extract_queue, extractors)
+                await self.close_stage(write_queue, [writer])
+        finally:
+            if self.archive is not None:
+                async with self._archive_lock:
+                    await asyncio.to_thread(self.archive.close)
+
+        # Ordem estável, como nos outros modos: a url decide qual duplicata fica
+        self.verified_characters.sort()
+        extracted.sort(key=lambda record: record["url"])
+        self.collect_records(extracted)
+        logger.info(self.limiter.summary())
+        if self.hedge:
+            logger.info(self.latency.summary())
+        self.log_skipped()
+        logger.info(f"{self.flights.shared} request(s) shared with one already in flight")
+        logger.info(f"Got info for {len(self.records)} characters")
 
     async def run(self) -> None:
         """Executa o pipeline completo de scraping.
 
         Passos:
-        1. Coleta e verifica links de forma assíncrona
-        2. Extrai dados de cada personagem de forma assíncrona
-        3. Salva em CSV e DuckDB
+        1. Abre o transporte, aquecendo conexões a cada site
+        2. Descobre, verifica e extrai personagens em pipeline assíncrono,
+           gravando o journal JSONL em segundo plano
+        3. Salva em CSV, DuckDB e índice de busca, em uma thread para não
+           bloquear o loop de eventos
         """
         now = pend.now()
 
-        await self.get_book_data()
-        await self.get_char_data()
-        self.save_data_to_duckdb()
-        self.save_to_csv()
+        async with self.transport:
+            prewarm = min(self.transport.config.prewarm, self.concurrency)
+            hosts = dict.fromkeys(site.base_url for site in self.sites)
+            await self.transport.prewarm(hosts, prewarm)
+            with self.progress:
+                await self.pipeline()
+        logger.info(self.transport.summary())
+        await asyncio.to_thread(self.save_outputs)
 
         logger.info(f"Data collected and saved in {(pend.now() - now).in_words(locale='en_us')}")
 
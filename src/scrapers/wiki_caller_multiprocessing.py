@@ -1,33 +1,267 @@
 """Scraper paralelo usando pathos e selectolax."""
 
-from urllib.parse import unquote
+import os
+import queue
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 
 import pendulum as pend
 import requests
 from loguru import logger
-from pathos.multiprocessing import ProcessingPool as Pool
+from pathos.pools import _ProcessPool as Pool
 from selectolax.lexbor import LexborHTMLParser as HTMLParser
-from tqdm import tqdm
 
+from .archive import ArchivedPage, PageArchive
 from .base import BaseWikiCaller
+from .concurrency import CONNECT_TIMEOUT, REQUEST_TIMEOUT, AdaptiveLimiter
+from .profiling import start_worker
+from .records import CharacterRecord
+from .singleflight import canonical_url
+from .sites import DEFAULT_SITES, SiteProfile
 
 pend.set_locale("en_us")
 
+# Seletores CSS usados em todas as páginas, montados uma única vez
+SELETOR_LINKS_LIVRO = "div.mw-parser-output > p > a"
+SELETOR_NOME = "h2.pi-item.pi-item-spacing.pi-title.pi-secondary-background"
+SELETOR_ROTULOS = "h3.pi-data-label.pi-secondary-font"
+SELETOR_VALORES = "div.pi-data-value.pi-font"
+SELETOR_CABECALHOS = (
+    "h2.pi-item.pi-header.pi-secondary-font.pi-item-spacing.pi-secondary-background > center"
+)
+
 
 class WikiCaller(BaseWikiCaller):
     """Scraper paralelo para personagens do Wiki de Harry Potter.
 
-    Usa pathos.multiprocessing para processar múltiplas páginas simultaneamente
+    Usa um pool de processos do pathos para processar múltiplas páginas simultaneamente
     e selectolax para parsing HTML mais rápido que BeautifulSoup.
     """
 
-    def __init__(self):
-        """Inicializa o scraper paralelo."""
-        super().__init__()
+    def __init__(
+        self,
+        processes: int | None = None,
+        sites: Iterable[str | SiteProfile] = DEFAULT_SITES,
+        archive_dir: str | None = None,
+        offline: bool = False,
+        request_timeout: float = REQUEST_TIMEOUT,
+        crawl_timeout: float | None = None,
+    ):
+        """Inicializa o scraper paralelo.
+
+        Args:
+            processes: Número de processos workers (padrão: um por núcleo), que
+                também é o limite máximo de requisições simultâneas
+            sites: Sites coletados juntos, pelo mesmo pool e sob o mesmo limitador
+            archive_dir: Diretório do arquivo de páginas (ver archive.py). Cada
+                página baixada é gravada nele
+            offline: Lê as páginas só do arquivo, sem rede (reextração)
+            request_timeout: Prazo de cada requisição dos workers (espera pela
+                conexão e entre dois trechos da resposta), em segundos
+            crawl_timeout: Orçamento da coleta, somadas as etapas despachadas ao
+                pool, em segundos (padrão: sem limite)
+        """
+        if offline and archive_dir is None:
+            raise ValueError("O modo offline precisa de um arquivo de páginas")
+
+        super().__init__(sites, request_timeout, crawl_timeout)
         self.setup_logger()
         self.href_personagens = []
         self.verified_characters = []
+        self.character_data = {}
+        self.processes = processes
         self.session = requests.Session()
+        self.samples = []
+        self._parsed = None
+        self.archive_dir = archive_dir
+        self.offline = offline
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+
+        # Sem rede não há latência a medir: o pool trabalha com todos os processos
+        max_limit = processes or os.cpu_count() or 1
+        initial = max_limit if offline else min(4, max_limit)
+        self.limiter = AdaptiveLimiter(initial=initial, max_limit=max_limit)
+
+    @contextmanager
+    def pool(self) -> Iterator[Pool]:
+        """Cria o pool de processos com um scraper local por worker.
+
+        Ao sair do bloco sem erro, o pool é fechado e os workers terminam
+        normalmente (o que permite salvar o perfil de cada um); com erro, os
+        workers são encerrados.
+
+        Yields:
+            Pool de processos inicializado por init_worker()
+        """
+        pool = Pool(
+            processes=self.processes,
+            initializer=init_worker,
+            initargs=(self.sites, self.archive_dir, self.offline, self.request_timeout),
+        )
+        try:
+            yield pool
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    def fetch(self, url: str) -> requests.Response | ArchivedPage:
+        """Faz uma requisição e guarda sua latência e status em ``self.samples``.
+
+        As amostras voltam ao processo principal junto com o resultado de cada
+        tarefa e alimentam o limitador adaptativo. Com arquivo de páginas, as
+        respostas com sucesso são gravadas nele; no modo offline, a página é
+        lida do arquivo em vez da rede.
+
+        Args:
+            url: URL para buscar
+
+        Returns:
+            Resposta HTTP, ou a página arquivada no modo offline
+
+        Raises:
+            KeyError: No modo offline, se a página não estiver no arquivo
+        """
+        if self.offline:
+            return self.archive.page(url)
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=(CONNECT_TIMEOUT, self.request_timeout))
+        except requests.RequestException:
+            self.samples.append((time.perf_counter() - start, None))
+            raise
+
+        self.samples.append((time.perf_counter() - start, response.status_code))
+        if self.archive is not None and response.ok:
+            self.archive.append(url, response.content)
+        return response
+
+    def parse(self, response: requests.Response) -> HTMLParser:
+        """Faz o parsing do corpo de uma resposta, em bytes.
+
+        Usa ``response.content`` (bytes UTF-8) em vez de ``response.text``, que
+        detectaria a codificação e decodificaria a página inteira. A última
+        árvore é reaproveitada, então verificar e extrair a mesma resposta custa
+        um único parsing.
+
+        Args:
+            response: Resposta HTTP da página
+
+        Returns:
+            Árvore HTML da página
+        """
+        if self._parsed is None or self._parsed[0] is not response:
+            self._parsed = (response, HTMLParser(response.content))
+        return self._parsed[1]
+
+    def drain_samples(self) -> list[tuple[float, int | None]]:
+        """Devolve e esvazia as amostras de requisições acumuladas."""
+        samples, self.samples = self.samples, []
+        return samples
+
+    def chunksize(self, n_tasks: int) -> int:
+        """Calcula o tamanho dos lotes enviados a cada worker.
+
+        Usa cerca de quatro lotes por worker: lotes grandes reduzem a
+        comunicação entre processos, lotes pequenos equilibram a carga e deixam
+        o limitador ajustar o paralelismo ao longo da etapa.
+
+        Args:
+            n_tasks: Número total de tarefas
+
+        Returns:
+            Número de tarefas por lote
+        """
+        processes = self.processes or os.cpu_count() or 1
+        return max(1, n_tasks // (processes * 4))
+
+    def dispatch(
+        self, pool: Pool, task: Callable, items: list[str], stage: str | None = None
+    ) -> Iterator[tuple]:
+        """Executa uma tarefa por item no pool, em lotes, respeitando o limite adaptativo.
+
+        Os itens vão aos workers em lotes de chunksize() itens (ver
+        chunk_task). Cada lote ocupa um worker, que faz suas requisições uma
+        por vez, então o processo principal só despacha um novo lote quando há
+        vaga no limitador. Cada resultado traz as amostras das requisições
+        feitas pelo worker, que ajustam o limite para os próximos lotes. Os
+        resultados e as amostras também são contados no progresso (os workers
+        não exibem nada).
+
+        Esgotado o orçamento da coleta (``crawl_timeout``), nenhum lote novo é
+        despachado; os que já estão nos workers terminam dentro do prazo de
+        cada requisição, então um servidor lento não segura a etapa inteira.
+
+        Args:
+            pool: Pool criado por pool()
+            task: Tarefa do worker, que devolve uma tupla terminada pelas amostras
+            items: URLs a processar
+            stage: Etapa do progresso contada a cada resultado
+
+        Yields:
+            Resultados das tarefas (sem as amostras), na ordem em que os lotes
+            ficam prontos
+        """
+        done = queue.SimpleQueue()
+        size = self.chunksize(len(items))
+        chunks = iter([items[i : i + size] for i in range(0, len(items), size)])
+        in_flight = {}  # id do lote -> número de itens
+        exhausted = False
+        dispatched = 0
+        deadline = self.crawl_deadline()
+        if stage is not None:
+            self.progress.add_total(stage, len(items))
+
+        def finished(chunk_id: int) -> Callable:
+            return lambda result: done.put((chunk_id, result))
+
+        while True:
+            if not exhausted and deadline.expired():
+                self.skip(stage or task.__name__, len(items) - dispatched)
+                exhausted = True
+
+            while not exhausted and self.limiter.try_acquire():
+                chunk = next(chunks, None)
+                if chunk is None:
+                    self.limiter.release()
+                    exhausted = True
+                    break
+                chunk_id = dispatched
+                in_flight[chunk_id] = len(chunk)
+                dispatched += len(chunk)
+                pool.apply_async(
+                    chunk_task,
+                    (task, chunk),
+                    callback=finished(chunk_id),
+                    error_callback=finished(chunk_id),
+                )
+
+            if not in_flight:
+                return
+
+            chunk_id, results = done.get()
+            count = in_flight.pop(chunk_id)
+            self.limiter.release()
+
+            if isinstance(results, BaseException):
+                logger.error(f"Erro em um worker: {results}")
+                if stage is not None:
+                    self.progress.advance(stage, count)
+                continue
+
+            for *values, samples in results:
+                for latency, status in samples:
+                    self.limiter.record(latency, status)
+                self.progress.advance("requests", len(samples))
+                if stage is not None:
+                    self.progress.advance(stage)
+
+                yield tuple(values)
 
     def get_book_info(self, url: str) -> list[str]:
         """Extrai links de personagens de uma página de livro.
@@ -38,23 +272,22 @@ class WikiCaller(BaseWikiCaller):
         Returns:
             Lista com URLs completas dos personagens
         """
-        response = self.session.get(url)
-        soup = HTMLParser(response.text)
+        site = self.site_for(url)
+        response = self.fetch(url)
+        soup = self.parse(response)
 
         links = set()
 
         # Busca todos os links dentro de parágrafos
-        all_links = soup.css("div.mw-parser-output > p > a")
-        for a in tqdm(
-            all_links,
-            desc=f"Getting book info for {unquote(url.split('/')[-1])}",
-        ):
+        all_links = soup.css(SELETOR_LINKS_LIVRO)
+        for a in all_links:
             href = a.attributes.get("href") if hasattr(a, "attributes") else None
 
             if href and href.startswith("/"):
-                links.add(self.url_personagem_base + href)
+                links.add(site.absolute(href))
 
-        return list(links)
+        # Ordenados: a ordem de um set de str muda a cada processo
+        return sorted(links)
 
     def verify_href(self, href: str) -> str | None:
         """Verifica se um link é de personagem válido.
@@ -71,157 +304,194 @@ class WikiCaller(BaseWikiCaller):
         if href in self.cache:
             response = self.cache[href]
         else:
-            response = self.session.get(href)
+            response = self.fetch(href)
             self.cache[href] = response
 
         # Verifica se tem banner OU informações biográficas
-        if self.have_banner(response):
+        site = self.site_for(href)
+        if self.have_banner(response, site):
             return href
 
-        if self.have_informacoes_bibliograficas(response):
+        if self.have_informacoes_bibliograficas(response, site):
             return href
 
         return None
 
-    def get_character_info(self, url: str) -> dict:
+    def get_character_info(self, url: str) -> CharacterRecord:
         """Visita a página de um personagem e extrai suas informações.
 
         Args:
             url: Link da página do personagem
 
         Returns:
-            Dicionário com informações do personagem
+            Registro com as informações do personagem
         """
         # Usa cache se disponível
         if url in self.cache:
             response = self.cache[url]
         else:
-            response = self.session.get(url)
+            response = self.fetch(url)
 
-        soup = HTMLParser(response.text)
+        soup = self.parse(response)
 
         # Extrai o nome do personagem
-        nome = soup.css_first(
-            "h2.pi-item.pi-item-spacing.pi-title.pi-secondary-background"
-        ).text(strip=True)
-
-        # Extrai os nomes das colunas sem acentos
-        column_names = []
-        for col in soup.css("h3.pi-data-label.pi-secondary-font"):
-            name_without_accents = self.remove_accents(col.text(strip=True))
-            column_names.append(name_without_accents)
-
-        # Extrai os valores de cada campo
-        infos = []
-        for el in soup.css("div.pi-data-value.pi-font"):
-            # Se tem lista (múltiplos <li>), converte para lista
+        nome = soup.css_first(SELETOR_NOME).text(strip=True)
+
+        # Extrai os rótulos dos campos (normalizados em CharacterRecord)
+        labels = []
+        for col in soup.css(SELETOR_ROTULOS):
+            labels.append(col.text(strip=True))
+
+        # Extrai os valores de cada campo e os links para outras páginas do wiki
+        site = self.site_for(url)
+        values = []
+        links = []
+        for el in soup.css(SELETOR_VALORES):
+            # Se tem lista (múltiplos <li>), converte para lista; senão guarda o texto
             list_items = el.css("li")
             if list_items:
                 item_texts = []
                 for li in list_items:
                     item_texts.append(li.text(strip=True))
-                infos.append(item_texts)
+                values.append(item_texts)
             else:
-                infos.append([el.text()])
-
-        # Monta dicionário com pares coluna:valor
-        data = {}
-        for column, info in zip(column_names, infos):
-            data[column] = info
+                values.append(el.text())
 
-        data["Nome"] = nome
-        data["url"] = url
+            targets = []
+            for a in el.css("a"):
+                target = site.link_target(a.attributes.get("href"))
+                if target is not None:
+                    targets.append(target)
+            links.append(targets)
 
-        return data
+        return CharacterRecord.from_infobox(
+            nome, url, labels, values, site.name, site.field_map, links
+        )
 
-    def have_banner(self, response: requests.Response) -> bool:
+    def have_banner(self, response: requests.Response, site: SiteProfile | None = None) -> bool:
         """Verifica se o personagem tem banner de nascimento.
 
         Args:
             response: Resposta HTTP da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem banner de "Nascimento"
+            True se tem o rótulo de nascimento do site ("Nascimento" no pt-br)
         """
-        soup = HTMLParser(response.text)
-        labels = soup.css("h3.pi-data-label.pi-secondary-font")
+        soup = self.parse(response)
+        labels = soup.css(SELETOR_ROTULOS)
+        expected = (site or self.sites[0]).birth_label
 
         for label in labels:
-            if label.text() == "Nascimento":
+            if label.text() == expected:
                 return True
 
         return False
 
-    def have_informacoes_bibliograficas(self, response: requests.Response) -> bool:
+    def have_informacoes_bibliograficas(
+        self, response: requests.Response, site: SiteProfile | None = None
+    ) -> bool:
         """Verifica se tem seção de informações biográficas.
 
         Args:
             response: Resposta HTTP da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem seção "Informações biográficas"
+            True se tem a seção biográfica do site ("Informações biográficas" no pt-br)
         """
-        soup = HTMLParser(response.text)
+        soup = self.parse(response)
 
-        css_selector = (
-            "h2.pi-item.pi-header.pi-secondary-font."
-            "pi-item-spacing.pi-secondary-background > center"
-        )
-        headers = soup.css(css_selector)
+        headers = soup.css(SELETOR_CABECALHOS)
+        expected = (site or self.sites[0]).bio_header
 
         for header in headers:
-            if header.text() == "Informações biográficas":
+            if header.text() == expected:
                 return True
 
         return False
 
     def get_data(self) -> None:
-        """Coleta e verifica links de personagens de todos os livros em paralelo."""
+        """Coleta e verifica links de personagens de todos os livros em paralelo.
+
+        Os personagens verificados já são extraídos pelo mesmo worker, e os
+        resultados voltam em fluxo conforme ficam prontos.
+        """
         logger.info("Getting book info...")
 
-        with Pool() as pool:
-            # Processa todos os livros em paralelo
-            all_book_links = pool.map(self.get_book_info, self.url_livros)
+        with self.pool() as pool:
+            # Processa todos os livros em paralelo, contando cada um que termina
+            self.progress.add_total("books", len(self.url_livros))
+            all_book_links = []
+            for book_links in pool.imap(book_task, self.url_livros):
+                all_book_links.append(book_links)
+                self.progress.advance("books")
 
             logger.info("Flattening all the hrefs from all books...")
 
             # Junta todos os links e remove duplicatas
             all_links = []
-            for book_links in all_book_links:
+            for livro, book_links in zip(self.url_livros, all_book_links):
+                self.register_book_links(livro, book_links)
                 all_links.extend(book_links)
 
-            # Remove duplicatas mantendo ordem
+            # Remove duplicatas (pela URL canônica) mantendo ordem
             unique_links = []
             seen = set()
             for link in all_links:
-                if link not in seen:
-                    seen.add(link)
+                key = canonical_url(link)
+                if key not in seen:
+                    seen.add(key)
                     unique_links.append(link)
 
             self.href_personagens = unique_links
 
             logger.info("Verifying hrefs...")
 
-            # Verifica todos os links em paralelo
-            verified = pool.map(self.verify_href, self.href_personagens)
+            # Verifica (e extrai) todos os links em paralelo
+            self.verified_characters = []
+            for href, char_info in self.dispatch(pool, verify_task, self.href_personagens, "links"):
+                if href is None:
+                    continue
 
-            logger.success("Verified all characters")
+                self.verified_characters.append(href)
+                if char_info is not None:
+                    self.character_data[href] = char_info
 
-        # Remove valores None
-        self.verified_characters = []
-        for link in verified:
-            if link is not None:
-                self.verified_characters.append(link)
+            # Os lotes terminam em qualquer ordem: a URL define quem vence na
+            # remoção de duplicatas e a ordem da saída
+            self.verified_characters.sort()
+
+            logger.success("Verified all characters")
 
     def get_char_data(self) -> None:
-        """Extrai informações de todos os personagens em paralelo."""
+        """Extrai informações de todos os personagens em paralelo.
+
+        Só visita os personagens que ainda não foram extraídos em get_data().
+        """
         logger.info("Getting character info for all verified characters...")
 
-        with Pool() as pool:
-            data = pool.map(self.get_character_info, self.verified_characters)
+        pending = []
+        for url in self.verified_characters:
+            if url not in self.character_data:
+                pending.append(url)
 
-        # Limpa dados usando método da classe base
-        self.list_of_dicts = self.clean_character_data(data)
+        if pending:
+            with self.pool() as pool:
+                for url, char_info in self.dispatch(pool, extract_task, pending, "characters"):
+                    if char_info is not None:
+                        self.character_data[url] = char_info
+
+        data = []
+        for url in self.verified_characters:
+            if url in self.character_data:
+                data.append(self.character_data[url])
+
+        # Limpa dados usando método da classe base; os registros completos
+        # passam a existir só no lote colunar
+        self.collect_records(data)
+        self.character_data.clear()
+        logger.info(self.limiter.summary())
 
     def run(self) -> None:
         """Executa o pipeline completo de scraping.
@@ -229,18 +499,132 @@ class WikiCaller(BaseWikiCaller):
         Passos:
         1. Coleta e verifica links em paralelo
         2. Extrai dados de cada personagem em paralelo
-        3. Salva em CSV e DuckDB
+        3. Salva em CSV, DuckDB e índice de busca
         """
         now = pend.now()
 
-        self.get_data()
-        self.get_char_data()
-        self.save_to_csv()
-        self.save_data_to_duckdb()
+        with self.progress:
+            self.get_data()
+            self.get_char_data()
+        self.log_skipped()
+        self.save_outputs()
 
         logger.info(f"Data collected and saved in {(pend.now() - now).in_words()}")
 
 
+# Scraper local de cada processo worker, criado uma vez por init_worker()
+_worker = None
+
+
+def init_worker(
+    sites: Iterable[str | SiteProfile] = DEFAULT_SITES,
+    archive_dir: str | None = None,
+    offline: bool = False,
+    request_timeout: float = REQUEST_TIMEOUT,
+) -> None:
+    """Inicializa um processo worker.
+
+    Cria uma única vez por processo a sessão HTTP, o cache local e o estado do
+    scraper, de modo que as tarefas trafeguem apenas URLs entre os processos.
+    Com ``--profile``, também liga o perfil do worker.
+
+    Args:
+        sites: Sites coletados pelo processo principal
+        archive_dir: Diretório do arquivo de páginas; cada worker grava os
+            próprios segmentos
+        offline: Lê as páginas só do arquivo
+        request_timeout: Prazo de cada requisição, em segundos
+    """
+    global _worker
+    start_worker()
+    _worker = WikiCaller(
+        sites=sites, archive_dir=archive_dir, offline=offline, request_timeout=request_timeout
+    )
+
+
+def chunk_task(task: Callable, items: list[str]) -> list[tuple]:
+    """Tarefa do worker: executa ``task`` em cada item de um lote, em ordem.
+
+    Args:
+        task: Tarefa de um item (verify_task, extract_task)
+        items: Lote de URLs
+
+    Returns:
+        Resultado de ``task`` para cada item
+    """
+    return [task(item) for item in items]
+
+
+def book_task(url: str) -> list[str]:
+    """Tarefa do worker: extrai links de personagens de um livro.
+
+    Um livro que não responde no prazo (ou, na reextração, que não está no
+    arquivo de páginas) não derruba a coleta: fica sem links.
+    """
+    try:
+        return _worker.get_book_info(url)
+    except requests.RequestException as e:
+        logger.error(f"Erro ao buscar links de {url}: {e}")
+        return []
+    except KeyError as e:
+        logger.warning(f"Livro {url} fora do arquivo de páginas: {e}")
+        return []
+
+
+def verify_task(href: str) -> tuple[str | None, CharacterRecord | None, list]:
+    """Tarefa do worker: verifica um link e, se for personagem, já extrai seus dados.
+
+    A página baixada na verificação é reaproveitada na extração, então o
+    resultado volta ao processo principal sem uma segunda requisição. Depois,
+    personagem ou não, a página sai do cache do worker, que de outro modo
+    guardaria cada link rejeitado (feitiços, lugares, objetos) até o fim do pool.
+
+    Args:
+        href: URL para verificar
+
+    Returns:
+        Tupla (URL verificada, dados do personagem, amostras das requisições).
+        A URL e os dados são None se não for personagem; os dados são None se a
+        extração falhar.
+    """
+    try:
+        try:
+            verified = _worker.verify_href(href)
+        except Exception as e:
+            logger.error(f"Erro ao verificar {href}: {e}")
+            verified = None
+
+        if verified is None:
+            return None, None, _worker.drain_samples()
+
+        _, char_info, samples = extract_task(verified)
+        return verified, char_info, samples
+    finally:
+        _worker.cache.pop(href, None)
+
+
+def extract_task(url: str) -> tuple[str, CharacterRecord | None, list]:
+    """Tarefa do worker: extrai os dados de um personagem.
+
+    Args:
+        url: Link da página do personagem
+
+    Returns:
+        Tupla (URL, dados do personagem ou None se a extração falhar, amostras
+        das requisições)
+    """
+    try:
+        char_info = _worker.get_character_info(url)
+    except Exception as e:
+        logger.error(
+            f"Erro ao extrair dados de {url}: {e}. "
+            f"Verifique se a estrutura HTML da página mudou."
+        )
+        char_info = None
+
+    return url, char_info, _worker.drain_samples()
+
+
 if __name__ == "__main__":
     wiki = WikiCaller()
     wiki.run()
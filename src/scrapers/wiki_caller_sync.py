@@ -1,12 +1,16 @@
 """Scraper síncrono usando BeautifulSoup."""
 
+from collections.abc import Iterable
+
 import pendulum as pend
 import requests
 from bs4 import BeautifulSoup
 from loguru import logger
-from tqdm import tqdm
 
 from .base import BaseWikiCaller
+from .concurrency import CONNECT_TIMEOUT, REQUEST_TIMEOUT
+from .records import CharacterRecord
+from .sites import DEFAULT_SITES, SiteProfile
 
 pend.set_locale("en_us")
 
@@ -18,30 +22,69 @@ class WikiCaller(BaseWikiCaller):
     É a versão mais simples e lenta, mas também a mais fácil de entender.
     """
 
-    def __init__(self):
-        """Inicializa o scraper síncrono."""
-        super().__init__()
+    def __init__(
+        self,
+        sites: Iterable[str | SiteProfile] = DEFAULT_SITES,
+        request_timeout: float = REQUEST_TIMEOUT,
+        crawl_timeout: float | None = None,
+    ):
+        """Inicializa o scraper síncrono.
+
+        Args:
+            sites: Sites coletados, um depois do outro
+            request_timeout: Prazo de cada requisição (espera pela conexão e
+                entre dois trechos da resposta), em segundos
+            crawl_timeout: Orçamento da coleta, em segundos (padrão: sem limite)
+        """
+        super().__init__(sites, request_timeout, crawl_timeout)
         self.setup_logger()
         self.href_personagens = []
         self.verified_characters = []
 
-    def get_character_info(self, url: str) -> dict:
+    def fetch(self, url: str) -> requests.Response:
+        """Busca uma página com cache.
+
+        Args:
+            url: URL para buscar
+
+        Returns:
+            Resposta HTTP
+        """
+        if url in self.cache:
+            return self.cache[url]
+
+        response = self.request(url)
+        self.progress.advance("requests")
+        self.cache[url] = response
+        return response
+
+    def request(self, url: str) -> requests.Response:
+        """Faz uma requisição com o prazo configurado.
+
+        Args:
+            url: URL para buscar
+
+        Returns:
+            Resposta HTTP
+
+        Raises:
+            requests.Timeout: Se a conexão ou a resposta passar do prazo
+        """
+        return requests.get(url, timeout=(CONNECT_TIMEOUT, self.request_timeout))
+
+    def get_character_info(self, url: str) -> CharacterRecord:
         """Visita a página de um personagem e extrai suas informações.
 
         Args:
             url: Link da página do personagem
 
         Returns:
-            Dicionário com informações do personagem
+            Registro com as informações do personagem
         """
         # Usa cache se disponível, senão faz requisição
-        if url in self.cache:
-            response = self.cache[url]
-        else:
-            response = requests.get(url)
-            self.cache[url] = response
+        response = self.fetch(url)
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(response.content, "html.parser", from_encoding="utf-8")
 
         # Extrai o nome do personagem
         nome = soup.select_one(
@@ -54,8 +97,10 @@ class WikiCaller(BaseWikiCaller):
         for col in columns:
             column_names.append(col.text)
 
-        # Extrai os valores de cada campo
+        # Extrai os valores de cada campo e os links para outras páginas do wiki
+        site = self.site_for(url)
         infos = []
+        links = []
         for el in soup.select("div.pi-data-value.pi-font"):
             # Se tem lista (múltiplos <li>), junta com vírgulas
             list_items = el.select("li")
@@ -67,50 +112,57 @@ class WikiCaller(BaseWikiCaller):
             else:
                 infos.append(el.text)
 
-        # Monta dicionário com pares coluna:valor
-        data = {}
-        for col, info in zip(column_names, infos):
-            data[col] = [info]
-
-        data["Nome"] = nome
-        data["url"] = url
+            targets = []
+            for a in el.select("a"):
+                target = site.link_target(a.get("href"))
+                if target is not None:
+                    targets.append(target)
+            links.append(targets)
 
-        return data
+        return CharacterRecord.from_infobox(
+            nome, url, column_names, infos, site.name, site.field_map, links
+        )
 
-    def have_banner(self, soup: BeautifulSoup) -> bool:
+    def have_banner(self, soup: BeautifulSoup, site: SiteProfile | None = None) -> bool:
         """Verifica se o personagem tem banner de nascimento.
 
         Args:
             soup: Objeto BeautifulSoup com HTML da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem banner de "Nascimento"
+            True se tem o rótulo de nascimento do site ("Nascimento" no pt-br)
         """
         labels = soup.select("h3.pi-data-label.pi-secondary-font")
+        expected = (site or self.sites[0]).birth_label
 
         for label in labels:
-            if label.text == "Nascimento":
+            if label.text == expected:
                 return True
 
         return False
 
-    def have_informacoes_bibliograficas(self, soup: BeautifulSoup) -> bool:
+    def have_informacoes_bibliograficas(
+        self, soup: BeautifulSoup, site: SiteProfile | None = None
+    ) -> bool:
         """Verifica se tem seção de informações biográficas.
 
         Args:
             soup: Objeto BeautifulSoup com HTML da página
+            site: Site da página (padrão: o primeiro site coletado)
 
         Returns:
-            True se tem seção "Informações biográficas"
+            True se tem a seção biográfica do site ("Informações biográficas" no pt-br)
         """
         css_selector = (
             "h2.pi-item.pi-header.pi-secondary-font."
             "pi-item-spacing.pi-secondary-background > center"
         )
         headers = soup.select(css_selector)
+        expected = (site or self.sites[0]).bio_header
 
         for header in headers:
-            if header.text == "Informações biográficas":
+            if header.text == expected:
                 return True
 
         return False
@@ -127,19 +179,16 @@ class WikiCaller(BaseWikiCaller):
             A própria URL se for personagem válido, None caso contrário
         """
         # Usa cache se disponível
-        if href in self.cache:
-            response = self.cache[href]
-        else:
-            response = requests.get(href)
-            self.cache[href] = response
+        response = self.fetch(href)
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(response.content, "html.parser", from_encoding="utf-8")
 
         # Verifica se tem banner OU informações biográficas
-        if self.have_banner(soup):
+        site = self.site_for(href)
+        if self.have_banner(soup, site):
             return href
 
-        if self.have_informacoes_bibliograficas(soup):
+        if self.have_informacoes_bibliograficas(soup, site):
             return href
 
         return None
@@ -155,14 +204,16 @@ class WikiCaller(BaseWikiCaller):
         Returns:
             Lista com URLs completas dos personagens
         """
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, "html.parser")
+        site = self.site_for(url)
+        response = self.request(url)
+        self.progress.advance("requests")
+        soup = BeautifulSoup(response.content, "html.parser", from_encoding="utf-8")
 
         links_personagens = set()
 
         # Busca todos os links dentro de parágrafos
         all_links = soup.select("div.mw-parser-output > p > a")
-        for a in tqdm(all_links, desc=f"Getting book info for {url}"):
+        for a in all_links:
             href = a.get("href")
             if href:
                 links_personagens.add(href)
@@ -171,7 +222,7 @@ class WikiCaller(BaseWikiCaller):
         complete_links = []
         for link in links_personagens:
             if link.startswith("/"):
-                complete_links.append(self.url_personagem_base + link)
+                complete_links.append(site.absolute(link))
             else:
                 complete_links.append(link)
 
@@ -180,9 +231,20 @@ class WikiCaller(BaseWikiCaller):
     def get_data(self) -> None:
         """Coleta links de personagens de todos os livros."""
         all_links = []
-
-        for livro in tqdm(self.url_livros, desc="Getting book info for all books"):
-            book_links = self.get_book_info(livro)
+        self.progress.add_total("books", len(self.url_livros))
+        deadline = self.crawl_deadline()
+
+        for i, livro in enumerate(self.url_livros):
+            if deadline.expired():
+                self.skip("books", len(self.url_livros) - i)
+                break
+            self.progress.advance("books")
+            try:
+                book_links = self.get_book_info(livro)
+            except requests.RequestException as e:
+                logger.error(f"Erro ao buscar links de {livro}: {e}")
+                continue
+            self.register_book_links(livro, book_links)
             all_links.extend(book_links)
 
         self.href_personagens = all_links
@@ -190,9 +252,19 @@ class WikiCaller(BaseWikiCaller):
     def verify_links(self):
         """Verifica quais links são de personagens válidos."""
         verified = []
-
-        for href in tqdm(self.href_personagens, desc="Verifying character links..."):
-            result = self.verify_href(href)
+        self.progress.add_total("links", len(self.href_personagens))
+        deadline = self.crawl_deadline()
+
+        for i, href in enumerate(self.href_personagens):
+            if deadline.expired():
+                self.skip("links", len(self.href_personagens) - i)
+                break
+            self.progress.advance("links")
+            try:
+                result = self.verify_href(href)
+            except requests.RequestException as e:
+                logger.error(f"Erro ao verificar {href}: {e}")
+                continue
             if result is not None:
                 verified.append(result)
 
@@ -201,10 +273,15 @@ class WikiCaller(BaseWikiCaller):
     def get_char_data(self) -> None:
         """Extrai informações de todos os personagens verificados."""
         all_character_data = []
+        self.progress.add_total("characters", len(self.verified_characters))
+
+        deadline = self.crawl_deadline()
 
-        for link_personagem in tqdm(
-            self.verified_characters, desc="Getting character info..."
-        ):
+        for i, link_personagem in enumerate(self.verified_characters):
+            if deadline.expired():
+                self.skip("characters", len(self.verified_characters) - i)
+                break
+            self.progress.advance("characters")
             try:
                 char_info = self.get_character_info(link_personagem)
                 all_character_data.append(char_info)
@@ -216,7 +293,7 @@ class WikiCaller(BaseWikiCaller):
                 continue
 
         # Limpa dados usando método da classe base
-        self.list_of_dicts = self.clean_character_data(all_character_data)
+        self.collect_records(all_character_data)
         logger.info("Got all character info")
 
     def run(self) -> None:
@@ -226,15 +303,16 @@ class WikiCaller(BaseWikiCaller):
         1. Coleta links dos livros
         2. Verifica quais são personagens válidos
         3. Extrai dados de cada personagem
-        4. Salva em CSV e DuckDB
+        4. Salva em CSV, DuckDB e índice de busca
         """
         now = pend.now()
 
-        self.get_data()
-        self.verify_links()
-        self.get_char_data()
-        self.save_to_csv()
-        self.save_data_to_duckdb()
+        with self.progress:
+            self.get_data()
+            self.verify_links()
+            self.get_char_data()
+        self.log_skipped()
+        self.save_outputs()
 
         logger.info(f"Data collected and saved in {(pend.now() - now).in_words()}")
 
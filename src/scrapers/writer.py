@@ -0,0 +1,215 @@
+"""Escrita em segundo plano dos registros, sem bloquear o loop de eventos.
+
+O BackgroundWriter recebe registros do loop de eventos, agrupa-os em lotes e
+entrega cada lote a uma thread dedicada por uma fila limitada. A thread grava
+os lotes em um arquivo JSONL (um personagem por linha) enquanto o loop
+continua fazendo requisições. Quando a fila está cheia, ``write`` espera por
+vaga sem bloquear o loop, o que limita a memória ocupada por lotes pendentes.
+Uma tarefa no loop entrega a cada ``flush_interval`` segundos o lote incompleto
+parado, mesmo que nenhum registro novo chegue.
+
+Políticas de fsync:
+
+- ``never``: só ``flush`` (o sistema operacional decide quando gravar no disco)
+- ``interval``: ``fsync`` no máximo uma vez por ``flush_interval`` segundos
+- ``batch``: ``fsync`` após cada lote (mais seguro, mais lento)
+
+Em todas, o arquivo recebe ``fsync`` ao ser fechado (exceto em ``never``).
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+FSYNC_POLICIES = ("never", "interval", "batch")
+
+# Marca de fim da fila da thread de escrita
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Grava lotes de registros em JSONL a partir de uma thread dedicada."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 50,
+        max_pending: int = 8,
+        flush_interval: float = 1.0,
+        fsync: str = "interval",
+    ):
+        """Configura o escritor; a thread é criada em start().
+
+        Args:
+            path: Arquivo JSONL de saída (sobrescrito)
+            batch_size: Registros por lote entregue à thread
+            max_pending: Lotes aguardando a thread antes de ``write`` esperar
+            flush_interval: Segundos entre descargas de um lote incompleto e
+                entre ``flush``/``fsync`` do arquivo
+            fsync: Política de fsync (ver FSYNC_POLICIES)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync deve ser um de {FSYNC_POLICIES}, não {fsync!r}")
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self.written = 0
+        self.syncs = 0
+        self._batch = []
+        self._last_submit = time.monotonic()
+        self._queue = queue.Queue()
+        self._slots = None
+        self._loop = None
+        self._thread = None
+        self._ticker = None
+        self._error = None
+
+    async def __aenter__(self) -> "BackgroundWriter":
+        """Inicia a thread de escrita."""
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Descarrega o lote pendente e espera a thread terminar."""
+        await self.close()
+
+    def start(self) -> None:
+        """Abre o arquivo e inicia a thread; deve ser chamado dentro do loop."""
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        file = open(self.path, "w", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._run, args=(file,), name="background-writer", daemon=True
+        )
+        self._thread.start()
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def write(self, record) -> None:
+        """Acrescenta um registro ao lote atual, entregando-o quando estiver cheio.
+
+        Um lote incompleto também é entregue se o anterior saiu há mais de
+        ``flush_interval`` segundos, para que o arquivo acompanhe o progresso.
+
+        Args:
+            record: CharacterRecord ou dicionário
+        """
+        self._batch.append(record)
+        if (
+            len(self._batch) >= self.batch_size
+            or time.monotonic() - self._last_submit >= self.flush_interval
+        ):
+            await self.submit()
+
+    async def submit(self) -> None:
+        """Entrega o lote atual à thread, esperando vaga na fila se preciso."""
+        self._raise_error()
+        self._last_submit = time.monotonic()
+        if not self._batch:
+            return
+
+        # O lote só sai de self._batch com a vaga garantida: se a espera for
+        # cancelada, os registros continuam no lote para a próxima entrega
+        await self._slots.acquire()
+        if not self._batch:
+            self._slots.release()
+            return
+
+        batch, self._batch = self._batch, []
+        self._queue.put(batch)
+
+    async def close(self) -> None:
+        """Entrega o último lote, encerra a thread e propaga um erro de escrita."""
+        if self._thread is None:
+            return
+
+        self._ticker.cancel()
+        await asyncio.gather(self._ticker, return_exceptions=True)
+        try:
+            await self.submit()
+        finally:
+            self._queue.put(_STOP)
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+        self._raise_error()
+        logger.info(f"{self.written} registro(s) gravado(s) em {self.path} ({self.syncs} fsync)")
+
+    async def _tick(self) -> None:
+        """Entrega o lote incompleto parado há ``flush_interval`` segundos."""
+        while self._error is None:
+            await asyncio.sleep(self.flush_interval)
+            if self._batch and time.monotonic() - self._last_submit >= self.flush_interval:
+                await self.submit()
+
+    def _raise_error(self) -> None:
+        """Repassa ao loop um erro ocorrido na thread de escrita."""
+        if self._error is not None:
+            raise RuntimeError(f"Falha ao gravar {self.path}") from self._error
+
+    def _release(self) -> None:
+        """Libera uma vaga da fila (chamado no loop, a partir da thread)."""
+        self._slots.release()
+
+    def _sync(self, file) -> None:
+        """Descarrega o buffer do arquivo e, conforme a política, chama fsync."""
+        file.flush()
+        if self.fsync != "never":
+            os.fsync(file.fileno())
+            self.syncs += 1
+
+    def _run(self, file) -> None:
+        """Laço da thread: grava os lotes até receber a marca de fim."""
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    batch = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    batch = None
+
+                if batch is _STOP:
+                    break
+
+                if batch is not None:
+                    try:
+                        lines = []
+                        for record in batch:
+                            data = record.to_dict() if hasattr(record, "to_dict") else record
+                            lines.append(json.dumps(data, ensure_ascii=False) + "\n")
+                        file.writelines(lines)
+                        self.written += len(batch)
+                    finally:
+                        self._loop.call_soon_threadsafe(self._release)
+
+                    if self.fsync == "batch":
+                        self._sync(file)
+                        last_flush = time.monotonic()
+                        continue
+
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    if self.fsync == "interval":
+                        self._sync(file)
+                    else:
+                        file.flush()
+                    last_flush = time.monotonic()
+        except Exception as e:
+            self._error = e
+            # Libera quem espera por vaga: a thread não consumirá mais a fila
+            for _ in range(self.max_pending):
+                self._loop.call_soon_threadsafe(self._release)
+        finally:
+            try:
+                if self._error is None and self.fsync != "never":
+                    self._sync(file)
+            finally:
+                file.close()
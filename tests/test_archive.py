@@ -0,0 +1,162 @@
+"""Tests for the memory-mapped page archive and offline re-extraction."""
+
+import mmap
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.scrapers import WikiCallerAsync, WikiCallerMultiprocessing, wiki_caller_multiprocessing
+from src.scrapers.archive import PageArchive
+
+
+class TestPageArchive:
+    """Tests for PageArchive."""
+
+    def test_round_trip_is_zero_copy(self, tmp_path):
+        """Test pages read back as views over the mapped segment."""
+        with PageArchive(tmp_path, writer="a") as archive:
+            archive.append("u1", b"<p>one</p>")
+            archive.append("u2", "<p>dois ç</p>".encode())
+
+        archive = PageArchive(tmp_path)
+        view = archive.get("u2")
+        assert isinstance(view, memoryview)
+        assert isinstance(view.obj, mmap.mmap)
+        assert bytes(view).decode() == "<p>dois ç</p>"
+        assert archive.page("u1").content == b"<p>one</p>"
+        assert archive.get("missing") is None
+        assert len(archive) == 2 and "u1" in archive
+        with pytest.raises(KeyError):
+            archive.page("missing")
+        del view
+        archive.close()
+
+    def test_segments_rotate_and_writers_merge(self, tmp_path):
+        """Test each writer keeps its own segments and the latest write wins."""
+        with PageArchive(tmp_path, writer="1-a", segment_size=10) as first:
+            first.append("u1", b"x" * 12)
+            first.append("u2", b"y" * 5)
+        with PageArchive(tmp_path, writer="2-b") as second:
+            second.append("u1", b"newer")
+
+        assert sorted(p.name for p in tmp_path.glob("*.seg")) == [
+            "1-a-00000.seg",
+            "1-a-00001.seg",
+            "2-b-00000.seg",
+        ]
+        archive = PageArchive(tmp_path)
+        assert archive.page("u1").content == b"newer"
+        assert archive.page("u2").content == b"y" * 5
+        archive.close()
+
+    def test_incomplete_index_line_is_ignored(self, tmp_path):
+        """Test a line cut short by an interrupted process is skipped."""
+        with PageArchive(tmp_path, writer="a") as archive:
+            archive.append("u1", b"page")
+        with open(tmp_path / "a.idx", "a", encoding="utf-8") as f:
+            f.write("u2\ta-00000.seg\t4")
+
+        archive = PageArchive(tmp_path)
+        assert list(archive.index) == ["u1"]
+        archive.close()
+
+    def test_reads_pages_appended_after_mapping(self, tmp_path):
+        """Test a segment still being written is remapped when it grows."""
+        archive = PageArchive(tmp_path, writer="a")
+        archive.append("u1", b"first")
+        assert archive.page("u1").content == b"first"
+        archive.append("u2", b"second")
+        assert archive.page("u2").content == b"second"
+        archive.close()
+
+
+class TestReextraction:
+    """Tests for archiving while crawling and re-extracting offline."""
+
+    def test_fetch_archives_successful_pages(self, tmp_path, sample_character_page_html):
+        """Test pages downloaded by a worker are written to the archive."""
+        wiki = WikiCallerMultiprocessing(archive_dir=str(tmp_path))
+        wiki.session = Mock()
+        wiki.session.get.side_effect = [
+            Mock(ok=True, status_code=200, content=sample_character_page_html.encode()),
+            Mock(ok=False, status_code=404, content=b"not found"),
+        ]
+
+        wiki.fetch("https://example.com/harry")
+        wiki.fetch("https://example.com/missing")
+        wiki.archive.close()
+
+        archive = PageArchive(tmp_path)
+        assert list(archive.index) == ["https://example.com/harry"]
+        archive.close()
+
+    @pytest.mark.asyncio
+    async def test_async_download_archives_off_the_event_loop(self, tmp_path):
+        """Test the async scraper writes archived pages from a worker thread."""
+        wiki = WikiCallerAsync(archive_dir=str(tmp_path))
+        append = wiki.archive.append
+        threads = []
+
+        def tracked_append(url, body):
+            threads.append(threading.get_ident())
+            append(url, body)
+
+        async def request(session, url):
+            return b"<p>Harry</p>"
+
+        wiki.archive.append = tracked_append
+        wiki.request = request
+        await wiki.download(None, "https://example.com/harry")
+        wiki.archive.close()
+
+        assert threads and threading.get_ident() not in threads
+        archive = PageArchive(tmp_path)
+        assert bytes(archive.get("https://example.com/harry")) == b"<p>Harry</p>"
+        archive.close()
+
+    @pytest.mark.asyncio
+    async def test_async_pipeline_closes_archive_on_error(self, tmp_path, monkeypatch):
+        """Test a failing stage still closes the archive segment and index."""
+        monkeypatch.chdir(tmp_path)
+        wiki = WikiCallerAsync(concurrency=2, archive_dir=str(tmp_path / "pages"))
+        wiki.archive.append("https://example.com/harry", b"<p>Harry</p>")
+
+        async def discover(*args):
+            raise RuntimeError("stage failed")
+
+        wiki.discover = discover
+        with pytest.raises(RuntimeError):
+            await wiki.pipeline()
+
+        assert wiki.archive._segment is None and wiki.archive._index_file is None
+
+    def test_offline_scraper_reads_only_the_archive(self, tmp_path, sample_character_page_html):
+        """Test verification and extraction replay from disk without the network."""
+        with PageArchive(tmp_path) as archive:
+            archive.append("https://example.com/harry", sample_character_page_html.encode())
+
+        wiki = WikiCallerMultiprocessing(archive_dir=str(tmp_path), offline=True)
+        wiki.session = Mock()
+
+        assert wiki.verify_href("https://example.com/harry") == "https://example.com/harry"
+        assert wiki.get_character_info("https://example.com/harry")["Especie"] == "Humano"
+        with pytest.raises(KeyError):
+            wiki.fetch("https://example.com/other")
+        wiki.session.get.assert_not_called()
+        assert wiki.drain_samples() == []
+
+    def test_unarchived_book_yields_no_links(self, tmp_path):
+        """Test a book seed missing from the archive is skipped instead of aborting."""
+        with PageArchive(tmp_path) as archive:
+            archive.append("https://example.com/harry", b"<p>Harry</p>")
+
+        wiki_caller_multiprocessing.init_worker(archive_dir=str(tmp_path), offline=True)
+
+        assert wiki_caller_multiprocessing.book_task("https://example.com/wiki/Livro") == []
+        wiki_caller_multiprocessing._worker.archive.close()
+
+    def test_offline_requires_an_archive(self):
+        """Test the offline mode cannot run without an archive."""
+        with pytest.raises(ValueError):
+            WikiCallerMultiprocessing(offline=True)
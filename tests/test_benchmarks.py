@@ -0,0 +1,69 @@
+"""Tests for the synthetic corpus and the parse and transport benchmarks."""
+
+import pytest
+
+from benchmarks.corpus import corpus, make_page
+from benchmarks.parse import CASES, benchmark
+from benchmarks.transport import benchmark as transport_benchmark
+from src.scrapers import WikiCallerMultiprocessing, WikiCallerSync
+
+
+class TestCorpus:
+    """Tests for the page generator."""
+
+    def test_page_size_and_determinism(self):
+        """Test pages hit the requested size and the same seed gives the same page."""
+        page = make_page(1, size=100_000)
+        assert 95_000 < len(page.content) < 110_000
+        assert make_page(1, size=100_000) == page
+
+    def test_both_parsers_extract_the_infobox(self):
+        """Test the generated infobox is read alike by the sync and selectolax paths."""
+        page = make_page(7, size=50_000, fields=12, list_ratio=0.5)
+
+        sync = WikiCallerSync()
+        sync.cache[page.url] = page
+        wiki = WikiCallerMultiprocessing()
+        wiki.cache[page.url] = page
+
+        sync_record = sync.get_character_info(page.url)
+        record = wiki.get_character_info(page.url)
+
+        assert record.nome == sync_record.nome == page.nome
+        assert list(record.attributes) == list(sync_record.attributes)
+        assert len(record.attributes) == 12
+        assert any(isinstance(value, list) for value in record.attributes.values())
+        assert wiki.have_banner(page) is True
+
+    def test_corpus_cycles_distinct_variants(self):
+        """Test consecutive pages differ while only a few variants are generated."""
+        pages = list(corpus(5, variants=2, size=20_000))
+        assert len(pages) == 5
+        assert pages[0] is pages[2] and pages[0] is not pages[1]
+
+
+class TestParseBenchmark:
+    """Tests for the benchmark runner."""
+
+    def test_every_case_reports_throughput_and_allocations(self):
+        """Test each case runs and reports its numbers."""
+        for name in CASES:
+            result = benchmark(name, pages=3, alloc_sample=2, size=20_000, variants=2)
+            assert result["pages"] == 3
+            assert result["pages_per_second"] > 0
+            assert result["peak_kib_mean"] > 0
+
+
+class TestTransportBenchmark:
+    """Tests for the transport benchmark."""
+
+    @pytest.mark.asyncio
+    async def test_shared_transport_opens_no_connections_in_stages(self):
+        """Test prewarmed, shared connections replace the ones opened per stage."""
+        old, shared = await transport_benchmark(requests=20, concurrency=4, dns_delay=0.001)
+
+        assert old["connections"] > 0
+        assert old["dns_lookups"] == 2
+        assert shared["connections"] == 0
+        assert shared["dns_lookups"] == 1
+        assert shared["reused"] == 40
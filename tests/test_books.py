@@ -0,0 +1,59 @@
+"""Tests for the per-book bitset index."""
+
+import duckdb
+import pytest
+
+from src.scrapers.books import BookIndex, books_mask
+from src.scrapers.storage import write_normalized
+
+BOOKS = [f"https://harrypotter.fandom.com/pt-br/wiki/Livro_{i}" for i in range(1, 8)]
+
+
+@pytest.fixture
+def index():
+    """Index of four characters spread over seven books."""
+    appearances = {"harry": range(1, 8), "dobby": (2, 4, 5, 7), "cedric": (3, 4), "luna": (5,)}
+    records = [{"Nome": name.title(), "url": f"https://example.com/{name}"} for name in appearances]
+    character_books = {
+        f"https://example.com/{name}": [BOOKS[book - 1] for book in books]
+        for name, books in appearances.items()
+    }
+
+    with duckdb.connect() as con:
+        write_normalized(con, records, BOOKS, character_books)
+        return BookIndex.from_duckdb(con)
+
+
+def names(index, positions):
+    """Names of the selected characters."""
+    return [index.names[position] for position in positions]
+
+
+class TestBookIndex:
+    """Tests for BookIndex."""
+
+    def test_select_with_bit_conditions(self, index):
+        """Test all/any/none conditions combine as mask operations."""
+        assert names(index, index.select(all_of=[3, 5], none_of=[7])) == []
+        assert names(index, index.select(all_of=[4], none_of=[7])) == ["Cedric"]
+        assert names(index, index.select(any_of=[3, 5], none_of=[1])) == [
+            "Cedric",
+            "Dobby",
+            "Luna",
+        ]
+        assert len(index.select()) == len(index) == 4
+
+    def test_books_by_title(self, index):
+        """Test books can be named by title, ignoring case, and unknown books raise."""
+        assert index.book_id("livro 5") == index.book_id("5") == 5
+        with pytest.raises(KeyError):
+            index.select(all_of=["Livro 8"])
+
+    def test_counts_per_book(self, index):
+        """Test appearance counts come from the masks and match character_books."""
+        assert index.counts() == {1: 1, 2: 2, 3: 2, 4: 3, 5: 3, 6: 1, 7: 2}
+
+    def test_books_mask(self):
+        """Test book ids map to their bits."""
+        assert books_mask([1, 3]) == 0b101
+        assert books_mask([64]) == 1 << 63
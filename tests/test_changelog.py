@@ -0,0 +1,106 @@
+"""Tests for the change log between runs."""
+
+import json
+
+import duckdb
+import pytest
+
+from src.scrapers.changelog import changes_path, record_hash, write_changes
+from src.scrapers.records import CharacterRecord
+from src.scrapers.storage import write_normalized
+
+BOOKS = ["https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Pedra_Filosofal"]
+
+
+@pytest.fixture
+def con():
+    """In-memory DuckDB loaded with a first run."""
+    con = duckdb.connect()
+    write_normalized(
+        con,
+        [
+            {"Nome": "Harry Potter", "url": "harry", "Casa": "Grifinória", "Patrono": "Cervo"},
+            {"Nome": "Dobby", "url": "dobby", "Especie": "Elfo doméstico"},
+            {"Nome": "Rony Weasley", "url": "rony", "Casa": "Grifinória"},
+        ],
+        BOOKS,
+        {},
+    )
+    yield con
+    con.close()
+
+
+class TestChangelog:
+    """Tests for the diff computed by write_normalized."""
+
+    def test_first_run_adds_everything(self, con):
+        """Test a load without a previous snapshot logs every character as added."""
+        rows = con.sql("SELECT change, count(*) FROM changelog GROUP BY change").fetchall()
+        assert rows == [("added", 3)]
+
+    def test_second_run_logs_only_differences(self, con):
+        """Test added, removed and changed characters with their changed attributes."""
+        changes = write_normalized(
+            con,
+            [
+                CharacterRecord(
+                    "Harry Potter", "harry", {"Casa": "Grifinória", "Familia": ["Lily", "James"]}
+                ),
+                CharacterRecord("Dobby", "dobby", {"Especie": ["Elfo doméstico"]}),
+                CharacterRecord("Hermione Granger", "hermione", {"Casa": "Grifinória"}),
+            ],
+            BOOKS,
+            {},
+        )
+
+        by_url = {change["url"]: change for change in changes}
+        assert set(by_url) == {"harry", "hermione", "rony"}
+        assert by_url["harry"]["change"] == "changed"
+        assert by_url["harry"]["attributes"] == {"Familia": ["Lily", "James"]}
+        assert by_url["harry"]["removed"] == ["Patrono"]
+        assert by_url["hermione"]["change"] == "added"
+        assert by_url["rony"] == {
+            "change": "removed",
+            "url": "rony",
+            "Nome": "Rony Weasley",
+            "attributes": {},
+            "removed": [],
+        }
+
+        rows = con.sql(
+            "SELECT change, attributes FROM changelog WHERE url = 'harry' ORDER BY change"
+        ).fetchall()
+        assert rows == [("added", ["Casa", "Patrono"]), ("changed", ["Familia", "Patrono"])]
+
+    def test_unchanged_run_logs_nothing(self, con):
+        """Test reloading the same data produces an empty diff."""
+        changes = write_normalized(
+            con,
+            [
+                {"Nome": "Harry Potter", "url": "harry", "Casa": "Grifinória", "Patrono": "Cervo"},
+                {"Nome": "Dobby", "url": "dobby", "Especie": "Elfo doméstico"},
+                {"Nome": "Rony Weasley", "url": "rony", "Casa": "Grifinória"},
+            ],
+            BOOKS,
+            {},
+        )
+        assert changes == []
+
+    def test_record_hash_ignores_scalar_vs_single_item_list(self):
+        """Test a value and a one-item list hash alike, as they are stored alike."""
+        assert record_hash({"Nome": "Dobby", "url": "a", "Especie": "Elfo"}) == record_hash(
+            {"Nome": "Dobby", "url": "a", "Especie": ["Elfo"]}
+        )
+        assert record_hash({"Nome": "Dobby", "url": "a"}) != record_hash(
+            {"Nome": "Dobby", "url": "a", "Especie": "Elfo"}
+        )
+
+    def test_write_changes(self, tmp_path):
+        """Test the changes file has one JSON object per line."""
+        path = changes_path(str(tmp_path / "hp.duckdb"))
+        write_changes([{"change": "removed", "url": "a"}], path)
+
+        assert path.name == "hp.changes.jsonl"
+        assert [json.loads(line) for line in path.read_text().splitlines()] == [
+            {"change": "removed", "url": "a"}
+        ]
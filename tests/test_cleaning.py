@@ -0,0 +1,77 @@
+"""Tests for the streaming cleaning stage."""
+
+from src.scrapers import WikiCallerSync
+from src.scrapers.cleaning import (
+    clean_records,
+    dedup_by,
+    exclude_values,
+    keep,
+    require_fields,
+)
+from src.scrapers.records import RecordBatch
+
+
+class TestCleaning:
+    """Tests for the record filters."""
+
+    def test_dedup_keeps_first_occurrence(self):
+        """Test dedup_by keeps only the first record of each key."""
+        records = [
+            {"Nome": "Harry", "url": "a"},
+            {"Nome": "Harry", "url": "b"},
+            {"Nome": "Rony", "url": "c"},
+        ]
+        result = list(clean_records(records, [dedup_by("Nome")]))
+        assert [r["url"] for r in result] == ["a", "c"]
+
+    def test_exclude_values(self):
+        """Test exclude_values drops the listed values."""
+        record_filter = exclude_values("Nome", ["Joanne Rowling"])
+        assert record_filter({"Nome": "Harry"}) is True
+        assert record_filter({"Nome": "Joanne Rowling"}) is False
+
+    def test_require_fields(self):
+        """Test require_fields drops records with missing or empty fields."""
+        record_filter = require_fields("Nome", "url")
+        assert keep({"Nome": "Harry", "url": "a"}, [record_filter]) is True
+        assert keep({"Nome": "", "url": "a"}, [record_filter]) is False
+        assert keep({"url": "a"}, [record_filter]) is False
+
+    def test_clean_records_is_lazy(self):
+        """Test clean_records consumes its input only as it is iterated."""
+        consumed = []
+
+        def records():
+            for name in ["Harry", "Rony", "Hermione"]:
+                consumed.append(name)
+                yield {"Nome": name, "url": name}
+
+        stream = clean_records(records(), [dedup_by("Nome")])
+        assert next(stream)["Nome"] == "Harry"
+        assert consumed == ["Harry"]
+
+    def test_clean_character_data(self):
+        """Test the default filters used by the scrapers."""
+        wiki = WikiCallerSync()
+        data = [
+            {"Nome": "Harry Potter", "url": "a"},
+            {"Nome": "Joanne Rowling", "url": "b"},
+            {"Nome": "Harry Potter", "url": "c"},
+        ]
+        assert wiki.clean_character_data(data) == [{"Nome": "Harry Potter", "url": "a"}]
+
+    def test_save_to_csv_with_ragged_records(self, tmp_path):
+        """Test the CSV has the union of all columns."""
+        wiki = WikiCallerSync()
+        wiki.records = RecordBatch.from_records(
+            [
+                {"Nome": "Harry", "Casa": ["Grifinória"]},
+                {"Nome": "Dobby", "Especie": ["Elfo doméstico"]},
+            ]
+        )
+        output = tmp_path / "personagens.csv"
+        wiki.save_to_csv(str(output))
+
+        lines = output.read_text(encoding="utf-8").splitlines()
+        assert lines[0] == "Nome;Casa;Especie"
+        assert lines[2] == "Dobby;;['Elfo doméstico']"
@@ -0,0 +1,162 @@
+"""Tests for the adaptive concurrency limiter, deadlines and hedged requests."""
+
+import asyncio
+
+import pytest
+
+from src.scrapers.concurrency import AdaptiveLimiter, Deadline, LatencyTracker, hedged
+
+
+class TestAdaptiveLimiter:
+    """Tests for AdaptiveLimiter."""
+
+    def test_increases_while_latency_is_flat(self):
+        """Test the limit grows additively with fast responses."""
+        limiter = AdaptiveLimiter(initial=2, max_limit=8)
+        for _ in range(20):
+            limiter.record(0.1, 200)
+        assert limiter.limit > 2
+        assert limiter.limit <= 8
+
+    def test_backs_off_on_rate_limiting(self):
+        """Test a 429 halves the limit."""
+        limiter = AdaptiveLimiter(initial=8)
+        limiter.record(0.1, 429)
+        assert limiter.limit == 4
+        assert limiter.decreases == 1
+
+    def test_backs_off_when_latency_rises(self):
+        """Test rising latency reduces the limit."""
+        limiter = AdaptiveLimiter(initial=8, smoothing=1.0)
+        limiter.record(0.1, 200)
+        limiter.record(0.5, 200)
+        assert limiter.limit < 8
+
+    def test_never_below_minimum(self):
+        """Test the limit stays within its bounds."""
+        limiter = AdaptiveLimiter(initial=1, min_limit=1)
+        limiter.record(0.1, None)
+        assert limiter.limit == 1
+
+    def test_try_acquire(self):
+        """Test synchronous reservations stop at the limit."""
+        limiter = AdaptiveLimiter(initial=2)
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+        limiter.release()
+        assert limiter.try_acquire() is True
+
+    @pytest.mark.asyncio
+    async def test_slot_waits_for_capacity(self):
+        """Test async slots never exceed the limit and record their status."""
+        limiter = AdaptiveLimiter(initial=2, max_limit=2)
+        running = []
+
+        async def request():
+            async with limiter.slot() as sample:
+                running.append(limiter.in_flight)
+                await asyncio.sleep(0.01)
+                sample.status = 200
+
+        await asyncio.gather(*[request() for _ in range(6)])
+
+        assert max(running) == 2
+        assert limiter.in_flight == 0
+        assert limiter.min_latency is not None
+
+    @pytest.mark.asyncio
+    async def test_slot_records_errors(self):
+        """Test an exception inside a slot counts as a failed request."""
+        limiter = AdaptiveLimiter(initial=4)
+
+        with pytest.raises(ConnectionError):
+            async with limiter.slot():
+                raise ConnectionError
+
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0
+
+
+class TestDeadline:
+    """Tests for Deadline."""
+
+    def test_without_budget_never_expires(self):
+        """Test a deadline without a budget has no remaining time limit."""
+        deadline = Deadline()
+        assert deadline.remaining() is None
+        assert deadline.expired() is False
+
+    def test_expires_after_budget(self):
+        """Test a spent budget reports expiry."""
+        assert Deadline(60).expired() is False
+        assert Deadline(0).expired() is True
+        assert Deadline(0).remaining() == 0
+
+
+class TestHedging:
+    """Tests for LatencyTracker and hedged."""
+
+    def test_delay_is_recent_p95(self):
+        """Test the hedge delay waits for enough samples and follows the p95."""
+        tracker = LatencyTracker(min_samples=20, min_delay=0.0)
+        for latency in range(19):
+            tracker.add(latency / 100)
+        assert tracker.delay() is None
+
+        for latency in range(19, 100):
+            tracker.add(latency / 100)
+        assert tracker.delay() == pytest.approx(0.95)
+
+    @pytest.mark.asyncio
+    async def test_backup_wins_and_slow_request_is_cancelled(self):
+        """Test a slow request gets a backup and the loser is cancelled."""
+        tracker = LatencyTracker(min_samples=1, min_delay=0.01)
+        tracker.add(0.01)
+        delays = iter([10.0, 0.0])
+        cancelled = []
+
+        async def request():
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        assert await hedged(request, tracker) == 0.0
+        await asyncio.sleep(0)
+        assert cancelled == [10.0]
+        assert (tracker.hedges, tracker.hedge_wins) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_fast_request_sends_no_backup(self):
+        """Test requests faster than the delay are not duplicated."""
+        tracker = LatencyTracker(min_samples=1, min_delay=1.0)
+        tracker.add(1.0)
+        calls = []
+
+        async def request():
+            calls.append(1)
+            return "ok"
+
+        assert await hedged(request, tracker) == "ok"
+        assert len(calls) == 1
+        assert tracker.hedges == 0
+
+    @pytest.mark.asyncio
+    async def test_no_backup_without_capacity(self):
+        """Test a slow request gets no backup when hedging is not allowed."""
+        tracker = LatencyTracker(min_samples=1, min_delay=0.01)
+        tracker.add(0.01)
+        calls = []
+
+        async def request():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        assert await hedged(request, tracker, can_hedge=lambda: False) == "ok"
+        assert len(calls) == 1
+        assert tracker.hedges == 0
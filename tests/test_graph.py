@@ -0,0 +1,151 @@
+"""Tests for the character relationship graph."""
+
+from unittest.mock import Mock
+
+import duckdb
+import pytest
+
+from src.scrapers import WikiCallerMultiprocessing
+from src.scrapers.graph import CharacterGraph, export_graph
+from src.scrapers.records import CharacterRecord
+from src.scrapers.sites import PT_BR
+from src.scrapers.storage import upsert_normalized, write_normalized
+
+WIKI = PT_BR.prefix
+HARRY, LILY, JAMES, DUDLEY, DOBBY = (
+    WIKI + name for name in ("Harry_Potter", "Lily_Potter", "James_Potter", "Duda_Dursley", "Dobby")
+)
+
+PAGE = """
+<html>
+    <h2 class="pi-item pi-item-spacing pi-title pi-secondary-background">Harry Potter</h2>
+    <h3 class="pi-data-label pi-secondary-font">Família</h3>
+    <div class="pi-data-value pi-font"><ul>
+        <li><a href="/pt-br/wiki/Lily_Potter">Lily Potter</a> (mãe)</li>
+        <li><a href="/pt-br/wiki/James_Potter#Morte">James Potter</a> (pai)</li>
+        <li><a href="/pt-br/wiki/Avó?action=edit&amp;redlink=1">Avó</a></li>
+    </ul></div>
+    <h3 class="pi-data-label pi-secondary-font">Casa</h3>
+    <div class="pi-data-value pi-font">
+        <a href="/pt-br/wiki/Grifin%C3%B3ria">Grifinória</a><a href="https://example.com/x">x</a>
+    </div>
+</html>
+"""
+
+
+@pytest.fixture
+def records():
+    """Characters linked as Harry - Lily/James (Familia), Dudley - Harry, Dobby alone."""
+    return [
+        CharacterRecord(
+            "Harry Potter",
+            HARRY,
+            {"Familia": ["Lily Potter", "James Potter"]},
+            links={"Familia": [LILY, JAMES], "Casa": [WIKI + "Grifin%C3%B3ria"]},
+        ),
+        CharacterRecord("Lily Potter", LILY, {}, links={"Familia": [WIKI + "Harry_Potter#Vida"]}),
+        CharacterRecord("James Potter", JAMES),
+        CharacterRecord("Duda Dursley", DUDLEY, links={"Familia": [HARRY]}),
+        CharacterRecord("Dobby", DOBBY),
+    ]
+
+
+@pytest.fixture
+def con(records):
+    """In-memory DuckDB loaded with the records and their links."""
+    con = duckdb.connect()
+    links = {record.url: record.links for record in records}
+    write_normalized(con, [dict(record.items()) for record in records], [], {}, links)
+    yield con
+    con.close()
+
+
+class TestGraph:
+    """Tests for link extraction, the CSR tables and CharacterGraph."""
+
+    def test_extractor_keeps_infobox_links(self):
+        """Test links to wiki pages are kept per attribute, without fragments or red links."""
+        wiki = WikiCallerMultiprocessing()
+        wiki.session = Mock()
+        wiki.session.get.return_value = Mock(content=PAGE.encode())
+
+        record = wiki.get_character_info(HARRY)
+
+        assert record.links == {"Familia": [LILY, JAMES], "Casa": [WIKI + "Grifin%C3%B3ria"]}
+        assert "links" not in dict(record.items())
+
+    def test_csr_tables(self, con):
+        """Test each node's edges are contiguous and stored in both directions."""
+        nodes = con.sql(
+            "SELECT nome, edge_offset, degree FROM harry_potter.graph_nodes ORDER BY node_id"
+        ).fetchall()
+        assert nodes == [
+            ("Dobby", 0, 0),
+            ("Duda Dursley", 0, 1),
+            ("Harry Potter", 1, 4),
+            ("James Potter", 5, 1),
+            ("Lily Potter", 6, 2),
+        ]
+        assert con.sql("SELECT relation FROM harry_potter.graph_relations").fetchall() == [
+            ("Familia",)
+        ]
+        edges = con.sql(
+            "SELECT count(*), count(*) FILTER (outgoing) FROM harry_potter.graph_edges"
+        ).fetchone()
+        assert edges == (8, 4)
+
+    def test_neighbors_and_directions(self, con):
+        """Test neighbors are found through outgoing and incoming links."""
+        graph = CharacterGraph.from_duckdb(con)
+
+        assert sorted(graph.neighbors("harry potter")) == [
+            (DUDLEY, "Familia", False),
+            (JAMES, "Familia", True),
+            (LILY, "Familia", False),
+            (LILY, "Familia", True),
+        ]
+        assert graph.neighbors(HARRY, direction="in") == [
+            (DUDLEY, "Familia", False),
+            (LILY, "Familia", False),
+        ]
+        assert graph.neighbors("Dobby") == []
+        assert graph.neighbors("Harry Potter", relations=["Casa"]) == []
+        with pytest.raises(KeyError):
+            graph.neighbors("Voldemort")
+
+    def test_k_hop_and_shortest_path(self, con):
+        """Test breadth-first queries over the adjacency arrays."""
+        graph = CharacterGraph.from_duckdb(con)
+
+        assert graph.k_hop("Duda Dursley", 1) == {HARRY: 1}
+        assert graph.k_hop("Duda Dursley", 2) == {HARRY: 1, JAMES: 2, LILY: 2}
+        assert graph.shortest_path("Duda Dursley", "James Potter") == [
+            (DUDLEY, None),
+            (HARRY, "Familia"),
+            (JAMES, "Familia"),
+        ]
+        assert graph.shortest_path("Dobby", "Harry Potter") is None
+
+    def test_parquet_round_trip(self, con, tmp_path):
+        """Test the graph loads the same from the exported Parquet files."""
+        export_graph(con, tmp_path / "graph")
+
+        graph = CharacterGraph.from_parquet(tmp_path / "graph")
+        assert len(graph) == 5 and graph.edge_count == 4
+        assert graph.k_hop("Duda Dursley", 2) == CharacterGraph.from_duckdb(con).k_hop(
+            "Duda Dursley", 2
+        )
+
+    def test_upsert_rebuilds_graph(self, con):
+        """Test an upsert replaces a character's links and recomputes the CSR tables."""
+        dobby = CharacterRecord("Dobby", DOBBY, links={"Lealdade": [HARRY]})
+        upsert_normalized(
+            con,
+            [dict(CharacterRecord("Duda Dursley", DUDLEY).items()), dict(dobby.items())],
+            {DOBBY: dobby.links},
+        )
+
+        graph = CharacterGraph.from_duckdb(con)
+        assert graph.neighbors("Dobby") == [(HARRY, "Lealdade", True)]
+        assert graph.neighbors("Duda Dursley") == []
+        assert graph.shortest_path("Dobby", "Lily Potter")[-1] == (LILY, "Familia")
@@ -0,0 +1,91 @@
+"""Tests for the automatic execution-mode selection."""
+
+import json
+
+import pytest
+
+from benchmarks.parse import benchmark
+from src.scrapers.archive import PageArchive
+from src.scrapers.planner import (
+    ASYNC,
+    ASYNC_CONCURRENCY,
+    MULTIPROCESSING,
+    Workload,
+    choose_plan,
+    estimate_seconds,
+    measure_workload,
+    parse_rate_from_benchmark,
+)
+from src.scrapers.sites import SiteProfile
+
+SITE = SiteProfile(
+    name="test",
+    base_url="https://wiki.test",
+    wiki_path="/wiki/",
+    seeds=("https://wiki.test/wiki/Livro_1", "https://wiki.test/wiki/Livro_2"),
+    birth_label="Nascimento",
+    bio_header="Informações biográficas",
+)
+
+
+def book_page(*names: str) -> bytes:
+    """Book page with character links inside paragraphs."""
+    links = "".join(f'<a href="/wiki/{name}">{name}</a> ' for name in names)
+    return f'<html><div class="mw-parser-output"><p>{links}</p></div></html>'.encode()
+
+
+class TestPlanner:
+    """Tests for the workload model and the plan choice."""
+
+    def test_network_bound_crawl_picks_async(self):
+        """Test a crawl over the network goes to async with its default concurrency."""
+        plan = choose_plan(Workload(pages=2000, cpus=8))
+
+        assert (plan.mode, plan.workers) == (ASYNC, ASYNC_CONCURRENCY)
+        assert plan.estimates[MULTIPROCESSING] == (8, pytest.approx(126.0))
+        assert "async with 50 concurrent requests" in plan.describe()
+
+    def test_parse_bound_crawl_picks_processes(self):
+        """Test a fast source on a multi-core machine goes to one process per core."""
+        plan = choose_plan(Workload(pages=20_000, cpus=8), fetch_seconds=0.01)
+
+        assert (plan.mode, plan.workers) == (MULTIPROCESSING, 8)
+        assert plan.estimates[MULTIPROCESSING][1] < plan.estimates[ASYNC][1]
+
+    def test_rate_limit_bounds_both_layouts(self):
+        """Test a low --max-concurrency caps requests and processes alike."""
+        workload = Workload(pages=2000, cpus=8, max_concurrency=2)
+        plan = choose_plan(workload, fetch_seconds=0.01)
+
+        assert plan.estimates == {ASYNC: (2, 10.0), MULTIPROCESSING: (2, 11.0)}
+        assert plan.mode == ASYNC
+        assert estimate_seconds(ASYNC, 2, workload) == 500.0
+
+    def test_frontier_measured_from_archived_books(self, tmp_path):
+        """Test archived book pages are counted and missing books take their average."""
+        with PageArchive(tmp_path, writer="a") as archive:
+            archive.append(SITE.seeds[0], book_page("Harry", "Rony", "Hermione", "Harry"))
+
+        workload = measure_workload([SITE], str(tmp_path))
+        assert workload.measured
+        assert workload.pages == 2 + 3 + 3
+
+        assert not measure_workload([SITE], str(tmp_path / "missing")).measured
+
+    def test_parse_rate_from_benchmark_results(self, tmp_path):
+        """Test the benchmark's selectolax cases set the per-core parse rate."""
+        results = [
+            benchmark(name, pages=3, alloc_sample=0, size=20_000, variants=2)
+            for name in ("selectolax.have_banner", "selectolax.get_character_info")
+        ]
+        path = tmp_path / "bench.json"
+        path.write_text(json.dumps(results))
+
+        rate = parse_rate_from_benchmark(path)
+        banner, extract = (result["pages_per_second"] for result in results)
+        assert rate == pytest.approx(1 / (1 / banner + 1 / extract))
+        assert choose_plan(Workload(pages=100, cpus=1), rate).parse_rate == rate
+
+        path.write_text(json.dumps(results[:1]))
+        with pytest.raises(ValueError):
+            parse_rate_from_benchmark(path)
@@ -0,0 +1,82 @@
+"""Tests for the profiling mode."""
+
+import cProfile
+import os
+import pstats
+from collections import defaultdict
+from unittest.mock import Mock
+
+from selectolax.lexbor import LexborHTMLParser
+
+from src.scrapers import WikiCallerMultiprocessing, wiki_caller_multiprocessing
+from src.scrapers.profiling import ENV_VAR, ProfiledParser, collapse, hot_paths, profile
+from src.scrapers.text import remove_accents
+
+
+def leaf():
+    """Burn some CPU in a leaf function."""
+    return sum(i * i for i in range(20_000))
+
+
+def branch():
+    """Call the leaf twice."""
+    return leaf() + leaf()
+
+
+class TestProfiling:
+    """Tests for the profile context manager and its report."""
+
+    def test_collapse_rebuilds_call_stacks(self):
+        """Test the collapsed stacks follow caller -> callee edges from the roots."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        branch()
+        profiler.disable()
+
+        stacks = defaultdict(int)
+        collapse(pstats.Stats(profiler).stats, "main", stacks)
+
+        leaf_stacks = [frames for frames in stacks if frames.split(";")[-1].startswith("leaf ")]
+        assert leaf_stacks
+        assert all(frames.startswith("main;") for frames in leaf_stacks)
+        assert all(";branch (test_profiling.py:" in frames for frames in leaf_stacks)
+
+    def test_profile_merges_worker_processes(self, tmp_path):
+        """Test worker profiles are saved on pool shutdown and merged in the report."""
+        wiki = WikiCallerMultiprocessing(processes=2)
+
+        with profile(tmp_path, top=5):
+            assert os.environ[ENV_VAR] == str(tmp_path.resolve())
+            with wiki.pool() as pool:
+                assert pool.map(remove_accents, ["São"] * 200) == ["Sao"] * 200
+
+        assert ENV_VAR not in os.environ
+        assert len(list(tmp_path.glob("worker-*.prof"))) == 2
+        for name in ("main.prof", "combined.prof", "profile.collapsed", "summary.txt"):
+            assert (tmp_path / name).exists()
+
+        rows = {
+            row[0]: row for row in hot_paths(pstats.Stats(str(tmp_path / "combined.prof")).stats)
+        }
+        assert rows["remove_accents"][1] == 200
+
+        collapsed = (tmp_path / "profile.collapsed").read_text()
+        assert any(line.startswith("workers;") for line in collapsed.splitlines())
+        assert "remove_accents" in (tmp_path / "summary.txt").read_text()
+
+    def test_selectolax_calls_are_measured(self, tmp_path, sample_character_page_html):
+        """Test parsing and page selectors show up while profiling, then are restored."""
+        wiki = WikiCallerMultiprocessing(processes=1)
+        wiki.session = Mock()
+        wiki.session.get.return_value = Mock(content=sample_character_page_html.encode())
+
+        with profile(tmp_path, top=5):
+            assert wiki_caller_multiprocessing.HTMLParser is ProfiledParser
+            assert wiki.get_character_info("https://example.com/harry").nome == "Harry Potter"
+
+        assert wiki_caller_multiprocessing.HTMLParser is LexborHTMLParser
+
+        rows = {row[0]: row for row in hot_paths(pstats.Stats(str(tmp_path / "main.prof")).stats)}
+        assert rows["fetch"][1] == 1
+        assert rows["HTMLParser"][1] == 1
+        assert rows["css / css_first"][1] == 3
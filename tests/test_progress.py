@@ -0,0 +1,78 @@
+"""Tests for the aggregated progress display."""
+
+import io
+
+from loguru import logger
+
+from src.scrapers import WikiCallerMultiprocessing
+from src.scrapers.progress import Progress
+
+
+class FakeTerminal(io.StringIO):
+    """In-memory stream that reports itself as a terminal."""
+
+    def isatty(self):
+        return True
+
+
+class TestProgress:
+    """Tests for the counters, the two render modes and the worker channel."""
+
+    def test_line_aggregates_stages(self):
+        """Test every stage and counter is shown in a single line."""
+        progress = Progress(io.StringIO())
+        progress.add_total("books", 2)
+        progress.advance("books")
+        progress.add_total("links", 3)
+        progress.advance("requests", 4)
+
+        line = progress.line()
+        assert line.startswith("[00:00] ")
+        assert "books 1/2 | links 0/3 | requests 4 (" in line
+
+    def test_terminal_rewrites_one_line(self):
+        """Test a terminal gets the line redrawn in place and a newline at the end."""
+        stream = FakeTerminal()
+        progress = Progress(stream, interval=60)
+
+        with progress:
+            progress.add_total("books", 1)
+            progress.advance("books")
+
+        output = stream.getvalue()
+        assert output.startswith("\r[00:00] books 1/1")
+        assert output.endswith("\x1b[K\n")
+        assert output.count("\n") == 1
+
+    def test_log_lines_only_when_state_changes(self):
+        """Test outside a terminal progress is logged, skipping unchanged states."""
+        messages = []
+        sink = logger.add(messages.append, format="{message}")
+        try:
+            progress = Progress(io.StringIO())
+            progress.advance("books")
+            progress.render()
+            progress.render()
+            progress.advance("books")
+            progress.render()
+        finally:
+            logger.remove(sink)
+
+        assert [message.split("] ")[1].strip() for message in messages] == ["books 1", "books 2"]
+
+    def test_dispatch_counts_results_and_worker_requests(self):
+        """Test the parent counts results and the request samples returned by workers."""
+        wiki = WikiCallerMultiprocessing(processes=2)
+
+        class InlinePool:
+            def apply_async(self, task, args, callback, error_callback):
+                callback(task(*args))
+
+        def task(url):
+            return url, [(0.1, 200), (0.1, 200)]
+
+        urls = [f"https://example.com/{i}" for i in range(5)]
+        list(wiki.dispatch(InlinePool(), task, urls, "links"))
+
+        assert wiki.progress.totals == {"links": 5}
+        assert wiki.progress.done == {"links": 5, "requests": 10}
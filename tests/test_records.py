@@ -0,0 +1,83 @@
+"""Tests for the compact record representation."""
+
+import pickle
+
+from src.scrapers.cleaning import clean_records, dedup_by, require_fields
+from src.scrapers.records import CharacterRecord, RecordBatch, attribute_name
+
+
+class TestCharacterRecord:
+    """Tests for CharacterRecord."""
+
+    def test_from_infobox_interns_attribute_names(self):
+        """Test labels are stripped of accents and shared between records."""
+        first = CharacterRecord.from_infobox("Harry", "a", ["Espécie "], ["Humano"])
+        second = CharacterRecord.from_infobox("Rony", "b", [" Espécie"], ["Humano"])
+
+        (name,) = first.attributes
+        assert name == "Especie"
+        assert name is next(iter(second.attributes))
+        assert attribute_name("Espécie") is name
+
+    def test_mapping_access(self):
+        """Test the record answers the dict-style reads used by the filters."""
+        record = CharacterRecord("Harry", "a", {"Casa": "Grifinoria"})
+
+        assert record["Nome"] == "Harry"
+        assert record.get("url") == "a"
+        assert record["Casa"] == "Grifinoria"
+        assert record.get("Patrono") is None
+        assert record.to_dict() == {"Casa": "Grifinoria", "Nome": "Harry", "url": "a"}
+
+    def test_works_with_cleaning_filters(self):
+        """Test the cleaning filters accept records as they accept dicts."""
+        records = [
+            CharacterRecord("Harry", "a"),
+            CharacterRecord("Harry", "b"),
+            CharacterRecord("", "c"),
+        ]
+        result = list(clean_records(records, [require_fields("Nome"), dedup_by("Nome")]))
+        assert [record.url for record in result] == ["a"]
+
+    def test_pickles_for_worker_processes(self):
+        """Test records survive the trip back from a worker process."""
+        record = CharacterRecord("Harry", "a", {"Familia": ["Lily", "James"]})
+        assert pickle.loads(pickle.dumps(record)) == record
+
+
+class TestRecordBatch:
+    """Tests for RecordBatch."""
+
+    def test_round_trip_with_ragged_columns(self):
+        """Test rows come back with the same values and missing cells omitted."""
+        records = [
+            CharacterRecord("Harry", "a", {"Casa": "Grifinória", "Familia": ["Lily", "James"]}),
+            CharacterRecord("Dobby", "b", {"Especie": "Elfo doméstico"}),
+            {"Nome": "Rony", "url": "c", "Familia": []},
+        ]
+        batch = RecordBatch.from_records(records)
+
+        assert len(batch) == 3
+        assert batch.column_names == ["Casa", "Familia", "Nome", "url", "Especie"]
+        assert list(batch.rows()) == [
+            {"Casa": "Grifinória", "Familia": ["Lily", "James"], "Nome": "Harry", "url": "a"},
+            {"Nome": "Dobby", "url": "b", "Especie": "Elfo doméstico"},
+            {"Familia": [], "Nome": "Rony", "url": "c"},
+        ]
+        assert batch.column("Especie") == [None, "Elfo doméstico", None]
+
+    def test_records_restores_character_records(self):
+        """Test the batch can be read back as CharacterRecord objects."""
+        record = CharacterRecord("Harry", "a", {"Casa": "Grifinoria"})
+        assert list(RecordBatch.from_records([record]).records()) == [record]
+
+    def test_text_is_stored_in_contiguous_buffers(self):
+        """Test the strings live in one UTF-8 buffer per column."""
+        batch = RecordBatch.from_records(
+            [CharacterRecord(f"Personagem {i}", f"url-{i}") for i in range(100)]
+        )
+        column = batch.columns["Nome"]
+
+        assert bytes(column.data).startswith(b"Personagem 0Personagem 1")
+        assert len(column.value_offsets) == 101
+        assert batch.nbytes() < 10_000
@@ -0,0 +1,70 @@
+"""Tests for the character search index."""
+
+import pytest
+
+from src.scrapers.search import SearchIndex, index_path, tokenize
+
+
+@pytest.fixture
+def index():
+    """Search index over a few characters."""
+    return SearchIndex.build(
+        [
+            {
+                "Nome": "Harry Potter",
+                "url": "https://example.com/harry",
+                "Casa": ["Grifinória"],
+                "Especie": ["Humano"],
+            },
+            {
+                "Nome": "Hermione Granger",
+                "url": "https://example.com/hermione",
+                "Casa": ["Grifinória"],
+                "Familia": ["Harry Potter"],
+            },
+            {
+                "Nome": "Draco Malfoy",
+                "url": "https://example.com/draco",
+                "Casa": ["Sonserina"],
+            },
+        ]
+    )
+
+
+def names(results):
+    """Names of the returned records."""
+    return [record["Nome"] for record in results]
+
+
+class TestSearchIndex:
+    """Tests for SearchIndex."""
+
+    def test_tokenize_removes_accents(self):
+        """Test tokens are lowercase and accent-free."""
+        assert tokenize("Grifinória, São") == ["grifinoria", "sao"]
+
+    def test_name_match_ranks_first(self, index):
+        """Test a name match outranks a match in an attribute value."""
+        assert names(index.search("harry potter")) == ["Harry Potter", "Hermione Granger"]
+
+    def test_fuzzy_match(self, index):
+        """Test misspelled names are still found."""
+        assert names(index.search("hermoine")) == ["Hermione Granger"]
+        assert index.search("hermoine", fuzzy=False) == []
+
+    def test_attribute_filters(self, index):
+        """Test filters are accent and case insensitive."""
+        assert names(index.search(filters={"casa": "grifinoria"})) == [
+            "Harry Potter",
+            "Hermione Granger",
+        ]
+        assert names(index.search("harry", filters={"Casa": "Sonserina"})) == []
+
+    def test_save_and_load(self, index, tmp_path):
+        """Test the index survives a round trip to disk."""
+        path = index_path(str(tmp_path / "personagens_harry_potter.duckdb"))
+        index.save(path)
+
+        loaded = SearchIndex.load(path)
+        assert path.name == "personagens_harry_potter.search.json"
+        assert names(loaded.search("drako")) == ["Draco Malfoy"]
@@ -0,0 +1,157 @@
+"""Tests for the read-only HTTP service."""
+
+import duckdb
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.scrapers.service import CharacterService, etag_matches
+from src.scrapers.storage import write_normalized
+
+BOOKS = [
+    "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Pedra_Filosofal",
+    "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_C%C3%A2mara_Secreta",
+]
+
+RECORDS = [
+    {
+        "Nome": "Harry Potter",
+        "url": "https://example.com/wiki/Harry_Potter",
+        "Casa": ["Grifinória"],
+    },
+    {
+        "Nome": "Draco Malfoy",
+        "url": "https://example.com/wiki/Draco_Malfoy",
+        "Casa": ["Sonserina"],
+    },
+    {
+        "Nome": "Dobby",
+        "url": "https://example.com/wiki/Dobby",
+        "Especie": ["Elfo doméstico"],
+    },
+]
+
+
+def write_db(path, records):
+    """Write the normalized schema to a DuckDB file."""
+    with duckdb.connect(str(path)) as con:
+        write_normalized(con, records, BOOKS, {records[0]["url"]: BOOKS[1:]})
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """DuckDB file as left by a scraper run."""
+    path = tmp_path / "personagens_harry_potter.duckdb"
+    write_db(path, RECORDS)
+    return path
+
+
+@pytest_asyncio.fixture
+async def client(db_path):
+    """Test client for the service, without automatic reload."""
+    service = CharacterService(str(db_path), pool_size=2, reload_interval=0)
+    client = TestClient(TestServer(service.app()))
+    await client.start_server()
+    client.service = service
+    yield client
+    await client.close()
+
+
+class TestCharacterService:
+    """Tests for CharacterService."""
+
+    @pytest.mark.asyncio
+    async def test_get_character(self, client):
+        """Test a character is served from the cache by its slug."""
+        response = await client.get("/characters/Harry_Potter")
+        assert response.status == 200
+        record = await response.json()
+        assert record["attributes"] == {"Casa": ["Grifinória"]}
+        assert record["books"] == [2]
+
+        response = await client.get("/characters/Voldemort")
+        assert response.status == 404
+
+    @pytest.mark.asyncio
+    async def test_list_pagination_and_filters(self, client):
+        """Test pages are ordered by name and filters ignore accents."""
+        response = await client.get("/characters", params={"per_page": 2, "page": 2})
+        page = await response.json()
+        assert page["total"] == 3
+        assert [item["Nome"] for item in page["items"]] == ["Harry Potter"]
+
+        response = await client.get("/characters", params={"casa": "grifinoria"})
+        page = await response.json()
+        assert [item["Nome"] for item in page["items"]] == ["Harry Potter"]
+
+        response = await client.get("/characters", params={"casa": "grifinoria", "book": "2"})
+        assert (await response.json())["total"] == 1
+
+        response = await client.get("/characters", params={"book": "1"})
+        assert (await response.json())["total"] == 0
+
+        response = await client.get("/characters", params={"q": "malfoy", "casa": "sonserina"})
+        page = await response.json()
+        assert [item["Nome"] for item in page["items"]] == ["Draco Malfoy"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_page(self, client):
+        """Test non-numeric pagination is rejected."""
+        response = await client.get("/characters", params={"page": "x"})
+        assert response.status == 400
+
+    @pytest.mark.asyncio
+    async def test_book_out_of_range(self, client):
+        """Test book ids without a mask bit are rejected instead of failing in DuckDB."""
+        for book in ("0", "-1", "65"):
+            response = await client.get("/characters", params={"q": "a", "book": book})
+            assert response.status == 400
+
+    @pytest.mark.asyncio
+    async def test_etag(self, client):
+        """Test a matching If-None-Match gets a 304."""
+        response = await client.get("/stats/species")
+        etag = response.headers["ETag"]
+        assert await response.json() == [{"species": "Elfo doméstico", "characters": 1}]
+
+        response = await client.get("/stats/species", headers={"If-None-Match": etag})
+        assert response.status == 304
+
+        response = await client.get("/stats/species", headers={"If-None-Match": f"W/{etag}, *"})
+        assert response.status == 304
+        response = await client.get("/stats/species", headers={"If-None-Match": f'"{etag}"'})
+        assert response.status == 200
+
+    def test_etag_matches(self):
+        """Test If-None-Match is parsed as a list of entity tags."""
+        assert etag_matches('"a1"', '"a1"')
+        assert etag_matches('"b2", W/"a1"', '"a1"')
+        assert etag_matches("*", '"a1"')
+        assert not etag_matches("", '"a1"')
+        assert not etag_matches('"xa1"', '"a1"')
+        assert not etag_matches('""a1"", "b2"', '"a1"')
+        assert not etag_matches('W/"a1b"', '"a1"')
+
+    @pytest.mark.asyncio
+    async def test_reload_after_new_scrape(self, client, db_path):
+        """Test a new scrape replaces the served data."""
+        write_db(db_path, RECORDS[:1])
+
+        assert await client.service.reload() is True
+        response = await client.get("/characters")
+        assert (await response.json())["total"] == 1
+        assert await client.service.reload() is False
+
+    @pytest.mark.asyncio
+    async def test_reload_closes_replaced_snapshot_after_queries(self, client, db_path):
+        """Test the old copy stays open for a query in flight and is closed when it ends."""
+        old = client.service.snapshot
+        old.acquire()  # a query still running on the old copy
+        write_db(db_path, RECORDS[:1])
+
+        assert await client.service.reload() is True
+        assert old.con.execute("SELECT count(*) FROM characters").fetchone() == (3,)
+
+        old.release()
+        with pytest.raises(duckdb.ConnectionException):
+            old.con.execute("SELECT 1")
@@ -0,0 +1,113 @@
+"""Tests for request coalescing."""
+
+import asyncio
+
+import pytest
+
+from src.scrapers import WikiCallerAsync
+from src.scrapers.singleflight import AsyncSingleFlight, canonical_url
+
+
+class TestCanonicalUrl:
+    """Tests for canonical_url."""
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://harrypotter.fandom.com/pt-br/wiki/C%C3%A2mara",
+            "https://harrypotter.fandom.com/pt-br/wiki/C%c3%a2mara",
+            "https://harrypotter.fandom.com/pt-br/wiki/Câmara",
+            "HTTPS://HarryPotter.Fandom.com/pt-br/wiki/C%C3%A2mara#Hist%C3%B3ria",
+        ],
+    )
+    def test_spellings_share_a_key(self, url):
+        """Test encodings, host case and fragments do not change the key."""
+        assert canonical_url(url) == "https://harrypotter.fandom.com/pt-br/wiki/C%C3%A2mara"
+
+    def test_query_and_path_case_are_kept(self):
+        """Test different pages keep different keys."""
+        assert canonical_url("https://a.com/wiki/Harry?x=1") != canonical_url(
+            "https://a.com/wiki/harry?x=1"
+        )
+
+
+class TestAsyncSingleFlight:
+    """Tests for AsyncSingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Test one call runs and every caller gets its result."""
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return object()
+
+        results = await asyncio.gather(*[flights.do("k", work) for _ in range(10)])
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert flights.shared == 9
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_free_the_key(self):
+        """Test a failure is shared and the next call runs again."""
+        flights = AsyncSingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[flights.do("k", fail) for _ in range(3)], return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+        async def ok():
+            return 1
+
+        assert await flights.do("k", ok) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        """Test the shared call survives the cancellation of its first caller."""
+        flights = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "page"
+
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "page"
+
+
+class TestScrapersCoalesceFetches:
+    """Tests for single-flight fetches in the scrapers."""
+
+    @pytest.mark.asyncio
+    async def test_async_fetch_downloads_each_page_once(self):
+        """Test concurrent fetches of one page, in two spellings, make one request."""
+        wiki = WikiCallerAsync()
+        requests_made = []
+
+        async def download(session, url):
+            requests_made.append(url)
+            await asyncio.sleep(0.01)
+            return b"<html></html>"
+
+        wiki.download = download
+        urls = ["https://a.com/wiki/C%C3%A2mara", "https://a.com/wiki/Câmara"] * 5
+        bodies = await asyncio.gather(*[wiki.fetch(None, url) for url in urls])
+
+        assert len(requests_made) == 1
+        assert set(bodies) == {b"<html></html>"}
+        assert set(wiki.cache) == set(urls)
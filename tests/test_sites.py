@@ -0,0 +1,129 @@
+"""Tests for per-site crawl profiles."""
+
+from unittest.mock import Mock
+
+import duckdb
+import pytest
+
+from src.scrapers import WikiCallerMultiprocessing
+from src.scrapers.records import CharacterRecord
+from src.scrapers.sites import EN, PT_BR, SiteProfile, resolve, site_for
+from src.scrapers.storage import write_normalized
+
+PT_URL = "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter"
+EN_URL = "https://harrypotter.fandom.com/wiki/Harry_Potter"
+
+
+@pytest.fixture
+def english_page(sample_character_page_html):
+    """The sample character page as the English wiki renders it."""
+    return (
+        sample_character_page_html.replace("Nascimento", "Born")
+        .replace("Espécie", "Species")
+        .replace("Gênero", "Gender")
+        .replace("Humano", "Human")
+    )
+
+
+class TestSites:
+    """Tests for site profiles and lookup."""
+
+    def test_resolve_names_and_profiles(self):
+        """Test names and profiles resolve in order, without repeats."""
+        custom = SiteProfile("x", "https://x.fandom.com", "/wiki/", (), "Born", "Bio")
+        assert resolve(["en", "pt-br", "en", custom]) == [EN, PT_BR, custom]
+
+    def test_resolve_rejects_unknown_names(self):
+        """Test an unknown site name is an error."""
+        with pytest.raises(ValueError, match="Site desconhecido"):
+            resolve(["xx"])
+        with pytest.raises(ValueError):
+            resolve([])
+
+    def test_site_for_prefers_longest_prefix(self):
+        """Test editions on the same host are told apart by their wiki path."""
+        assert site_for(PT_URL) is PT_BR
+        assert site_for(EN_URL) is EN
+        assert site_for("https://example.com/harry") is None
+
+    def test_scraper_seeds_all_sites(self):
+        """Test one scraper gets the seeds of every configured site."""
+        wiki = WikiCallerMultiprocessing(sites=["pt-br", "en"])
+        assert wiki.url_livros == list(PT_BR.seeds + EN.seeds)
+        assert wiki.site_for(EN_URL) is EN
+        assert wiki.site_for("https://example.com/harry") is PT_BR
+
+
+class TestMultiSiteScraping:
+    """Tests for classifying and extracting pages of several sites in one run."""
+
+    def test_pages_are_classified_with_their_site_labels(
+        self, sample_character_page_html, english_page
+    ):
+        """Test each page is verified with the labels of its own site."""
+        wiki = WikiCallerMultiprocessing(sites=["pt-br", "en"])
+        pages = {PT_URL: sample_character_page_html, EN_URL: english_page}
+        wiki.session = Mock()
+        wiki.session.get.side_effect = lambda url, timeout=None: Mock(content=pages[url].encode())
+
+        assert wiki.verify_href(PT_URL) == PT_URL
+        assert wiki.verify_href(EN_URL) == EN_URL
+
+        only_pt = WikiCallerMultiprocessing()
+        only_pt.session = wiki.session
+        assert only_pt.verify_href(EN_URL) is None
+
+    def test_field_map_gives_common_attribute_names(self, english_page):
+        """Test English labels become the attribute names of the pt-br wiki."""
+        wiki = WikiCallerMultiprocessing(sites=["pt-br", "en"])
+        wiki.cache[EN_URL] = Mock(content=english_page.encode())
+
+        record = wiki.get_character_info(EN_URL)
+
+        assert record.site == "en"
+        assert record["Especie"] == "Human"
+        assert list(record.to_dict()) == [
+            "Nascimento",
+            "Especie",
+            "Genero",
+            "Nome",
+            "url",
+            "site",
+        ]
+
+    def test_same_name_is_kept_once_per_site(self):
+        """Test deduplication by name happens within each site."""
+        wiki = WikiCallerMultiprocessing(sites=["pt-br", "en"])
+        wiki.collect_records(
+            [
+                CharacterRecord("Harry Potter", PT_URL, {}, "pt-br"),
+                CharacterRecord("Harry Potter", EN_URL, {}, "en"),
+                CharacterRecord("Harry Potter", PT_URL + "_2", {}, "pt-br"),
+            ]
+        )
+        assert [record["site"] for record in wiki.records.records()] == ["pt-br", "en"]
+
+    def test_storage_has_site_columns(self):
+        """Test both sites load into one database with a site column."""
+        con = duckdb.connect()
+        records = [
+            CharacterRecord("Harry Potter", PT_URL, {"Casa": "Grifinória"}, "pt-br"),
+            CharacterRecord("Harry Potter", EN_URL, {"Casa": "Gryffindor"}, "en"),
+        ]
+        books = [PT_BR.seeds[0], EN.seeds[0]]
+        write_normalized(con, records, books, {PT_URL: books[:1], EN_URL: books[1:]})
+
+        assert con.sql("SELECT site, url FROM characters ORDER BY site").fetchall() == [
+            ("en", EN_URL),
+            ("pt-br", PT_URL),
+        ]
+        assert con.sql("SELECT site FROM books ORDER BY book_id").fetchall() == [
+            ("pt-br",),
+            ("en",),
+        ]
+        rows = con.sql(
+            "SELECT c.site, a.value FROM character_attributes a JOIN characters c USING (url) "
+            "WHERE a.attribute = 'Casa' ORDER BY c.site"
+        ).fetchall()
+        assert rows == [("en", "Gryffindor"), ("pt-br", "Grifinória")]
+        con.close()
@@ -0,0 +1,119 @@
+"""Tests for the versioned run history."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+
+from src.scrapers.records import CharacterRecord
+from src.scrapers.snapshots import SnapshotStore
+
+HARRY = {"Casa": "Grifinória", "Nome": "Harry Potter", "url": "https://example.com/harry"}
+DOBBY = {"Especie": "Elfo doméstico", "Nome": "Dobby", "url": "https://example.com/dobby"}
+RONY = {"Casa": "Grifinória", "Nome": "Rony Weasley", "url": "https://example.com/rony"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """History with three full runs: Dobby leaves in run 2, nothing changes in run 3."""
+    store = SnapshotStore(tmp_path / "history")
+    store.write_run([HARRY, DOBBY])
+    store.write_run([HARRY, RONY])
+    store.write_run([HARRY, RONY])
+    return store
+
+
+def partition_rows(partition) -> list[tuple]:
+    """Rows stored in a partition file."""
+    return duckdb.sql(
+        f"SELECT run_id, url, deleted FROM read_parquet('{partition.path}') ORDER BY ALL"
+    ).fetchall()
+
+
+class TestSnapshots:
+    """Tests for run partitions, as-of reads and compaction."""
+
+    def test_partitions_hold_only_changes(self, store):
+        """Test unchanged characters are not written again and removals are tombstones."""
+        first, second, third = store.partitions()
+
+        assert len(partition_rows(first)) == 2
+        assert partition_rows(second) == [
+            (2, DOBBY["url"], True),
+            (2, RONY["url"], False),
+        ]
+        assert partition_rows(third) == []
+        assert [run["changed"] for run in store.runs()] == [2, 2, 0]
+
+    def test_as_of_each_run(self, store):
+        """Test each run reads back exactly the records it saved."""
+        assert store.as_of(1) == [DOBBY, HARRY]
+        assert store.as_of(2) == store.as_of(3) == store.as_of() == [HARRY, RONY]
+        with pytest.raises(ValueError):
+            store.as_of(4)
+
+    def test_partial_run_keeps_other_characters(self, store):
+        """Test a partial run updates the given characters and removes nobody."""
+        harry = CharacterRecord("Harry Potter", HARRY["url"], {"Casa": "Sonserina"})
+
+        assert store.write_run([harry], partial=True) == 4
+        assert store.as_of(4) == [{**HARRY, "Casa": "Sonserina"}, RONY]
+        assert store.runs()[-1]["characters"] == 2
+
+    def test_compaction_keeps_every_version(self, store):
+        """Test old partitions merge into one file and as-of reads do not change."""
+        before = {run: store.as_of(run) for run in (1, 2, 3)}
+
+        merged = store.compact()
+
+        assert [(p.first, p.last) for p in store.partitions()] == [(1, 2), (3, 3)]
+        assert merged.path.name == "runs-000001-000002.parquet"
+        assert {run: store.as_of(run) for run in (1, 2, 3)} == before
+        assert store.compact() is None
+
+    def test_background_compaction(self, store):
+        """Test compaction starts in a thread only past the partition threshold."""
+        assert store.compact_in_background(threshold=4) is None
+
+        thread = store.compact_in_background(threshold=3)
+        thread.join()
+        assert len(store.partitions()) == 2
+        assert store.write_run([RONY]) == 4
+        assert store.as_of(4) == [RONY]
+
+    def test_compaction_waits_for_reads_in_progress(self, store):
+        """Test old partitions are not deleted under a read that already listed them."""
+        expected = store.as_of(3)
+        source = store._source
+        listed, resume = threading.Event(), threading.Event()
+
+        def slow_source(partitions=None):
+            result = source(partitions)
+            if partitions is None:  # a query listing the partitions itself
+                listed.set()
+                resume.wait(5)
+            return result
+
+        store._source = slow_source
+        with ThreadPoolExecutor(2) as pool:
+            read = pool.submit(store.as_of, 3)
+            listed.wait(5)
+            compaction = pool.submit(store.compact)
+
+            merged = store.directory / "runs-000001-000002.parquet"
+            for _ in range(500):
+                if merged.exists():
+                    break
+                time.sleep(0.01)
+            time.sleep(0.05)
+
+            assert not compaction.done()
+            assert len(list(store.directory.glob("runs-*.parquet"))) == 4
+
+            resume.set()
+            assert read.result(timeout=5) == expected
+            assert compaction.result(timeout=5) is not None
+
+        assert [(p.first, p.last) for p in store.partitions()] == [(1, 2), (3, 3)]
@@ -0,0 +1,144 @@
+"""Tests for the normalized DuckDB schema."""
+
+import duckdb
+import pytest
+
+from src.scrapers.storage import book_title, read_records, upsert_normalized, write_normalized
+
+BOOKS = [
+    "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_Pedra_Filosofal",
+    "https://harrypotter.fandom.com/pt-br/wiki/Harry_Potter_e_a_C%C3%A2mara_Secreta",
+]
+
+
+@pytest.fixture
+def records():
+    """Cleaned character records as produced by the scrapers."""
+    return [
+        {
+            "Nome": "Harry Potter",
+            "url": "https://example.com/harry",
+            "Casa": ["Grifinória"],
+            "Especie": ["Humano"],
+            "Familia": ["James Potter", "Lily Potter"],
+        },
+        {
+            "Nome": "Dobby",
+            "url": "https://example.com/dobby",
+            "Espécie": ["Elfo doméstico"],
+        },
+    ]
+
+
+@pytest.fixture
+def con(records):
+    """In-memory DuckDB loaded with the normalized schema."""
+    con = duckdb.connect()
+    character_books = {
+        "https://example.com/harry": BOOKS,
+        "https://example.com/dobby": BOOKS[1:],
+        "https://example.com/spell": BOOKS[:1],
+    }
+    write_normalized(con, records, BOOKS, character_books)
+    yield con
+    con.close()
+
+
+class TestStorage:
+    """Tests for write_normalized."""
+
+    def test_characters_keyed_by_url(self, con):
+        """Test one row per character."""
+        rows = con.sql("SELECT url, nome FROM characters ORDER BY nome").fetchall()
+        assert rows == [
+            ("https://example.com/dobby", "Dobby"),
+            ("https://example.com/harry", "Harry Potter"),
+        ]
+
+    def test_list_values_become_rows(self, con):
+        """Test list values are stored one item per row with their position."""
+        rows = con.sql(
+            "SELECT position, value FROM character_attributes "
+            "WHERE attribute = 'Familia' ORDER BY position"
+        ).fetchall()
+        assert rows == [(0, "James Potter"), (1, "Lily Potter")]
+
+    def test_character_books_only_for_characters(self, con):
+        """Test book links are kept only for extracted characters."""
+        assert con.sql("SELECT count(*) FROM character_books").fetchone() == (3,)
+        assert con.sql("SELECT title, characters FROM book_counts").fetchall() == [
+            ("Harry Potter e a Pedra Filosofal", 1),
+            ("Harry Potter e a Câmara Secreta", 2),
+        ]
+
+    def test_book_masks(self, con):
+        """Test each character gets one bit per book it appears in."""
+        rows = con.sql("SELECT nome, book_mask FROM characters ORDER BY nome").fetchall()
+        assert rows == [("Dobby", 0b10), ("Harry Potter", 0b11)]
+
+    def test_too_many_books_for_mask(self, records):
+        """Test a load with more books than mask bits is refused."""
+        books = [f"https://example.com/book_{i}" for i in range(65)]
+        with pytest.raises(ValueError):
+            write_normalized(duckdb.connect(), records, books, {})
+
+    def test_species_counts_ignore_accents_in_labels(self, con):
+        """Test species counts match both accented and plain labels."""
+        rows = con.sql("SELECT species, characters FROM species_counts ORDER BY species")
+        assert rows.fetchall() == [("Elfo doméstico", 1), ("Humano", 1)]
+
+    def test_reload_replaces_data(self, con, records):
+        """Test writing again replaces the previous load."""
+        write_normalized(con, records[:1], BOOKS, {})
+        assert con.sql("SELECT count(*) FROM characters").fetchone() == (1,)
+        assert con.sql("SELECT sum(characters) FROM book_counts").fetchone() == (0,)
+
+    def test_empty_load(self):
+        """Test an empty run still creates the schema."""
+        con = duckdb.connect()
+        write_normalized(con, [], BOOKS, {})
+        assert con.sql("SELECT count(*) FROM house_counts").fetchone() == (0,)
+
+    def test_book_title(self):
+        """Test book titles are decoded from the URL."""
+        assert book_title(BOOKS[1]) == "Harry Potter e a Câmara Secreta"
+
+    def test_read_records_round_trip(self, con, records):
+        """Test records read back have the same fields, single values as scalars."""
+        by_url = {record["url"]: record for record in read_records(con)}
+        assert by_url["https://example.com/harry"] == {
+            "Casa": "Grifinória",
+            "Especie": "Humano",
+            "Familia": ["James Potter", "Lily Potter"],
+            "Nome": "Harry Potter",
+            "url": "https://example.com/harry",
+        }
+        assert list(by_url["https://example.com/dobby"]) == ["Espécie", "Nome", "url"]
+
+    def test_upsert_replaces_only_given_characters(self, con):
+        """Test an upsert updates and adds characters and keeps the others."""
+        changes = upsert_normalized(
+            con,
+            [
+                {"Nome": "Harry Potter", "url": "https://example.com/harry", "Casa": "Sonserina"},
+                {"Nome": "Hedwig", "url": "https://example.com/hedwig", "Especie": "Coruja"},
+            ],
+        )
+
+        assert sorted((c["change"], c["Nome"]) for c in changes) == [
+            ("added", "Hedwig"),
+            ("changed", "Harry Potter"),
+        ]
+        rows = con.sql("SELECT nome FROM characters ORDER BY nome").fetchall()
+        assert rows == [("Dobby",), ("Harry Potter",), ("Hedwig",)]
+        rows = con.sql(
+            "SELECT attribute, value FROM character_attributes "
+            "WHERE url = 'https://example.com/harry'"
+        ).fetchall()
+        assert rows == [("Casa", "Sonserina")]
+        assert con.sql("SELECT count(*) FROM character_books").fetchone() == (3,)
+        rows = con.sql("SELECT nome, book_mask FROM characters ORDER BY nome").fetchall()
+        assert rows == [("Dobby", 0b10), ("Harry Potter", 0b11), ("Hedwig", 0)]
+        assert con.sql("SELECT house, characters FROM house_counts").fetchall() == [
+            ("Sonserina", 1)
+        ]
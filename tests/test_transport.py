@@ -0,0 +1,85 @@
+"""Tests for the async HTTP transport."""
+
+import asyncio
+import socket
+
+import pytest
+from aiohttp.abc import AbstractResolver
+
+from src.scrapers.transport import CachedResolver, Transport, TransportConfig
+
+
+class CountingResolver(AbstractResolver):
+    """Fake resolver that counts lookups and answers after a short sleep."""
+
+    lookups = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        CountingResolver.lookups += 1
+        await asyncio.sleep(0.01)
+        return [{"hostname": host, "host": "127.0.0.1", "port": port, "family": family}]
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def reset_lookups():
+    """Start each test with no lookups counted."""
+    CountingResolver.lookups = 0
+
+
+class TestCachedResolver:
+    """Tests for CachedResolver."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_query(self):
+        """Test a burst of lookups for one host resolves it once."""
+        resolver = CachedResolver(ttl=60, factory=CountingResolver)
+
+        results = await asyncio.gather(*[resolver.resolve("example.com", 443) for _ in range(10)])
+        await resolver.resolve("example.com", 443)
+
+        assert CountingResolver.lookups == 1
+        assert all(result == results[0] for result in results)
+        assert (resolver.misses, resolver.hits, resolver.flights.shared) == (1, 1, 9)
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_resolved_again(self):
+        """Test an address is looked up again once its TTL is over."""
+        resolver = CachedResolver(ttl=0, factory=CountingResolver)
+
+        await resolver.resolve("example.com", 443)
+        await resolver.resolve("example.com", 443)
+
+        assert CountingResolver.lookups == 2
+
+
+class TestTransport:
+    """Tests for Transport."""
+
+    @pytest.mark.asyncio
+    async def test_sessions_share_the_connector_while_open(self):
+        """Test sessions reuse one connector inside the context and own one outside it."""
+        transport = Transport(TransportConfig(keepalive=5))
+
+        async with transport:
+            async with transport.session() as first, transport.session() as second:
+                assert first.connector is second.connector is transport.connector
+            assert not transport.connector.closed
+
+        async with transport.session() as session:
+            assert session.connector is not None
+            assert session.connector_owner
+        assert transport.connector is None
+
+    @pytest.mark.asyncio
+    async def test_prewarm_failures_are_not_fatal(self):
+        """Test prewarming an unreachable host only reports no warm connections."""
+        transport = Transport(TransportConfig(prewarm=2), resolver_factory=CountingResolver)
+
+        async with transport:
+            assert await transport.prewarm(["http://unreachable.invalid:1"]) == 0
+
+        assert CountingResolver.lookups == 1
+        assert await transport.prewarm(["http://unreachable.invalid:1"], connections=0) == 0
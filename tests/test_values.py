@@ -0,0 +1,83 @@
+"""Tests for the attribute value normalization."""
+
+from datetime import date
+
+import duckdb
+import pytest
+
+from src.scrapers.storage import write_normalized
+from src.scrapers.values import lookup_key
+
+HARRY, DRACO, DOBBY = (f"https://example.com/{name}" for name in ("harry", "draco", "dobby"))
+
+
+@pytest.fixture
+def con():
+    """In-memory DuckDB loaded with records from both wikis."""
+    con = duckdb.connect()
+    records = [
+        {
+            "Nome": "Harry Potter",
+            "url": HARRY,
+            "Nascimento": "31 de julho de 1980[1]",
+            "Casa": "Grifinória [nota 2]",
+            "Status sanguineo": "Mestiço",
+        },
+        {
+            "Nome": "Draco Malfoy",
+            "url": DRACO,
+            "Nascimento": "5 June, 1980",
+            "Casa": "Slytherin",
+            "Status sanguineo": "Pure-blood[citation needed]",
+        },
+        {
+            "Nome": "Dobby",
+            "url": DOBBY,
+            "Espécie": "House-elf",
+            "Morte": "Março de 1998",
+            "Apelidos": ["[1]", "Dobby, o elfo livre"],
+        },
+    ]
+    write_normalized(con, records, [], {})
+    yield con
+    con.close()
+
+
+def values(con, attribute):
+    """Normalized rows of one attribute, by url."""
+    return con.sql(
+        "SELECT url, clean, canonical, day, month, year, date FROM attribute_values "
+        f"WHERE attribute = '{attribute}' ORDER BY url, position"
+    ).fetchall()
+
+
+class TestValues:
+    """Tests for attribute_values and the counts built on it."""
+
+    def test_dates_from_both_wikis(self, con):
+        """Test Portuguese and English dates are split, with partial dates kept partial."""
+        assert [row[3:] for row in values(con, "Nascimento")] == [
+            (5, 6, 1980, date(1980, 6, 5)),
+            (31, 7, 1980, date(1980, 7, 31)),
+        ]
+        assert values(con, "Morte")[0][3:] == (None, 3, 1998, None)
+
+    def test_canonical_values_and_markers(self, con):
+        """Test variants map to the Portuguese form and reference markers are stripped."""
+        assert [row[1:3] for row in values(con, "Status sanguineo")] == [
+            ("Pure-blood", "Sangue-puro"),
+            ("Mestiço", "Mestiço"),
+        ]
+        assert values(con, "Especie") == [
+            (DOBBY, "House-elf", "Elfo doméstico", None, None, None, None)
+        ]
+        assert [row[1] for row in values(con, "Apelidos")] == [None, "Dobby, o elfo livre"]
+
+    def test_counts_use_canonical_values(self, con):
+        """Test houses from both wikis are counted together."""
+        rows = con.sql("SELECT house, characters FROM house_counts ORDER BY house").fetchall()
+        assert rows == [("Grifinória", 1), ("Sonserina", 1)]
+
+    def test_lookup_key(self):
+        """Test lookup keys ignore accents, case and repeated spaces."""
+        assert lookup_key("  Elfo   Doméstico ") == "elfo domestico"
@@ -0,0 +1,184 @@
+"""Tests for the watch mode, against a local stand-in for the wiki."""
+
+import json
+
+import aiohttp
+import duckdb
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.scrapers import WikiCallerAsync
+from src.scrapers.sites import SiteProfile
+from src.scrapers.storage import read_records, write_normalized
+from src.scrapers.watch import Watcher, state_path
+
+INFOBOX = """
+<html>
+    <h2 class="pi-item pi-item-spacing pi-title pi-secondary-background">{nome}</h2>
+    <h3 class="pi-data-label pi-secondary-font">Nascimento</h3>
+    <div class="pi-data-value pi-font">{nascimento}</div>
+    <h3 class="pi-data-label pi-secondary-font">Casa</h3>
+    <div class="pi-data-value pi-font">{casa}</div>
+</html>
+"""
+
+PAGES = {
+    "Harry_Potter": INFOBOX.format(nome="Harry Potter", nascimento="1980", casa="Grifinória"),
+    "Dobby": INFOBOX.format(nome="Dobby", nascimento="1983", casa="Nenhuma"),
+    "Luna_Lovegood": INFOBOX.format(nome="Luna Lovegood", nascimento="1981", casa="Corvinal"),
+    "Expelliarmus": "<html><p>Feitiço de desarmamento</p></html>",
+}
+
+# Recent changes of the stand-in, oldest first
+CHANGES = [
+    {"type": "edit", "title": "Harry Potter", "timestamp": "2024-05-01T10:00:00Z"},
+    {"type": "edit", "title": "Expelliarmus", "timestamp": "2024-05-01T10:05:00Z"},
+    {"type": "new", "title": "Luna Lovegood", "timestamp": "2024-05-01T10:05:00Z"},
+    {"type": "new", "title": "Expelliarmus", "timestamp": "2024-05-01T11:00:00Z"},
+]
+
+
+async def api(request: web.Request) -> web.Response:
+    """Serve recentchanges from rcstart on, two changes per response."""
+    query = request.query
+    assert query["list"] == "recentchanges" and query["rcdir"] == "newer"
+    changes = [c for c in CHANGES if c["timestamp"] >= query["rcstart"]]
+    offset = int(query.get("rccontinue", 0))
+
+    data = {"query": {"recentchanges": changes[offset : offset + 2]}}
+    if offset + 2 < len(changes):
+        data["continue"] = {"rccontinue": str(offset + 2), "continue": "-||"}
+    return web.json_response(data)
+
+
+async def page(request: web.Request) -> web.Response:
+    """Serve a wiki page by title."""
+    html = PAGES.get(request.match_info["title"])
+    if html is None:
+        raise web.HTTPNotFound()
+    return web.Response(text=html, content_type="text/html")
+
+
+@pytest_asyncio.fixture
+async def site():
+    """Site profile pointing at the stand-in wiki."""
+    app = web.Application()
+    app.router.add_get("/pt-br/api.php", api)
+    app.router.add_get("/pt-br/wiki/{title}", page)
+
+    server = TestServer(app)
+    await server.start_server()
+    yield SiteProfile(
+        name="pt-br",
+        base_url=str(server.make_url("")).rstrip("/"),
+        wiki_path="/pt-br/wiki/",
+        seeds=(),
+        birth_label="Nascimento",
+        bio_header="Informações biográficas",
+    )
+    await server.close()
+
+
+@pytest.fixture
+def watcher(site, tmp_path, monkeypatch):
+    """Watcher over a database holding Harry and Dobby, with a saved position."""
+    monkeypatch.chdir(tmp_path)
+    db_name = str(tmp_path / "personagens.duckdb")
+    records = [
+        {"Nome": "Harry Potter", "url": site.page_url("Harry Potter"), "site": "pt-br"},
+        {"Nome": "Dobby", "url": site.page_url("Dobby"), "site": "pt-br", "Casa": "Nenhuma"},
+    ]
+    for record in records:
+        record["Nascimento"] = "1980"
+    with duckdb.connect(db_name) as con:
+        write_normalized(con, records, [], {})
+    state_path(db_name).write_text(
+        json.dumps({"pt-br": {"since": "2024-05-01T09:00:00Z", "seen": []}})
+    )
+
+    scraper = WikiCallerAsync(concurrency=4, sites=[site])
+    return Watcher(scraper, db_name, str(tmp_path / "personagens.csv"), interval=0)
+
+
+class TestWatcher:
+    """Tests for Watcher."""
+
+    @pytest.mark.asyncio
+    async def test_updates_edited_and_new_characters(self, watcher, site):
+        """Test edits of known characters and new character pages are upserted."""
+        await watcher.run(once=True)
+
+        with duckdb.connect(watcher.db_name, read_only=True) as con:
+            records = {record["Nome"]: record for record in read_records(con)}
+        assert set(records) == {"Harry Potter", "Dobby", "Luna Lovegood"}
+        assert records["Harry Potter"]["Casa"] == "Grifinória"
+        assert records["Dobby"]["Nascimento"] == "1980"  # not edited
+        assert records["Luna Lovegood"]["url"] == site.page_url("Luna Lovegood")
+
+        with open(watcher.csv_path, encoding="utf-8") as f:
+            assert sum(1 for _ in f) == 4  # header and three characters
+
+        state = json.loads(state_path(watcher.db_name).read_text())
+        assert state["pt-br"] == {"since": "2024-05-01T11:00:00Z", "seen": ["Expelliarmus"]}
+
+    @pytest.mark.asyncio
+    async def test_changes_are_not_processed_twice(self, watcher):
+        """Test the next poll skips changes at the saved timestamp."""
+        await watcher.run(once=True)
+
+        watcher.scraper.upsert_to_duckdb = None  # fails if anything is saved
+        await watcher.run(once=True)
+        assert len(watcher.records) == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_extraction_is_retried_next_poll(self, watcher, site):
+        """Test a page whose extraction failed is visited again on the next poll."""
+        extract = watcher.scraper.get_character_info
+        failures = []
+
+        async def flaky(session, url):
+            if "Luna" in url and not failures:
+                failures.append(url)
+                raise aiohttp.ClientConnectionError("connection reset")
+            return await extract(session, url)
+
+        watcher.scraper.get_character_info = flaky
+        await watcher.run(once=True)
+
+        assert "Luna Lovegood" not in {r["Nome"] for r in watcher.records.values()}
+        state = json.loads(state_path(watcher.db_name).read_text())
+        assert state["pt-br"]["retry"] == [site.page_url("Luna Lovegood")]
+
+        await watcher.run(once=True)
+
+        assert "Luna Lovegood" in {r["Nome"] for r in watcher.records.values()}
+        state = json.loads(state_path(watcher.db_name).read_text())
+        assert "retry" not in state["pt-br"]
+
+    @pytest.mark.asyncio
+    async def test_transient_error_keeps_position(self, watcher):
+        """Test a failed save is logged, not raised, and the position is rolled back."""
+
+        def locked(*args, **kwargs):
+            raise duckdb.IOException("database is locked")
+
+        watcher.scraper.upsert_to_duckdb = locked
+        await watcher.run(once=True)
+
+        assert watcher.state["pt-br"] == {"since": "2024-05-01T09:00:00Z", "seen": []}
+        assert len(watcher.records) == 2
+
+        del watcher.scraper.upsert_to_duckdb
+        await watcher.run(once=True)
+        assert len(watcher.records) == 3
+
+    def test_new_changes_advances_position(self, watcher, site):
+        """Test the position moves to the latest timestamp seen."""
+        watcher.state = {"pt-br": {"since": "2024-05-01T10:05:00Z", "seen": ["Expelliarmus"]}}
+
+        fresh = watcher.new_changes(site, CHANGES[1:])
+
+        assert [change["title"] for change in fresh] == ["Luna Lovegood", "Expelliarmus"]
+        assert watcher.state["pt-br"] == {"since": "2024-05-01T11:00:00Z", "seen": ["Expelliarmus"]}
@@ -1,12 +1,22 @@
 """Tests for WikiCaller classes."""
 
-from unittest.mock import Mock, patch
+import asyncio
+import json
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, Mock, patch
 
+import aiohttp
 import pytest
 from bs4 import BeautifulSoup
 from selectolax.lexbor import LexborHTMLParser as HTMLParser
 
-from src.scrapers import WikiCallerAsync, WikiCallerMultiprocessing, WikiCallerSync
+from src.scrapers import (
+    WikiCallerAsync,
+    WikiCallerMultiprocessing,
+    WikiCallerSync,
+    wiki_caller_multiprocessing,
+)
+from src.scrapers.concurrency import AdaptiveLimiter, LatencyTracker
 
 
 class TestWikiCallerSync:
@@ -53,7 +63,7 @@ class TestWikiCallerSync:
         """Test verify_href returns href when character has banner."""
         wiki = WikiCallerSync()
         mock_response = Mock()
-        mock_response.text = sample_html_with_banner
+        mock_response.content = sample_html_with_banner.encode()
         mock_get.return_value = mock_response
 
         result = wiki.verify_href("https://example.com/harry")
@@ -66,7 +76,7 @@ class TestWikiCallerSync:
         """Test verify_href returns None when character has no info."""
         wiki = WikiCallerSync()
         mock_response = Mock()
-        mock_response.text = sample_html_without_banner
+        mock_response.content = sample_html_without_banner.encode()
         mock_get.return_value = mock_response
 
         result = wiki.verify_href("https://example.com/spell")
@@ -97,21 +107,21 @@ class TestWikiCallerMultiprocessing:
         """Test have_banner returns True when banner exists."""
         wiki = WikiCallerMultiprocessing()
         mock_response = Mock()
-        mock_response.text = sample_html_with_banner
+        mock_response.content = sample_html_with_banner.encode()
         assert wiki.have_banner(mock_response) is True
 
     def test_have_banner_without_banner(self, sample_html_without_banner):
         """Test have_banner returns False when banner doesn't exist."""
         wiki = WikiCallerMultiprocessing()
         mock_response = Mock()
-        mock_response.text = sample_html_without_banner
+        mock_response.content = sample_html_without_banner.encode()
         assert wiki.have_banner(mock_response) is False
 
     def test_have_informacoes_bibliograficas(self, sample_html_with_bio_info):
         """Test biographical information detection."""
         wiki = WikiCallerMultiprocessing()
         mock_response = Mock()
-        mock_response.text = sample_html_with_bio_info
+        mock_response.content = sample_html_with_bio_info.encode()
         assert wiki.have_informacoes_bibliograficas(mock_response) is True
 
     def test_verify_href_with_banner(self, sample_html_with_banner):
@@ -119,7 +129,7 @@ class TestWikiCallerMultiprocessing:
         wiki = WikiCallerMultiprocessing()
         wiki.session = Mock()
         mock_response = Mock()
-        mock_response.text = sample_html_with_banner
+        mock_response.content = sample_html_with_banner.encode()
         wiki.session.get.return_value = mock_response
 
         result = wiki.verify_href("https://example.com/harry")
@@ -131,12 +141,141 @@ class TestWikiCallerMultiprocessing:
         wiki = WikiCallerMultiprocessing()
         wiki.session = Mock()
         mock_response = Mock()
-        mock_response.text = sample_html_without_banner
+        mock_response.content = sample_html_without_banner.encode()
         wiki.session.get.return_value = mock_response
 
         result = wiki.verify_href("https://example.com/spell")
         assert result is None
 
+    def test_parse_reuses_tree_for_same_response(self, sample_html_with_banner):
+        """Test a response body is parsed from bytes only once."""
+        wiki = WikiCallerMultiprocessing()
+        mock_response = Mock()
+        mock_response.content = sample_html_with_banner.encode()
+
+        tree = wiki.parse(mock_response)
+        assert wiki.parse(mock_response) is tree
+        assert wiki.have_banner(mock_response) is True
+
+    def test_verify_task_extracts_character(self, sample_character_page_html):
+        """Test the worker task returns the verified URL with its data."""
+        wiki_caller_multiprocessing.init_worker()
+        worker = wiki_caller_multiprocessing._worker
+        worker.session = Mock()
+        mock_response = Mock()
+        mock_response.content = sample_character_page_html.encode()
+        worker.session.get.return_value = mock_response
+
+        href, char_info, samples = wiki_caller_multiprocessing.verify_task(
+            "https://example.com/harry"
+        )
+
+        assert href == "https://example.com/harry"
+        assert char_info["Nome"] == "Harry Potter"
+        assert char_info["Especie"] == "Humano"
+        assert len(samples) == 1
+        worker.session.get.assert_called_once()
+        assert worker.cache == {}
+
+    def test_verify_task_without_info(self, sample_html_without_banner):
+        """Test the worker task skips extraction for non-character pages."""
+        wiki_caller_multiprocessing.init_worker()
+        worker = wiki_caller_multiprocessing._worker
+        worker.session = Mock()
+        mock_response = Mock()
+        mock_response.content = sample_html_without_banner.encode()
+        worker.session.get.return_value = mock_response
+
+        href, char_info, _ = wiki_caller_multiprocessing.verify_task("https://example.com/spell")
+        assert (href, char_info) == (None, None)
+        assert worker.cache == {}  # rejected pages do not stay in the worker
+
+    def test_dispatch_respects_limit(self):
+        """Test dispatch never has more tasks in flight than the limiter allows."""
+        wiki = WikiCallerMultiprocessing(processes=4)
+        in_flight = []
+
+        class InlinePool:
+            def apply_async(self, task, args, callback, error_callback):
+                in_flight.append(wiki.limiter.in_flight)
+                callback(task(*args))
+
+        def task(url):
+            return url, [(0.1, 200)]
+
+        urls = [f"https://example.com/{i}" for i in range(20)]
+        results = list(wiki.dispatch(InlinePool(), task, urls))
+
+        assert sorted(url for (url,) in results) == sorted(urls)
+        assert max(in_flight) <= 4
+        assert wiki.limiter.in_flight == 0
+
+    def test_dispatch_sends_chunks_gated_by_limit(self):
+        """Test items travel in chunks and the limiter bounds the chunks in flight."""
+        wiki = WikiCallerMultiprocessing(processes=2)
+        chunks = []
+
+        class InlinePool:
+            def apply_async(self, task, args, callback, error_callback):
+                chunks.append((len(args[1]), wiki.limiter.in_flight))
+                callback(task(*args))
+
+        def task(url):
+            return url, [(0.1, 200)]
+
+        urls = [f"https://example.com/{i}" for i in range(40)]
+        results = list(wiki.dispatch(InlinePool(), task, urls))
+
+        assert sorted(url for (url,) in results) == sorted(urls)
+        assert [size for size, _ in chunks] == [5] * 8
+        assert max(in_flight for _, in_flight in chunks) <= wiki.limiter.limit
+        assert wiki.progress.done["requests"] == 40
+
+    def test_verified_characters_are_sorted(self, monkeypatch):
+        """Test verified links are ordered by URL whatever order the chunks finish in."""
+        wiki = WikiCallerMultiprocessing(processes=2, sites=["pt-br"])
+        wiki.url_livros = ["https://example.com/livro"]
+        links = [f"https://example.com/wiki/P{i}" for i in (3, 1, 2)]
+
+        class ReversePool:
+            def imap(self, task, items):
+                return [links for _ in items]
+
+        @contextmanager
+        def pool():
+            yield ReversePool()
+
+        def dispatch(pool, task, items, stage=None):
+            return ((url, None) for url in reversed(items))
+
+        monkeypatch.setattr(wiki, "pool", pool)
+        monkeypatch.setattr(wiki, "dispatch", dispatch)
+        wiki.get_data()
+
+        assert wiki.verified_characters == sorted(links)
+
+    def test_dispatch_skips_after_crawl_deadline(self):
+        """Test nothing is dispatched once the crawl budget is spent, and the skip is counted."""
+        wiki = WikiCallerMultiprocessing(processes=4, crawl_timeout=0)
+
+        class InlinePool:
+            def apply_async(self, task, args, callback, error_callback):
+                callback(task(*args))
+
+        def task(url):
+            return url, [(0.1, 200)]
+
+        urls = [f"https://example.com/{i}" for i in range(5)]
+
+        assert list(wiki.dispatch(InlinePool(), task, urls, stage="links")) == []
+        assert wiki.skipped == {"links": 5}
+
+    def test_crawl_deadline_is_shared_by_stages(self):
+        """Test every stage checks the same crawl budget instead of restarting it."""
+        wiki = WikiCallerMultiprocessing(processes=4, crawl_timeout=60)
+
+        assert wiki.crawl_deadline() is wiki.crawl_deadline()
+
 
 class TestWikiCallerAsync:
     """Tests for async WikiCaller."""
@@ -194,6 +333,78 @@ class TestWikiCallerAsync:
         assert result == "cached content"
         mock_session.get.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_saturated_limiter_sends_no_hedges(self):
+        """Test slow requests get backups only while the limiter has spare slots."""
+        wiki = WikiCallerAsync(hedge=True)
+        wiki.latency = LatencyTracker(min_samples=1, min_delay=0.01)
+        wiki.latency.add(0.01)
+        attempts = []
+
+        async def slow_attempt(session, url):
+            attempts.append(url)
+            await asyncio.sleep(0.05)
+            return 200, b"<html></html>"
+
+        wiki.attempt = slow_attempt
+
+        wiki.limiter = AdaptiveLimiter(initial=1, max_limit=1)
+        await wiki.request(Mock(), "https://example.com/a")
+        assert (len(attempts), wiki.latency.hedges) == (1, 0)
+
+        wiki.limiter = AdaptiveLimiter(initial=4, max_limit=4)
+        await wiki.request(Mock(), "https://example.com/b")
+        assert (len(attempts), wiki.latency.hedges) == (3, 1)
+
+    @pytest.mark.asyncio
+    async def test_hedges_hold_their_own_limiter_slot(self):
+        """Test backups count against the limit and report throttling to it."""
+        wiki = WikiCallerAsync(hedge=True)
+        wiki.latency = LatencyTracker(min_samples=1, min_delay=0.01)
+        wiki.latency.add(0.01)
+        wiki.limiter = AdaptiveLimiter(initial=2, min_limit=2, max_limit=2)
+        peak = 0
+        attempts = []
+
+        async def slow_attempt(session, url):
+            nonlocal peak
+            peak = max(peak, wiki.limiter.in_flight)
+            attempts.append(url)
+            if attempts.count(url) > 1:
+                raise aiohttp.ClientResponseError(Mock(), (), status=429)
+            await asyncio.sleep(0.05)
+            return 200, b"<html></html>"
+
+        wiki.attempt = slow_attempt
+
+        await wiki.request(Mock(), "https://example.com/a")
+        assert (len(attempts), wiki.latency.hedges, peak) == (2, 1, 2)
+        assert wiki.limiter.decreases == 1
+        assert wiki.limiter.in_flight == 0
+
+        pages = [f"https://example.com/{i}" for i in range(4)]
+        await asyncio.gather(*(wiki.request(Mock(), url) for url in pages))
+        assert peak <= wiki.limiter.limit
+
+    @pytest.mark.asyncio
+    async def test_fetch_keeps_body_as_bytes(self, sample_html_with_banner):
+        """Test fetch caches the raw body without decoding it."""
+        wiki = WikiCallerAsync()
+        body = sample_html_with_banner.encode()
+
+        response = AsyncMock()
+        response.status = 200
+        response.raise_for_status = Mock()
+        response.read.return_value = body
+        mock_session = Mock()
+        mock_session.get.return_value.__aenter__ = AsyncMock(return_value=response)
+        mock_session.get.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        assert await wiki.fetch(mock_session, "https://example.com/harry") == body
+        assert wiki.cache["https://example.com/harry"] is body
+        assert await wiki.verify_href(mock_session, "https://example.com/harry")
+        response.text.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_verify_href_with_banner(self, sample_html_with_banner):
         """Test verify_href returns href when character has banner."""
@@ -220,6 +431,60 @@ class TestWikiCallerAsync:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_pipeline_extracts_verified_characters(
+        self,
+        tmp_path,
+        sample_book_page_html,
+        sample_character_page_html,
+        sample_html_with_bio_info,
+        sample_html_without_banner,
+    ):
+        """Test the queue pipeline verifies, extracts and writes characters."""
+        wiki = WikiCallerAsync(concurrency=2, journal_path=str(tmp_path / "personagens.jsonl"))
+        base = "https://harrypotter.fandom.com/pt-br/wiki/"
+        for url in wiki.url_livros:
+            wiki.cache[url] = sample_book_page_html
+        wiki.cache[base + "Harry_Potter"] = sample_character_page_html
+        wiki.cache[base + "Hermione_Granger"] = sample_html_with_bio_info
+        wiki.cache[base + "Ronald_Weasley"] = sample_html_without_banner
+
+        await wiki.pipeline()
+
+        assert sorted(wiki.verified_characters) == [
+            base + "Harry_Potter",
+            base + "Hermione_Granger",
+        ]
+        names = sorted(record["Nome"] for record in wiki.to_dicts())
+        assert names == ["Harry Potter", "Hermione Granger"]
+
+        journal = (tmp_path / "personagens.jsonl").read_text(encoding="utf-8").splitlines()
+        assert sorted(json.loads(line)["Nome"] for line in journal) == names
+
+    @pytest.mark.asyncio
+    async def test_pipeline_keeps_lowest_url_among_duplicates(self, tmp_path):
+        """Test the surviving duplicate does not depend on which extraction ends first."""
+        wiki = WikiCallerAsync(concurrency=2, journal_path=str(tmp_path / "personagens.jsonl"))
+        first, second = "https://example.com/wiki/A", "https://example.com/wiki/B"
+
+        async def get_book_info(session, url):
+            return {first, second}
+
+        async def verify_href(session, href):
+            return href
+
+        async def get_character_info(session, url):
+            await asyncio.sleep(0.05 if url == first else 0)
+            return {"Nome": "Harry Potter", "url": url, "site": "pt-br"}
+
+        wiki.get_book_info = get_book_info
+        wiki.verify_href = verify_href
+        wiki.get_character_info = get_character_info
+        await wiki.pipeline()
+
+        assert [record["url"] for record in wiki.to_dicts()] == [first]
+        assert wiki.verified_characters == [first, second]
+
 
 class TestRemoveAccents:
     """Test accent removal across all implementations."""
@@ -0,0 +1,105 @@
+"""Tests for the background writer stage."""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from src.scrapers.records import CharacterRecord
+from src.scrapers.writer import BackgroundWriter
+
+
+def read_lines(path):
+    """Read a JSONL file."""
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestBackgroundWriter:
+    """Tests for BackgroundWriter."""
+
+    @pytest.mark.asyncio
+    async def test_writes_every_record_in_order(self, tmp_path):
+        """Test records and dicts are all written, full and partial batches alike."""
+        path = tmp_path / "out.jsonl"
+        async with BackgroundWriter(path, batch_size=3, fsync="batch") as writer:
+            for i in range(7):
+                await writer.write(CharacterRecord(f"P{i}", f"u{i}", {"Casa": "Grifinoria"}))
+            await writer.write({"Nome": "Dict", "url": "d"})
+
+        lines = read_lines(path)
+        assert [line["Nome"] for line in lines] == [f"P{i}" for i in range(7)] + ["Dict"]
+        assert lines[0] == {"Casa": "Grifinoria", "Nome": "P0", "url": "u0"}
+        assert writer.written == 8
+        assert writer.syncs >= 3
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_while_disk_is_slow(self, tmp_path, monkeypatch):
+        """Test a slow fsync in the writer thread does not stall the event loop."""
+        path = tmp_path / "out.jsonl"
+        main_thread = threading.get_ident()
+        fsync_threads = []
+
+        def slow_fsync(fd):
+            fsync_threads.append(threading.get_ident())
+            time.sleep(0.05)
+
+        monkeypatch.setattr("src.scrapers.writer.os.fsync", slow_fsync)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        async with BackgroundWriter(path, batch_size=1, max_pending=2, fsync="batch") as writer:
+            for i in range(5):
+                await writer.write({"Nome": f"P{i}", "url": str(i)})
+        task.cancel()
+
+        assert len(read_lines(path)) == 5
+        assert fsync_threads and main_thread not in fsync_threads
+        assert ticks >= 20
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_is_flushed_on_interval(self, tmp_path):
+        """Test a slow trickle of records still reaches the file before close."""
+        path = tmp_path / "out.jsonl"
+        async with BackgroundWriter(path, batch_size=100, flush_interval=0.01) as writer:
+            await writer.write({"Nome": "A", "url": "a"})
+            await asyncio.sleep(0.02)
+            await writer.write({"Nome": "B", "url": "b"})
+            await asyncio.sleep(0.05)
+
+            assert [line["Nome"] for line in read_lines(path)] == ["A", "B"]
+
+    @pytest.mark.asyncio
+    async def test_lone_record_is_flushed_without_further_writes(self, tmp_path):
+        """Test a partial batch reaches the file after one interval with no new records."""
+        path = tmp_path / "out.jsonl"
+        async with BackgroundWriter(path, batch_size=100, flush_interval=0.05) as writer:
+            await writer.write({"Nome": "A", "url": "a"})
+            assert writer._batch
+
+            await asyncio.sleep(0.2)
+
+            assert [line["Nome"] for line in read_lines(path)] == ["A"]
+
+    @pytest.mark.asyncio
+    async def test_write_error_is_raised_in_the_loop(self, tmp_path):
+        """Test a failure in the writer thread surfaces to the caller."""
+        writer = BackgroundWriter(tmp_path / "out.jsonl", batch_size=1)
+        with pytest.raises(RuntimeError, match="Falha ao gravar"):
+            async with writer:
+                await writer.write({"Nome": object(), "url": "a"})
+                await asyncio.sleep(0.05)
+                await writer.write({"Nome": "B", "url": "b"})
+
+    def test_rejects_unknown_fsync_policy(self, tmp_path):
+        """Test the fsync policy is validated."""
+        with pytest.raises(ValueError):
+            BackgroundWriter(tmp_path / "out.jsonl", fsync="sometimes")